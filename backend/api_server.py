@@ -1,22 +1,32 @@
 # backend/api_server.py
 from __future__ import annotations
 
-from typing import List, Literal
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Literal, Optional
+import asyncio
+import json
+import os
+import threading
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 
+import tracing
+
 # ------------------------------------------------------------
 # 0. LangGraph 에이전트 가져오기 (fsd_graph)
 # ------------------------------------------------------------
 
 try:
-    from fsd_graph import run_fsd_agent  # type: ignore
+    from fsd_graph import run_fsd_agent, stream_fsd_agent  # type: ignore
     HAS_FSD_GRAPH = True
     print("[api_server] fsd_graph.run_fsd_agent import 성공")
 except Exception as e:
     run_fsd_agent = None  # type: ignore
+    stream_fsd_agent = None  # type: ignore
     HAS_FSD_GRAPH = False
     print(f"[api_server] fsd_graph import 실패, 더미 모드로 동작합니다: {e}")
 
@@ -25,7 +35,52 @@ except Exception as e:
 # 1. FastAPI 기본 설정
 # ------------------------------------------------------------
 
-app = FastAPI()
+async def start_corpus_refresher() -> None:
+    """
+    코퍼스 백그라운드 증분 갱신 시작 (FSD_CORPUS_REFRESH_SEC 주기, 0 이면 끔).
+    /fsd-chat 은 이 코퍼스에서 먼저 답하고, 글이 부족한 키워드만 실시간 크롤링.
+    """
+    if not HAS_FSD_GRAPH:
+        return
+    try:
+        import fsd_tools
+
+        if fsd_tools.start_corpus_refresher():
+            print(f"[api_server] 코퍼스 갱신 스레드 시작 (주기 {fsd_tools.CORPUS_REFRESH_INTERVAL:.0f}s)")
+    except Exception as e:
+        print(f"[api_server] 코퍼스 갱신 스레드 시작 실패: {e}")
+
+
+async def preload_lda_models() -> None:
+    """저장된 온라인 LDA 모델(DATA_DIR/lda_online_k*.joblib)을 첫 요청 전에 미리 로드."""
+    if not HAS_FSD_GRAPH:
+        return
+    try:
+        import fsd_tools
+
+        await asyncio.to_thread(fsd_tools.preload_lda_models)
+    except Exception as e:
+        print(f"[api_server] LDA 모델 미리 로드 실패: {e}")
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    """서버 시작 시 코퍼스 갱신 스레드 + LDA 모델 로드, 종료 시 갱신 스레드 정지."""
+    await start_corpus_refresher()
+    await preload_lda_models()
+    try:
+        yield
+    finally:
+        if HAS_FSD_GRAPH:
+            try:
+                import fsd_tools
+
+                fsd_tools.stop_corpus_refresher()
+            except Exception:
+                pass
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -36,6 +91,73 @@ app.add_middleware(
 )
 
 
+# ------------------------------------------------------------
+# 1-1. 에이전트 실행용 워커 풀
+#   run_fsd_agent 는 LLM 호출/크롤링/감성분석/LDA 가 모두 동기 코드라
+#   이벤트 루프에서 직접 돌리면 다른 요청이 전부 멈춘다.
+#   → 별도 스레드 풀에서 실행하고, 동시 실행 수 + 대기열 길이를 제한.
+#   - FSD_AGENT_MAX_CONCURRENCY: 동시에 돌릴 수 있는 에이전트 수
+#   - FSD_AGENT_MAX_QUEUE: 실행 대기 중으로 받아줄 최대 요청 수 (초과 시 503)
+# ------------------------------------------------------------
+
+AGENT_MAX_CONCURRENCY = int(os.environ.get("FSD_AGENT_MAX_CONCURRENCY", "2"))
+AGENT_MAX_QUEUE = int(os.environ.get("FSD_AGENT_MAX_QUEUE", "8"))
+
+_agent_pool = ThreadPoolExecutor(
+    max_workers=AGENT_MAX_CONCURRENCY,
+    thread_name_prefix="fsd-agent",
+)
+_agent_lock = threading.Lock()
+_agent_pending = 0  # 실행 중 + 대기 중인 에이전트 수
+
+
+def _release_agent_slot(_fut: Any = None) -> None:
+    global _agent_pending
+    with _agent_lock:
+        _agent_pending -= 1
+
+
+def _agent_busy() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="요청이 많아 잠시 후 다시 시도해 주세요.",
+        headers={"Retry-After": "5"},
+    )
+
+
+def _check_agent_slot() -> None:
+    """슬롯을 잡지 않고 지금 자리가 있는지만 확인 (없으면 503)."""
+    with _agent_lock:
+        if _agent_pending >= AGENT_MAX_CONCURRENCY + AGENT_MAX_QUEUE:
+            raise _agent_busy()
+
+
+def _acquire_agent_slot() -> None:
+    """
+    자리가 없으면 503. (실행 중 AGENT_MAX_CONCURRENCY + 대기 AGENT_MAX_QUEUE 초과)
+    """
+    global _agent_pending
+    with _agent_lock:
+        if _agent_pending >= AGENT_MAX_CONCURRENCY + AGENT_MAX_QUEUE:
+            raise _agent_busy()
+        _agent_pending += 1
+
+
+async def run_agent_in_pool(fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    fn(*args)를 에이전트 풀에서 실행하고 결과를 await.
+    슬롯은 실제 작업이 끝났을 때(또는 대기 중 취소됐을 때) 반납된다.
+    """
+    _acquire_agent_slot()
+    try:
+        fut = _agent_pool.submit(fn, *args)
+    except Exception:
+        _release_agent_slot()
+        raise
+    fut.add_done_callback(_release_agent_slot)
+    return await asyncio.wrap_future(fut)
+
+
 # ------------------------------------------------------------
 # 2. Pydantic 모델
 # ------------------------------------------------------------
@@ -48,11 +170,37 @@ class SentimentPoint(BaseModel):
 
 class FSDChatRequest(BaseModel):
     message: str
+    # True 면 응답에 단계별 소요 시간(timings)을 같이 내려줌
+    includeTimings: bool = False
+
+
+class TimingSpan(BaseModel):
+    name: str
+    parent: Optional[str] = None
+    start_ms: float
+    duration_ms: float
+    attrs: Dict[str, Any] = {}
 
 
 class FSDChatResponse(BaseModel):
     answer: str
     sentimentChart: List[SentimentPoint]
+    # 이번 요청에서 탄 planner 경로 (fast | llm | llm_fallback), confidence, 소요 시간
+    planner: Optional[Dict[str, Any]] = None
+    # includeTimings=True 일 때만 채워짐 (planner / crawl_keyword / sentiment / lda / llm_summary ...)
+    timings: Optional[List[TimingSpan]] = None
+
+
+class KeywordSentiment(BaseModel):
+    keyword: str
+    count: int
+    mean: float
+    std: float
+    min: Optional[float] = None
+    max: Optional[float] = None
+    sentiment: Literal["Negative", "Mixed", "Neutral", "Positive"]
+    # series=true 일 때만: [{day: "YYYY-MM-DD", count, mean}, ...]
+    series: Optional[List[Dict[str, Any]]] = None
 
 
 # 프론트 기본 차트와 동일한 더미 값
@@ -69,6 +217,13 @@ DEFAULT_SENTIMENT_CHART = [
 # 3. 엔드포인트
 # ------------------------------------------------------------
 
+def _run_agent_traced(message: str):
+    """워커 스레드에서 run_fsd_agent 를 trace 로 감싸 실행 → (결과, span 리스트)."""
+    with tracing.trace_request("fsd_chat") as tr:
+        result = run_fsd_agent(message)  # type: ignore[misc]
+    return result, tr.to_list()
+
+
 @app.post("/fsd-chat", response_model=FSDChatResponse)
 async def fsd_chat(req: FSDChatRequest) -> FSDChatResponse:
     """
@@ -85,8 +240,9 @@ async def fsd_chat(req: FSDChatRequest) -> FSDChatResponse:
         )
 
     # 2) 정상적으로 에이전트 호출 시도
+    #    (워커 풀에서 실행 → 이벤트 루프는 다른 요청을 계속 처리, 풀이 꽉 차면 503)
     try:
-        result = run_fsd_agent(req.message)  # type: ignore[arg-type]
+        result, timings = await run_agent_in_pool(_run_agent_traced, req.message)
 
         # LangGraph 쪽에서 내려준 결과 파싱
         raw_chart = result.get("sentiment_chart") or []
@@ -100,8 +256,13 @@ async def fsd_chat(req: FSDChatRequest) -> FSDChatResponse:
         return FSDChatResponse(
             answer=answer,
             sentimentChart=sentiment_chart,
+            planner=result.get("planner"),
+            timings=[TimingSpan(**t) for t in timings] if req.includeTimings else None,
         )
 
+    except HTTPException:
+        raise
+
     # 3) 에이전트 실행 중 예외 → 더미 차트 + 오류 메시지
     except Exception as e:
         print(f"[/fsd-chat] run_fsd_agent 실행 중 오류, 더미로 폴백: {e}")
@@ -109,3 +270,158 @@ async def fsd_chat(req: FSDChatRequest) -> FSDChatResponse:
             answer=f"툴 실행 중 오류가 발생했습니다: {e}",
             sentimentChart=DEFAULT_SENTIMENT_CHART,
         )
+
+
+# ------------------------------------------------------------
+# 4. 스트리밍 엔드포인트 (Server-Sent Events)
+# ------------------------------------------------------------
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    payload = json.dumps(data, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+async def _stream_agent_events(message: str, include_timings: bool = False) -> AsyncIterator[str]:
+    """
+    stream_fsd_agent 를 에이전트 풀 스레드에서 그대로 돌리고 (요청당 스레드 하나),
+    나오는 이벤트를 asyncio.Queue 로 넘겨 받아 SSE 문자열로 흘려보낸다.
+    - 슬롯은 제너레이터 안에서 잡음 → 첫 반복 전에 클라이언트가 끊어도 새지 않음
+    - 클라이언트가 끊으면 cancelled 를 set → 파이프라인이 다음 단계 경계에서 멈춤
+    - timings 이벤트는 include_timings 일 때만 (/fsd-chat 의 includeTimings 와 같음)
+    """
+    loop = asyncio.get_running_loop()
+    events: "asyncio.Queue[Any]" = asyncio.Queue()
+    finished = object()
+    cancelled = threading.Event()
+
+    def _emit(ev: Dict[str, Any]) -> None:
+        loop.call_soon_threadsafe(events.put_nowait, ev)
+
+    def _produce() -> None:
+        try:
+            with tracing.trace_request("fsd_chat_stream") as tr:
+                stream_fsd_agent(message, _emit, cancelled)  # type: ignore[misc]
+            if include_timings and not cancelled.is_set():
+                _emit({"event": "timings", "timings": tr.to_list()})
+        except Exception as e:
+            print(f"[/fsd-chat/stream] 스트리밍 중 오류: {e}")
+            _emit({"event": "error", "message": f"툴 실행 중 오류가 발생했습니다: {e}"})
+        finally:
+            loop.call_soon_threadsafe(events.put_nowait, finished)
+
+    try:
+        _acquire_agent_slot()
+    except HTTPException as e:
+        # 엔드포인트 확인 뒤 그 사이에 자리가 찬 경우 (상태 코드는 이미 200)
+        yield _sse("error", {"message": e.detail})
+        return
+
+    submitted = False
+    try:
+        # 첫 바이트는 바로 내보낸다 (에이전트가 대기열에 있어도 연결은 살아 있음을 알림)
+        yield _sse("start", {"message": message})
+
+        fut = _agent_pool.submit(_produce)
+        submitted = True
+        fut.add_done_callback(_release_agent_slot)
+
+        while True:
+            ev = await events.get()
+            if ev is finished:
+                break
+            ev = dict(ev)
+            name = ev.pop("event", "message")
+            yield _sse(name, ev)
+    finally:
+        # 클라이언트가 끊으면 워커에게 알려서 다음 단계 경계에서 멈추게 함
+        cancelled.set()
+        if not submitted:
+            _release_agent_slot()
+
+
+@app.post("/fsd-chat/stream")
+async def fsd_chat_stream(req: FSDChatRequest) -> StreamingResponse:
+    """
+    /fsd-chat 의 SSE 버전.
+    planner 키워드 → 키워드별 크롤링 진행 → 감성 차트 → LDA 토픽 → 답변 토큰 → done
+    순서로 이벤트를 흘려보낸다.
+    """
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+    if not HAS_FSD_GRAPH or stream_fsd_agent is None:
+        print("[/fsd-chat/stream] stream_fsd_agent 없음 → 더미 응답 반환")
+
+        async def _dummy() -> AsyncIterator[str]:
+            yield _sse(
+                "done",
+                {
+                    "answer": "백엔드 호출 중 오류가 발생했어요. 서버(fsd_graph)가 제대로 올라와 있는지 확인해 주세요.",
+                    "sentiment_chart": [p.model_dump() for p in DEFAULT_SENTIMENT_CHART],
+                    "lda_topics": [],
+                },
+            )
+
+        return StreamingResponse(_dummy(), media_type="text/event-stream", headers=headers)
+
+    # 풀이 꽉 찼으면 스트림을 열기 전에 503 (실제 슬롯은 스트림이 시작될 때 잡음)
+    _check_agent_slot()
+    return StreamingResponse(
+        _stream_agent_events(req.message, include_timings=req.includeTimings),
+        media_type="text/event-stream",
+        headers=headers,
+    )
+
+
+# ------------------------------------------------------------
+# 4-1. 키워드 감성 집계 조회 (코퍼스의 키워드 × 일 집계, 기간 지정 가능)
+# ------------------------------------------------------------
+
+@app.get("/sentiment/keywords", response_model=List[KeywordSentiment])
+async def sentiment_by_keyword(
+    keywords: str = Query(..., description="쉼표로 구분한 키워드 (예: fsd,robotaxi)"),
+    days: Optional[int] = Query(None, ge=1, description="최근 N일 (예: 7 / 30 / 365), 없으면 전체"),
+    series: bool = Query(False, description="true 면 날짜별 추이도 포함"),
+) -> List[KeywordSentiment]:
+    """
+    LLM/크롤링 없이 미리 집계된 값만 조회하므로 에이전트 풀을 거치지 않음.
+    """
+    if not HAS_FSD_GRAPH:
+        raise HTTPException(status_code=503, detail="분석 모듈을 불러오지 못했습니다.")
+    import fsd_tools
+
+    kws = [k.strip() for k in keywords.split(",") if k.strip()]
+    if not kws:
+        raise HTTPException(status_code=422, detail="keywords 가 비어 있습니다.")
+    rows = await asyncio.to_thread(fsd_tools.keyword_sentiment, kws, days, series)
+    return [KeywordSentiment(**r) for r in rows]
+
+
+# ------------------------------------------------------------
+# 5. 메트릭 (Prometheus text format)
+# ------------------------------------------------------------
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """
+    단계별 지연 시간 히스토그램 / 처리 row 수 / 받아온 bytes / 캐시 hit 수 +
+    에이전트 풀 상태.
+    """
+    with _agent_lock:
+        pending = _agent_pending
+
+    lines = [
+        tracing.render_prometheus().rstrip("\n"),
+        "# HELP fsd_agent_pending Agent runs in flight or queued.",
+        "# TYPE fsd_agent_pending gauge",
+        f"fsd_agent_pending {pending}",
+        "# HELP fsd_agent_max_concurrency Configured concurrent agent runs.",
+        "# TYPE fsd_agent_max_concurrency gauge",
+        f"fsd_agent_max_concurrency {AGENT_MAX_CONCURRENCY}",
+        "# HELP fsd_agent_max_queue Configured agent queue depth.",
+        "# TYPE fsd_agent_max_queue gauge",
+        f"fsd_agent_max_queue {AGENT_MAX_QUEUE}",
+    ]
+    return PlainTextResponse(
+        "\n".join(lines) + "\n",
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -1,7 +1,7 @@
 # build_topics.py
 # pip install pandas openpyxl scikit-learn nltk matplotlib squarify python-calamine
 
-import os, re, ast, importlib.util
+import os, re, sys, ast, importlib.util
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
@@ -11,8 +11,11 @@ from sklearn.decomposition import LatentDirichletAllocation
 import nltk; nltk.download('stopwords', quiet=True)
 from nltk.corpus import stopwords
 
-# ✅ 기본 입력(xlsx). csv도 자동 인식하도록 load_df 사용
-IN_FILE = "reddit_tesla_sentiment.xlsx"
+from corpus_store import CorpusStore, is_corpus_path
+
+# ✅ 기본 입력(xlsx). csv / 코퍼스(.sqlite3)도 자동 인식하도록 load_df 사용
+#    python build_topics.py data/corpus.sqlite3
+IN_FILE = sys.argv[1] if len(sys.argv) > 1 else "reddit_tesla_sentiment.xlsx"
 OUT_IMG = "topics_treemap.png"
 
 def _has(module_name: str) -> bool:
@@ -35,6 +38,11 @@ def load_df(path: str) -> pd.DataFrame:
             raise e_openpyxl
     elif ext == ".csv":
         return pd.read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+    elif is_corpus_path(path):
+        # 토픽/감성 계산에 쓰는 컬럼만 읽음
+        return CorpusStore(path).read_df(
+            ["content", "comments", "title_sentiment", "content_sentiment", "comments_sentiment"]
+        )
     else:
         raise ValueError(f"지원하지 않는 형식: {path}")
 
@@ -0,0 +1,452 @@
+# backend/corpus_store.py
+"""
+로컬 코퍼스 저장소 (SQLite, Reddit post id 기준)
+
+JSON → CSV → XLSX 로 이어지던 파이프라인 단계들이 같은 파일 하나를 공유:
+  reddit_fetch_posts  → 본문/댓글 upsert
+  reddit_sentiment    → 감성 라벨이 없는 글만 읽어서 라벨 컬럼만 upsert
+  build_topics        → 필요한 컬럼만 읽기
+  fsd_tools           → 검색 결과 + VADER 점수 upsert, 키워드 매핑
+
+- upsert 는 레코드에 들어 있는 컬럼만 갱신 (다른 단계가 채운 컬럼은 그대로, None/NaN 으로는 덮어쓰지 않음)
+  단, 본문(title/content/comments)이 바뀌면 그 텍스트로 만든 라벨/점수(TEXT_DEPENDENTS)는 비움
+  → 다음 단계가 빈 값을 보고 다시 채점
+- 읽기는 columns 로 필요한 컬럼만 SELECT (column projection)
+- title/content 는 FTS5 전문 검색 인덱스로 자동 동기화 (SQLite 빌드에 FTS5 가 없으면 생략)
+- keyword_daily: 키워드 × 일(day) 단위 감성 집계 (count / sum / sum of squares / min / max)
+  점수가 새로 기록될 때마다 증분 갱신 → 키워드 k개 차트는 인덱스 조회 k번,
+  기간(최근 7/30/365일 등) 조회도 day 범위 합산으로 처리
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import json
+import math
+import sqlite3
+import threading
+import time
+
+
+DEFAULT_PATH = Path(__file__).resolve().parent / "data" / "corpus.sqlite3"
+
+# 컬럼 이름 → SQLite 타입
+POST_COLUMNS: Dict[str, str] = {
+    "post_id": "TEXT PRIMARY KEY",
+    "url": "TEXT",
+    "title": "TEXT",
+    "content": "TEXT",
+    "created_utc": "REAL",
+    "crawled_at": "TEXT",
+    "comments": "TEXT",             # JSON 리스트
+    "comment_meta": "TEXT",         # JSON (컬럼 배열)
+    "num_comments": "INTEGER",
+    "title_sentiment": "TEXT",      # reddit_sentiment 라벨
+    "content_sentiment": "TEXT",
+    "comments_sentiment": "TEXT",   # JSON 리스트
+    "sentiment_score": "REAL",      # fsd_tools VADER compound
+    "updated_at": "REAL",
+}
+JSON_COLUMNS = {"comments", "comment_meta", "comments_sentiment"}
+
+# 텍스트 컬럼 → 그 텍스트로 계산한 컬럼 (텍스트가 바뀌면 같은 upsert 에서 NULL 로)
+# sentiment_score 는 fsd_tools 가 title + content 로 계산
+TEXT_DEPENDENTS: Dict[str, Tuple[str, ...]] = {
+    "title": ("title_sentiment", "sentiment_score"),
+    "content": ("content_sentiment", "sentiment_score"),
+    "comments": ("comments_sentiment",),
+}
+
+DAY_SECONDS = 24 * 60 * 60
+
+# 코퍼스 파일 확장자 (load_df 류에서 입력 형식 판별용)
+CORPUS_EXTS = (".sqlite3", ".sqlite", ".db")
+
+
+def is_corpus_path(path: str) -> bool:
+    return str(path).lower().endswith(CORPUS_EXTS)
+
+
+def _encode(col: str, v: Any) -> Any:
+    if col in JSON_COLUMNS and v is not None and not isinstance(v, str):
+        return json.dumps(v, ensure_ascii=False)
+    return v
+
+
+def _decode(col: str, v: Any) -> Any:
+    if col in JSON_COLUMNS and isinstance(v, str):
+        try:
+            return json.loads(v)
+        except ValueError:
+            return v
+    return v
+
+
+def _upsert_updates(cols: Sequence[str]) -> str:
+    """upsert 의 DO UPDATE SET 절 (SET 안의 컬럼 참조는 갱신 전 값)."""
+    # SQLite 는 NaN 을 NULL 로 저장하므로 COALESCE 하나로 None/NaN 모두 처리
+    sets = {c: f"COALESCE(excluded.{c}, {c})" for c in cols if c != "post_id"}
+    for dep in dict.fromkeys(d for deps in TEXT_DEPENDENTS.values() for d in deps):
+        changed = [
+            f"(excluded.{t} IS NOT NULL AND excluded.{t} IS NOT {t})"
+            for t, deps in TEXT_DEPENDENTS.items()
+            if t in cols and dep in deps
+        ]
+        if changed:
+            new = f"excluded.{dep}" if dep in cols else "NULL"
+            sets[dep] = f"CASE WHEN {' OR '.join(changed)} THEN {new} ELSE {sets.get(dep, dep)} END"
+    return ", ".join(f"{c} = {v}" for c, v in sets.items())
+
+
+class CorpusStore:
+    def __init__(self, path: Path | str = DEFAULT_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+        cols = ",\n".join(f"{c} {t}" for c, t in POST_COLUMNS.items())
+        self._conn.executescript(
+            f"""
+            CREATE TABLE IF NOT EXISTS posts (
+                {cols}
+            );
+            CREATE INDEX IF NOT EXISTS posts_created ON posts(created_utc);
+            CREATE TABLE IF NOT EXISTS post_keywords (
+                post_id TEXT NOT NULL,
+                keyword TEXT NOT NULL,
+                PRIMARY KEY (keyword, post_id)
+            );
+            CREATE TABLE IF NOT EXISTS keyword_daily (
+                keyword   TEXT NOT NULL,
+                day       INTEGER NOT NULL,     -- created_utc // 86400 (UTC 기준 날짜)
+                n         INTEGER NOT NULL,
+                total     REAL NOT NULL,
+                total_sq  REAL NOT NULL,
+                min_score REAL,
+                max_score REAL,
+                PRIMARY KEY (keyword, day)
+            );
+            """
+        )
+        # post_keywords 에 "집계에 반영된 점수/날짜" 컬럼 (예전 파일이면 추가)
+        existing = {r[1] for r in self._conn.execute("PRAGMA table_info(post_keywords)")}
+        for col, typ in (("agg_score", "REAL"), ("agg_day", "INTEGER")):
+            if col not in existing:
+                self._conn.execute(f"ALTER TABLE post_keywords ADD COLUMN {col} {typ}")
+        self.has_fts = self._init_fts()
+        self._conn.commit()
+
+    def _init_fts(self) -> bool:
+        try:
+            self._conn.executescript(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+                    title, content, content='posts', content_rowid='rowid'
+                );
+                CREATE TRIGGER IF NOT EXISTS posts_ai AFTER INSERT ON posts BEGIN
+                    INSERT INTO posts_fts(rowid, title, content)
+                    VALUES (new.rowid, new.title, new.content);
+                END;
+                CREATE TRIGGER IF NOT EXISTS posts_ad AFTER DELETE ON posts BEGIN
+                    INSERT INTO posts_fts(posts_fts, rowid, title, content)
+                    VALUES ('delete', old.rowid, old.title, old.content);
+                END;
+                CREATE TRIGGER IF NOT EXISTS posts_au AFTER UPDATE OF title, content ON posts BEGIN
+                    INSERT INTO posts_fts(posts_fts, rowid, title, content)
+                    VALUES ('delete', old.rowid, old.title, old.content);
+                    INSERT INTO posts_fts(rowid, title, content)
+                    VALUES (new.rowid, new.title, new.content);
+                END;
+                """
+            )
+            return True
+        except sqlite3.OperationalError as e:
+            print(f"[corpus_store] FTS5 사용 불가 → 전문 검색 없이 동작: {e}")
+            return False
+
+    # ----- 쓰기 -----
+
+    def upsert(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        post_id 기준 upsert. 레코드에 있는 컬럼만 넣고/갱신함 (모르는 키는 무시).
+        값이 None/NaN 이면 이미 저장된 값을 덮어쓰지 않음
+        (예: created_utc 가 없는 예전 검색 캐시 항목이 좋은 값을 NULL 로 지우지 않도록).
+        텍스트 컬럼 값이 저장된 것과 다르면 TEXT_DEPENDENTS 컬럼은 레코드에 있는 값(없으면 NULL)으로 바꿈
+        (수정된 글에 예전 라벨/점수가 남지 않도록).
+        같은 컬럼 구성끼리 묶어서 executemany → 트랜잭션 한 번.
+        """
+        groups: Dict[Tuple[str, ...], List[Tuple[Any, ...]]] = {}
+        now = time.time()
+        n = 0
+        for rec in records:
+            if not rec.get("post_id"):
+                continue
+            cols = tuple(c for c in POST_COLUMNS if c in rec and c != "updated_at") + ("updated_at",)
+            row = tuple(_encode(c, rec[c]) for c in cols[:-1]) + (now,)
+            groups.setdefault(cols, []).append(row)
+            n += 1
+
+        with self._lock:
+            for cols, rows in groups.items():
+                self._conn.executemany(
+                    f"""
+                    INSERT INTO posts ({", ".join(cols)}) VALUES ({", ".join("?" * len(cols))})
+                    ON CONFLICT(post_id) DO UPDATE SET {_upsert_updates(cols)}
+                    """,
+                    rows,
+                )
+            self._conn.commit()
+        return n
+
+    def add_keywords(self, pairs: Iterable[Tuple[str, str]]) -> None:
+        """(post_id, keyword) 매핑 추가 (어떤 검색어로 수집된 글인지)."""
+        rows = [(pid, kw) for pid, kw in pairs if pid and kw]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO post_keywords (post_id, keyword) VALUES (?, ?)", rows
+            )
+            self._conn.commit()
+
+    def record_scores(self, rows: Iterable[Tuple[str, str, Optional[float], Optional[float]]]) -> int:
+        """
+        (post_id, keyword, score, created_utc) 를 keyword_daily 집계에 반영.
+        - 이미 같은 점수로 반영된 (post_id, keyword) 는 건너뜀 → 같은 글을 여러 번 넘겨도 안전
+        - 점수가 바뀐 경우 예전 값을 빼고 새 값을 더함
+          (예전 버킷의 min/max 는 post_keywords 에 남은 점수로 다시 계산 → 더 이상 없는 값을 보고하지 않음)
+        - created_utc 를 모르면 지금 시각의 날짜로
+        반환: 집계에 새로 반영된 수
+        """
+        now = time.time()
+        applied = 0
+        with self._lock:
+            for pid, kw, score, created in rows:
+                if not pid or not kw or score is None or (isinstance(score, float) and math.isnan(score)):
+                    continue
+                score = float(score)
+                prev = self._conn.execute(
+                    "SELECT agg_score, agg_day FROM post_keywords WHERE post_id = ? AND keyword = ?",
+                    (pid, kw),
+                ).fetchone()
+                if created is None or (isinstance(created, float) and math.isnan(created)):
+                    # 작성 시각을 모르면 처음 반영한 날짜를 계속 사용
+                    created = prev[1] * DAY_SECONDS if prev is not None and prev[1] is not None else now
+                day = int(float(created) // DAY_SECONDS)
+
+                if prev is not None and prev[0] is not None:
+                    if prev[0] == score and prev[1] == day:
+                        continue
+                    self._conn.execute(
+                        """
+                        UPDATE keyword_daily
+                        SET n = n - 1, total = total - ?, total_sq = total_sq - ?
+                        WHERE keyword = ? AND day = ?
+                        """,
+                        (prev[0], prev[0] * prev[0], kw, prev[1]),
+                    )
+
+                self._conn.execute(
+                    """
+                    INSERT INTO keyword_daily (keyword, day, n, total, total_sq, min_score, max_score)
+                    VALUES (?, ?, 1, ?, ?, ?, ?)
+                    ON CONFLICT(keyword, day) DO UPDATE SET
+                        n = n + 1,
+                        total = total + excluded.total,
+                        total_sq = total_sq + excluded.total_sq,
+                        min_score = MIN(COALESCE(min_score, excluded.min_score), excluded.min_score),
+                        max_score = MAX(COALESCE(max_score, excluded.max_score), excluded.max_score)
+                    """,
+                    (kw, day, score, score * score, score, score),
+                )
+                self._conn.execute(
+                    """
+                    INSERT INTO post_keywords (post_id, keyword, agg_score, agg_day) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(keyword, post_id) DO UPDATE SET
+                        agg_score = excluded.agg_score, agg_day = excluded.agg_day
+                    """,
+                    (pid, kw, score, day),
+                )
+                if prev is not None and prev[0] is not None:
+                    # 빠져나간 점수가 그 버킷의 min/max 였을 수 있음 (같은 버킷이면 새 점수까지 포함해서)
+                    self._conn.execute(
+                        """
+                        UPDATE keyword_daily SET (min_score, max_score) = (
+                            SELECT MIN(agg_score), MAX(agg_score) FROM post_keywords
+                            WHERE keyword = ? AND agg_day = ?
+                        )
+                        WHERE keyword = ? AND day = ?
+                        """,
+                        (kw, prev[1], kw, prev[1]),
+                    )
+                applied += 1
+            self._conn.commit()
+        return applied
+
+    def keyword_aggregates(
+        self, keywords: Sequence[str], since_utc: Optional[float] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        키워드별 {count, mean, std, min, max} (since_utc 이후 날짜 버킷만 합산).
+        집계가 없는 키워드는 결과에 없음.
+        """
+        kws = list(dict.fromkeys(k for k in keywords if k))
+        if not kws:
+            return {}
+        since_day = int(since_utc // DAY_SECONDS) if since_utc is not None else -1
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT keyword, SUM(n), SUM(total), SUM(total_sq), MIN(min_score), MAX(max_score)
+                FROM keyword_daily
+                WHERE keyword IN ({",".join("?" * len(kws))}) AND day >= ? AND n > 0
+                GROUP BY keyword
+                """,
+                kws + [since_day],
+            ).fetchall()
+
+        out: Dict[str, Dict[str, Any]] = {}
+        for kw, n, total, total_sq, lo, hi in rows:
+            if not n:
+                continue
+            mean = total / n
+            var = max(total_sq / n - mean * mean, 0.0)
+            out[kw] = {"count": int(n), "mean": mean, "std": math.sqrt(var), "min": lo, "max": hi}
+        return out
+
+    def keyword_series(self, keyword: str, since_utc: Optional[float] = None) -> List[Dict[str, Any]]:
+        """키워드 하나의 날짜별 {day(YYYY-MM-DD), count, mean} (오래된 날짜부터)."""
+        since_day = int(since_utc // DAY_SECONDS) if since_utc is not None else -1
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT day, n, total FROM keyword_daily
+                WHERE keyword = ? AND day >= ? AND n > 0 ORDER BY day
+                """,
+                (keyword, since_day),
+            ).fetchall()
+        return [
+            {
+                "day": time.strftime("%Y-%m-%d", time.gmtime(day * DAY_SECONDS)),
+                "count": int(n),
+                "mean": total / n,
+            }
+            for day, n, total in rows
+        ]
+
+    # ----- 읽기 -----
+
+    def iter_rows(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        post_ids: Optional[Iterable[str]] = None,
+        only_missing: Optional[str] = None,
+        since_utc: Optional[float] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        필요한 컬럼만 dict 로 하나씩 (post_id 는 항상 포함).
+        - post_ids: 이 글들만
+        - only_missing: 이 컬럼이 비어 있는(NULL) 글만 → 단계별 증분 처리용
+        - since_utc: created_utc 가 이 값 이상인 글만 (작성 시각을 모르는 글은 포함)
+        """
+        cols = ["post_id"] + [c for c in (columns or POST_COLUMNS) if c != "post_id"]
+        unknown = [c for c in cols if c not in POST_COLUMNS]
+        if unknown:
+            raise ValueError(f"알 수 없는 컬럼: {unknown}")
+        if only_missing is not None and only_missing not in POST_COLUMNS:
+            raise ValueError(f"알 수 없는 컬럼: {only_missing}")
+
+        where: List[str] = []
+        params: List[Any] = []
+        if only_missing is not None:
+            where.append(f"{only_missing} IS NULL")
+        if since_utc is not None:
+            where.append("(created_utc IS NULL OR created_utc >= ?)")
+            params.append(since_utc)
+
+        def select(extra_where: List[str], extra_params: List[Any], tail: str = "") -> List[Tuple]:
+            sql = f"SELECT rowid, {', '.join(cols)} FROM posts"
+            clauses = where + extra_where
+            if clauses:
+                sql += " WHERE " + " AND ".join(clauses)
+            with self._lock:
+                return self._conn.execute(sql + " ORDER BY rowid" + tail, params + extra_params).fetchall()
+
+        if post_ids is None:
+            # rowid 범위로 잘라서 읽어 큰 코퍼스도 메모리에 한 번에 올리지 않음
+            last = 0
+            while True:
+                rows = select(["rowid > ?"], [last, batch_size], " LIMIT ?")
+                if not rows:
+                    return
+                for r in rows:
+                    yield {c: _decode(c, v) for c, v in zip(cols, r[1:])}
+                last = rows[-1][0]
+        else:
+            ids = list(dict.fromkeys(p for p in post_ids if p))
+            for i in range(0, len(ids), 500):
+                chunk = ids[i : i + 500]
+                for r in select([f"post_id IN ({','.join('?' * len(chunk))})"], chunk):
+                    yield {c: _decode(c, v) for c, v in zip(cols, r[1:])}
+
+    def read_df(self, columns: Optional[Sequence[str]] = None, **filters: Any):
+        """iter_rows 결과를 pandas DataFrame 으로 (pandas 는 필요할 때만 import)."""
+        import pandas as pd
+
+        cols = ["post_id"] + [c for c in (columns or POST_COLUMNS) if c != "post_id"]
+        return pd.DataFrame(list(self.iter_rows(cols, **filters)), columns=cols)
+
+    def search(self, query: str, limit: int = 1000) -> List[str]:
+        """FTS5 전문 검색 → post_id 리스트 (관련도 순). FTS5 가 없으면 LIKE 로 대체."""
+        with self._lock:
+            if self.has_fts:
+                # 검색어를 구(phrase)로 감싸서 FTS 문법 문자("-", ":" 등)가 섞여도 안전하게
+                phrase = '"' + query.replace('"', '""') + '"'
+                rows = self._conn.execute(
+                    """
+                    SELECT p.post_id FROM posts_fts f JOIN posts p ON p.rowid = f.rowid
+                    WHERE posts_fts MATCH ? ORDER BY rank LIMIT ?
+                    """,
+                    (phrase, limit),
+                ).fetchall()
+            else:
+                like = f"%{query}%"
+                rows = self._conn.execute(
+                    "SELECT post_id FROM posts WHERE title LIKE ? OR content LIKE ? LIMIT ?",
+                    (like, like, limit),
+                ).fetchall()
+        return [r[0] for r in rows]
+
+    def keyword_post_ids(self, keyword: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT post_id FROM post_keywords WHERE keyword = ?", (keyword,)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            (n,) = self._conn.execute("SELECT COUNT(*) FROM posts").fetchone()
+        return int(n)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            posts, newest, scored = self._conn.execute(
+                "SELECT COUNT(*), MAX(created_utc), COUNT(sentiment_score) FROM posts"
+            ).fetchone()
+            (keywords,) = self._conn.execute(
+                "SELECT COUNT(DISTINCT keyword) FROM post_keywords"
+            ).fetchone()
+        return {
+            "path": str(self.path),
+            "posts": int(posts or 0),
+            "scored": int(scored or 0),
+            "keywords": int(keywords or 0),
+            "newest_created_utc": newest,
+            "fts": self.has_fts,
+        }
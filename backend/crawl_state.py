@@ -0,0 +1,296 @@
+# backend/crawl_state.py
+"""
+증분(incremental) 크롤링용 high-water mark 저장소 + sort=new 페이징
+
+- 검색 단위(search_key)마다 지금까지 본 가장 최신 created_utc 와 최근 본 post id 를 SQLite 에 저장
+- 다음 실행에서는 sort=new 로 after= 커서를 따라가다가
+  이미 본 글(또는 high-water mark 보다 오래된 글)에 닿으면 바로 멈춤
+  → 야간 갱신이 1년치 재다운로드 대신 요청 몇 번으로 끝남
+- seen id 는 high-water mark 근처(같은 초에 올라온 글 등) 중복 방지용이라
+  SEEN_RETENTION 보다 오래된 것은 정리함
+- max_pages 에서 끊겨 예전 mark 까지 못 내려간 경우, 끊긴 지점의 after 커서와
+  어디까지 받아야 하는지(resume_floor)를 저장 → 다음 실행이 새 글을 받은 뒤 남은 페이지로 이어 받음
+  (mark 는 그대로 앞으로 당기되 그 사이 구간을 잃지 않음)
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import sqlite3
+import threading
+import time
+
+import reddit_client
+
+
+SEARCH_JSON_URL = "https://www.reddit.com/search.json"
+PAGE_LIMIT = 100                    # search.json 한 페이지 최대 개수
+DEFAULT_MAX_PAGES = 10              # 한 번 갱신에서 따라갈 최대 페이지 수 (첫 실행 백필 상한)
+SEEN_RETENTION = 7 * 24 * 60 * 60   # high-water mark 보다 이만큼(초) 오래된 seen id 는 삭제
+
+
+@dataclass
+class HighWaterMark:
+    newest_utc: float       # 지금까지 본 가장 최신 글의 created_utc (없으면 0)
+    updated_at: float       # 마지막 갱신 시각 (time.time)
+    seen_count: int
+    resume_after: Optional[str] = None  # 아직 못 받은 구간의 시작 after 커서 (없으면 None)
+    resume_floor: float = 0.0           # 그 구간을 이 created_utc 까지 받으면 끝 (0 이면 목록 끝까지)
+
+
+@dataclass
+class ScanResult:
+    posts: List[Dict[str, Any]]          # 새로 받은 글 (최신순)
+    resume_after: Optional[str] = None   # 다음 실행에서 이어 받을 커서 (다 받았으면 None)
+    resume_floor: float = 0.0
+    pages: int = 0
+
+
+class CrawlStateStore:
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS hwm (
+                search_key  TEXT PRIMARY KEY,
+                newest_utc  REAL NOT NULL,
+                updated_at  REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS seen (
+                search_key  TEXT NOT NULL,
+                post_id     TEXT NOT NULL,
+                created_utc REAL NOT NULL,
+                PRIMARY KEY (search_key, post_id)
+            );
+            """
+        )
+        # 예전 파일에는 resume 컬럼이 없음
+        cols = {r[1] for r in self._conn.execute("PRAGMA table_info(hwm)")}
+        if "resume_after" not in cols:
+            self._conn.execute("ALTER TABLE hwm ADD COLUMN resume_after TEXT")
+        if "resume_floor" not in cols:
+            self._conn.execute("ALTER TABLE hwm ADD COLUMN resume_floor REAL NOT NULL DEFAULT 0")
+        self._conn.commit()
+
+    def get(self, search_key: str) -> Optional[HighWaterMark]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT newest_utc, updated_at, resume_after, resume_floor FROM hwm WHERE search_key = ?",
+                (search_key,),
+            ).fetchone()
+            if row is None:
+                return None
+            (count,) = self._conn.execute(
+                "SELECT COUNT(*) FROM seen WHERE search_key = ?", (search_key,)
+            ).fetchone()
+        return HighWaterMark(
+            newest_utc=row[0],
+            updated_at=row[1],
+            seen_count=int(count),
+            resume_after=row[2],
+            resume_floor=float(row[3] or 0.0),
+        )
+
+    def seen_ids(self, search_key: str, post_ids: Iterable[str]) -> Set[str]:
+        ids = [p for p in dict.fromkeys(post_ids) if p]
+        found: Set[str] = set()
+        with self._lock:
+            for i in range(0, len(ids), 500):
+                chunk = ids[i : i + 500]
+                marks = ",".join("?" * len(chunk))
+                found.update(
+                    r[0]
+                    for r in self._conn.execute(
+                        f"SELECT post_id FROM seen WHERE search_key = ? AND post_id IN ({marks})",
+                        [search_key, *chunk],
+                    )
+                )
+        return found
+
+    def update(
+        self,
+        search_key: str,
+        posts: Iterable[Dict[str, Any]],
+        resume_after: Optional[str] = None,
+        resume_floor: float = 0.0,
+    ) -> None:
+        """
+        새로 본 글들을 seen 에 넣고 high-water mark 를 앞으로 당김 (뒤로 가지는 않음).
+        resume_after / resume_floor 는 그대로 덮어씀 (None 이면 이어 받을 구간 없음).
+        """
+        rows = [
+            (search_key, p["post_id"], float(p.get("created_utc") or 0.0))
+            for p in posts
+            if p.get("post_id")
+        ]
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO seen (search_key, post_id, created_utc) VALUES (?, ?, ?)", rows
+            )
+            newest = max((r[2] for r in rows), default=0.0)
+            self._conn.execute(
+                """
+                INSERT INTO hwm (search_key, newest_utc, updated_at, resume_after, resume_floor)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(search_key) DO UPDATE SET
+                    newest_utc = MAX(hwm.newest_utc, excluded.newest_utc),
+                    updated_at = excluded.updated_at,
+                    resume_after = excluded.resume_after,
+                    resume_floor = excluded.resume_floor
+                """,
+                (search_key, newest, now, resume_after, float(resume_floor or 0.0)),
+            )
+            (hwm,) = self._conn.execute(
+                "SELECT newest_utc FROM hwm WHERE search_key = ?", (search_key,)
+            ).fetchone()
+            self._conn.execute(
+                "DELETE FROM seen WHERE search_key = ? AND created_utc < ?",
+                (search_key, hwm - SEEN_RETENTION),
+            )
+            self._conn.commit()
+
+    def reset(self, search_key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM hwm WHERE search_key = ?", (search_key,))
+            self._conn.execute("DELETE FROM seen WHERE search_key = ?", (search_key,))
+            self._conn.commit()
+
+
+def post_from_listing(d: Dict[str, Any]) -> Dict[str, Any]:
+    """search.json 의 child["data"] → 공통 글 dict (title / content / url / post_id / created_utc)."""
+    permalink = d.get("permalink", "") or ""
+    return {
+        "title": d.get("title", "") or "",
+        "content": d.get("selftext", "") or "",
+        "url": "https://www.reddit.com" + permalink if permalink else d.get("url", ""),
+        "post_id": d.get("id", "") or "",
+        "created_utc": float(d.get("created_utc") or 0.0),
+    }
+
+
+def _walk(
+    store: CrawlStateStore,
+    search_key: str,
+    url: str,
+    params: Dict[str, Any],
+    after: Optional[str],
+    max_pages: int,
+    floor: Optional[float],
+    stop_at_seen: bool,
+) -> Tuple[List[Dict[str, Any]], Optional[str], int, bool]:
+    """
+    sort=new 목록을 after 부터 최대 max_pages 페이지 따라감.
+    - floor 보다 오래된 글이 나오면 멈춤 (floor 가 None 이면 시간 기준 없음)
+    - stop_at_seen 이면 이미 본 id 에서 멈추고, 아니면 건너뛰기만 함
+    반환: (글, 다음 after 커서, 요청 수, 끝까지 받았는지)
+    """
+    posts: List[Dict[str, Any]] = []
+    pages = 0
+    while pages < max_pages:
+        page_params = dict(params)
+        if after:
+            page_params["after"] = after
+        resp = reddit_client.get(url, params=page_params, timeout=10)
+        resp.raise_for_status()
+        listing = resp.json().get("data", {}) or {}
+        pages += 1
+
+        page = [post_from_listing(c.get("data", {}) or {}) for c in listing.get("children", []) or []]
+        seen = store.seen_ids(search_key, (p["post_id"] for p in page))
+        for p in page:
+            if floor is not None and p["created_utc"] < floor:
+                return posts, None, pages, True
+            if p["post_id"] in seen:
+                if stop_at_seen:
+                    return posts, None, pages, True
+                continue
+            posts.append(p)
+
+        after = listing.get("after")
+        if not after:
+            return posts, None, pages, True
+    return posts, after, pages, False
+
+
+def scan_new_posts(
+    store: CrawlStateStore,
+    search_key: str,
+    query: str,
+    subreddit: Optional[str] = None,
+    t: str = "year",
+    max_pages: int = DEFAULT_MAX_PAGES,
+) -> ScanResult:
+    """
+    sort=new + after 커서로 search_key 의 high-water mark 이후 글을 가져온다 (mark 는 갱신하지 않음).
+    1) 맨 위부터: 이미 본 id 이거나 mark 보다 오래된 글이 나오면 중단 (첫 실행은 t 범위를 그대로 백필)
+    2) 1) 을 끝까지 받았고 지난 실행이 남긴 구간(resume_after)이 있으면 남은 페이지(최소 1)로 그 구간을 이어 받음
+    max_pages 에서 끊기면 끊긴 지점을 ScanResult.resume_* 에 담아 돌려줌 → store.update 로 저장
+    """
+    url = (
+        f"https://www.reddit.com/r/{subreddit}/search.json" if subreddit else SEARCH_JSON_URL
+    )
+    params: Dict[str, Any] = {
+        "q": query, "sort": "new", "t": t, "type": "link", "limit": PAGE_LIMIT, "raw_json": 1,
+    }
+    if subreddit:
+        params["restrict_sr"] = 1
+
+    mark = store.get(search_key)
+    pending = mark is not None and mark.resume_after is not None
+    posts, after, pages, done = _walk(
+        store, search_key, url, params, None, max_pages,
+        floor=mark.newest_utc if mark is not None else None,
+        stop_at_seen=mark is not None,
+    )
+
+    if not done:
+        # 예전 mark 까지 못 내려감 → 여기부터 (이전에 남은 구간이 있으면 그 끝까지) 다음에 이어 받음
+        # (이미 받은 구간을 지나갈 때는 seen id 를 건너뛰기만 함)
+        floor = mark.resume_floor if pending else (mark.newest_utc if mark is not None else 0.0)
+        result = ScanResult(posts, after, floor, pages)
+    elif pending:
+        # 위쪽 확인에 페이지를 다 써도 최소 한 페이지는 이어 받음 (안 그러면 max_pages=1 에서 영영 못 받음)
+        more, after, more_pages, done = _walk(
+            store, search_key, url, params, mark.resume_after, max(1, max_pages - pages),
+            floor=mark.resume_floor or None,
+            stop_at_seen=False,
+        )
+        known = {p["post_id"] for p in posts}
+        posts += [p for p in more if p["post_id"] not in known]
+        if done:
+            result = ScanResult(posts, None, 0.0, pages + more_pages)
+        else:
+            result = ScanResult(posts, after, mark.resume_floor, pages + more_pages)
+    else:
+        result = ScanResult(posts, None, 0.0, pages)
+
+    print(
+        f"[crawl_state] '{search_key}': 새 글 {len(result.posts)}개 / 요청 {result.pages}회"
+        f"{' (다음 실행에서 이어 받을 구간 있음)' if result.resume_after else ''}"
+    )
+    return result
+
+
+def fetch_new_posts(
+    store: CrawlStateStore,
+    search_key: str,
+    query: str,
+    subreddit: Optional[str] = None,
+    t: str = "year",
+    max_pages: int = DEFAULT_MAX_PAGES,
+) -> List[Dict[str, Any]]:
+    """
+    scan_new_posts + mark 갱신 (최신순 새 글 반환).
+    실패 시 예외를 올리고 mark 는 그대로. 받은 글을 먼저 저장해야 하면 scan_new_posts 후 직접 store.update.
+    """
+    result = scan_new_posts(store, search_key, query, subreddit=subreddit, t=t, max_pages=max_pages)
+    store.update(search_key, result.posts, result.resume_after, result.resume_floor)
+    return result.posts
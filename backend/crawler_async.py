@@ -1,7 +1,9 @@
 # crawler_async.py
+#   python crawler_async.py                # Playwright 로 검색 페이지 스크롤 (전체 수집)
+#   python crawler_async.py --incremental  # 지난 실행 이후 새 글만 search.json(sort=new)으로 추가
 import sys, os, json, asyncio
+import urllib.parse
 from typing import List, Dict
-from playwright.async_api import async_playwright
 
 # ▶ Windows에서 서브프로세스 지원 루프 정책 적용(주피터 밖 프로세스라 100% 반영됨)
 if sys.platform.startswith("win"):
@@ -10,6 +12,8 @@ if sys.platform.startswith("win"):
 STORAGE_PATH = "reddit_storage.json"
 SEARCH_URL = "https://www.reddit.com/r/selfdrivingcars/search/?q=waymo&type=posts&t=year"
 MAX_POSTS = 200  # ✅ 최대 수집 개수 제한
+OUT_PATH = "Tesla_posts.json"
+CRAWL_STATE_PATH = "crawl_state.sqlite3"  # --incremental 모드의 high-water mark 저장 위치
 
 async def solve_captcha_if_needed(page) -> None:
     """Cloudflare/Turnstile/hCaptcha 등 '사람 확인' 화면 대응."""
@@ -196,6 +200,8 @@ async def extract_posts(page, article_selector: str, max_posts: int = MAX_POSTS)
     return posts
 
 async def main():
+    from playwright.async_api import async_playwright
+
     print("🚀 Tesla 게시물 추출 시작!")
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=False, args=["--start-maximized"])
@@ -222,17 +228,72 @@ async def main():
         await infinite_scroll(page, article_selector, max_rounds=120, sleep_sec=1.6, max_posts=MAX_POSTS)
         posts = await extract_posts(page, article_selector, max_posts=MAX_POSTS)
 
-        out_path = "Tesla_posts.json"
-        with open(out_path, "w", encoding="utf-8") as f:
+        with open(OUT_PATH, "w", encoding="utf-8") as f:
             json.dump(posts, f, ensure_ascii=False, indent=2)
-        print(f"💾 게시물 리스트 저장 완료: {out_path}")
+        print(f"💾 게시물 리스트 저장 완료: {OUT_PATH}")
 
         await context.close()
         await browser.close()
         return posts
 
+def main_incremental() -> List[Dict]:
+    """
+    SEARCH_URL 과 같은 검색을 search.json(sort=new, after 커서)으로 돌려서
+    지난 실행 이후 새 글만 가져와 OUT_PATH 앞쪽에 추가 (브라우저/스크롤 없이 요청 몇 번).
+    이미 있던 글은 그대로 두고 index 만 다시 매김.
+    """
+    from crawl_state import CrawlStateStore, scan_new_posts
+    from reddit_fetch_posts import extract_post_id
+
+    u = urllib.parse.urlparse(SEARCH_URL)
+    qs = urllib.parse.parse_qs(u.query)
+    query = qs.get("q", [""])[0]
+    t = qs.get("t", ["year"])[0]
+    parts = u.path.strip("/").split("/")
+    subreddit = parts[1] if len(parts) > 1 and parts[0] == "r" else None
+
+    print(f"🔁 증분 수집: q='{query}' r/{subreddit} (t={t})")
+    store = CrawlStateStore(CRAWL_STATE_PATH)
+    scan = scan_new_posts(
+        store, SEARCH_URL, query, subreddit=subreddit, t=t,
+        max_pages=max(1, -(-MAX_POSTS // 100)),
+    )
+    new_posts = scan.posts
+
+    existing: List[Dict] = []
+    if os.path.exists(OUT_PATH):
+        with open(OUT_PATH, "r", encoding="utf-8") as f:
+            existing = json.load(f)
+    # URL 문자열은 Playwright href / search.json permalink 사이에 대소문자·끝 슬래시·쿼리가 달라질 수 있어서
+    # post id 로 비교 (id 를 못 뽑는 항목만 URL 그대로)
+    def key(url: str) -> str:
+        pid = extract_post_id(url or "")
+        return pid.lower() if pid else (url or "")
+
+    known = {key(p.get("url")) for p in existing}
+    added: List[Dict] = []
+    for p in new_posts:
+        k = p.get("post_id", "").lower() or key(p["url"])
+        if k not in known:
+            known.add(k)
+            added.append({"index": 0, "title": p["title"], "url": p["url"]})
+    # 예전 실행이 남긴 다른 필드는 그대로 두고 index 만 다시 매김
+    posts = added + existing
+    for i, p in enumerate(posts, 1):
+        p["index"] = i
+    with open(OUT_PATH, "w", encoding="utf-8") as f:
+        json.dump(posts, f, ensure_ascii=False, indent=2)
+    # 파일 저장까지 끝난 뒤에 mark 를 갱신 (중간에 죽으면 다음 실행에서 다시 받음)
+    store.update(SEARCH_URL, new_posts, scan.resume_after, scan.resume_floor)
+    print(f"💾 새 글 {len(added)}개 추가 → 총 {len(posts)}개: {OUT_PATH}")
+    return posts
+
+
 if __name__ == "__main__":
-    res = asyncio.run(main())
+    if "--incremental" in sys.argv[1:]:
+        res = main_incremental()
+    else:
+        res = asyncio.run(main())
     print(f"\n📦 수집된 posts 개수: {len(res)}")
     for p in res[:3]:
         print(f" - {p['title']} ({p['url']})")
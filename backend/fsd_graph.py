@@ -1,9 +1,12 @@
 # backend/fsd_graph.py
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional, TypedDict, Annotated
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypedDict, Annotated
 import json
+import os
 import textwrap
+import threading
+import time
 
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
@@ -17,7 +20,10 @@ from langchain_core.messages import (
 # Llama (Ollama)
 from langchain_community.chat_models import ChatOllama
 
-from fsd_tools import analyze_market_sentiment
+import tracing
+from fsd_tools import analyze_market_sentiment, data_epoch
+from keyword_planner import plan_keywords, record_planner_path
+from response_cache import ResponseCache, make_key
 
 
 # ------------------------------------------------------------
@@ -57,6 +63,19 @@ def safe_json_loads(text: str) -> Dict[str, Any]:
 # 1. 키워드 / 타입 정의
 # ------------------------------------------------------------
 
+# planner 경로 선택
+# - "auto": keyword_planner 로 먼저 고르고, confidence 가 낮을 때만 LLM planner 사용
+# - "fast": 항상 keyword_planner 만 사용 (LLM 호출 없음)
+# - "llm" : 예전처럼 항상 LLM planner 사용
+PLANNER_MODE = os.environ.get("FSD_PLANNER_MODE", "auto").lower()
+FAST_PLANNER_MIN_CONFIDENCE = float(os.environ.get("FSD_PLANNER_MIN_CONFIDENCE", "0.5"))
+
+# 전체 응답 캐시 (같은 질문 + 같은 키워드 + 같은 데이터 epoch 이면 파이프라인 재실행 없이 재사용)
+RESPONSE_CACHE_TTL = float(os.environ.get("FSD_RESPONSE_CACHE_TTL", "600"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("FSD_RESPONSE_CACHE_MAX", "256"))
+
+_response_cache = ResponseCache(ttl=RESPONSE_CACHE_TTL, max_entries=RESPONSE_CACHE_MAX_ENTRIES)
+
 TESLA_KEYWORD_CANDIDATES: List[str] = [
     "tesla", "musk", "fsd", "autopilot", "robotaxi", "cybercab",
     "self-driving", "autonomous driving", "driverless",
@@ -87,45 +106,64 @@ class ChatState(TypedDict):
     """
     LangGraph state 구조.
     - messages: 대화 히스토리
-    - tool_request: LLM이 만든 툴 호출 계획
+    - tool_request: LLM(또는 fast planner)이 만든 툴 호출 계획
     - tool_result: 크롤링/감성분석 결과
+    - planner_info: planner 경로(fast/llm/llm_fallback), confidence, 소요 시간
     """
     messages: Annotated[List[BaseMessage], add_messages]
     tool_request: Optional[Dict[str, Any]]
     tool_result: Optional[Dict[str, Any]]
+    planner_info: Optional[Dict[str, Any]]
 
 
 # ------------------------------------------------------------
 # 2. 실제로 실행될 "툴" – 크롤링 + 감성분석 + LDA
 # ------------------------------------------------------------
-def crawl_market_sentiment(
+class StreamCancelled(Exception):
+    """스트리밍 클라이언트가 끊겨서 다음 단계로 넘어가지 않고 멈출 때."""
+
+
+def _run_analysis(
     question: str,
     selected_keywords: List[str],
-    llm,  # LangGraph에서 쓰는 LLM 인스턴스 (예: ChatOllama)
-) -> Dict[str, Any]:
+    on_event=None,
+) -> Tuple[List[SentimentRow], List[Dict[str, Any]], int, bool]:
     """
-    Reddit 크롤링 + 감성 분석 + LDA를 수행하고,
-    LLM이 읽기 쉬운 텍스트 블록과 차트용 데이터를 만들어 반환.
+    fsd_tools.analyze_market_sentiment 호출 후 (차트, LDA 토픽, 문서 수, complete) 반환.
+    complete: 모든 키워드가 실제 글을 가져왔는지 (더미 fallback 이 섞이면 False → 응답 캐시 X)
+    실패하면 기본 차트로 대체.
     """
-
-    # 1) fsd_tools.analyze_market_sentiment 호출
     try:
         tool_result = analyze_market_sentiment(
             user_query=question,
             selected_keywords=selected_keywords,
             max_posts=40,
+            on_event=on_event,
         )
+    except StreamCancelled:
+        raise
     except Exception as e:
         print(f"[fsd_graph] analyze_market_sentiment 실패, 기본값 사용: {e}")
-        sentiment_chart = DEFAULT_SENTIMENT_CHART
-        lda_topics: List[Dict[str, Any]] = []
-        raw_count = 0
-    else:
-        sentiment_chart = tool_result.get("sentiment_chart", DEFAULT_SENTIMENT_CHART)
-        lda_topics = tool_result.get("lda_topics", []) or []
-        raw_count = tool_result.get("raw_count", 0)
-
-    # 2) 토픽별 감성 점수 블록 문자열 만들기
+        return DEFAULT_SENTIMENT_CHART, [], 0, False
+
+    sentiment_chart = tool_result.get("sentiment_chart", DEFAULT_SENTIMENT_CHART)
+    lda_topics = tool_result.get("lda_topics", []) or []
+    raw_count = tool_result.get("raw_count", 0)
+    complete = bool(tool_result.get("real_count")) and not tool_result.get("dummy_keywords")
+    return sentiment_chart, lda_topics, raw_count, complete
+
+
+def build_summary_prompt(
+    question: str,
+    selected_keywords: List[str],
+    sentiment_chart: List[SentimentRow],
+    lda_topics: List[Dict[str, Any]],
+    raw_count: int,
+) -> str:
+    """
+    분석 결과를 LLM이 읽기 쉬운 한국어 요약 프롬프트로 변환.
+    """
+    # 1) 토픽별 감성 점수 블록 문자열 만들기
     topic_lines: List[str] = []
     for row in sentiment_chart:
         topic = row.get("topic", "")
@@ -140,7 +178,7 @@ def crawl_market_sentiment(
 
     topic_block = "\n".join(topic_lines) if topic_lines else "(no topic scores)"
 
-    # 3) LDA 토픽 키워드 블록 만들기  ← ★ 여기서 lda_lines 를 정의
+    # 2) LDA 토픽 키워드 블록 만들기
     lda_lines: List[str] = []
     for t in lda_topics:
         tid = t.get("topic_id", 0)
@@ -150,8 +188,8 @@ def crawl_market_sentiment(
 
     lda_block = "\n".join(lda_lines) if lda_lines else "(no clear LDA topics)"
 
-    # 4) LLM에게 넘길 한국어 프롬프트
-    prompt = f"""
+    # 3) LLM에게 넘길 한국어 프롬프트
+    return f"""
 너는 테슬라 FSD(Full Self-Driving)/로보택시에 대한
 시장 인식과 안전 이슈를 분석하는 리서치 보조원이다.
 
@@ -184,12 +222,30 @@ def crawl_market_sentiment(
 - 과도한 수식어는 피하고, 분석적인 톤을 유지할 것
 """.strip()
 
-    llm_answer = llm.invoke(prompt).content
+
+def crawl_market_sentiment(
+    question: str,
+    selected_keywords: List[str],
+    llm,  # LangGraph에서 쓰는 LLM 인스턴스 (예: ChatOllama)
+) -> Dict[str, Any]:
+    """
+    Reddit 크롤링 + 감성 분석 + LDA를 수행하고,
+    LLM이 읽기 쉬운 텍스트 블록과 차트용 데이터를 만들어 반환.
+    """
+    sentiment_chart, lda_topics, raw_count, complete = _run_analysis(question, selected_keywords)
+
+    prompt = build_summary_prompt(
+        question, selected_keywords, sentiment_chart, lda_topics, raw_count
+    )
+    with tracing.span("llm_summary"):
+        llm_answer = llm.invoke(prompt).content
 
     return {
         "answer": llm_answer,
         "sentiment_chart": sentiment_chart,
         "lda_topics": lda_topics,
+        "raw_count": raw_count,
+        "complete": complete,
     }
 
 
@@ -203,7 +259,62 @@ TOOLS = {
 # 3. LangGraph 노드 정의
 # ------------------------------------------------------------
 
+def _last_user_text(state: ChatState) -> str:
+    for m in reversed(state.get("messages") or []):
+        if isinstance(m, HumanMessage):
+            return str(m.content)
+    return ""
+
+
 def planner_node(state: ChatState, llm) -> Dict[str, Any]:
+    """
+    툴 호출 계획 노드.
+    PLANNER_MODE 에 따라 keyword_planner(수 μs) 또는 LLM planner(Ollama 왕복)를 쓰고,
+    어떤 경로를 탔는지 planner_info 로 남긴다.
+    """
+    with tracing.span("planner") as sp:
+        result = _plan(state, llm)
+        sp.set(path=result["planner_info"]["path"])
+    return result
+
+
+def _plan(state: ChatState, llm) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    question = _last_user_text(state)
+
+    plan = None
+    if PLANNER_MODE != "llm":
+        plan = plan_keywords(question)
+        if PLANNER_MODE == "fast" or plan.confidence >= FAST_PLANNER_MIN_CONFIDENCE:
+            tool_request = {
+                "name": "crawl_market_sentiment",
+                "parameters": {"query": question, "keywords": plan.keywords},
+            }
+            record_planner_path("fast")
+            return {
+                "messages": [AIMessage(content=json.dumps(tool_request, ensure_ascii=False))],
+                "tool_request": tool_request,
+                "planner_info": {
+                    "path": "fast",
+                    "confidence": plan.confidence,
+                    "matched": plan.matched_aliases,
+                    "elapsed_ms": (time.perf_counter() - t0) * 1000,
+                },
+            }
+
+    result = _llm_planner_node(state, llm)
+    path = "llm" if plan is None else "llm_fallback"
+    record_planner_path(path)
+    result["planner_info"] = {
+        "path": path,
+        "confidence": plan.confidence if plan is not None else None,
+        "matched": plan.matched_aliases if plan is not None else [],
+        "elapsed_ms": (time.perf_counter() - t0) * 1000,
+    }
+    return result
+
+
+def _llm_planner_node(state: ChatState, llm) -> Dict[str, Any]:
     """
     사용자의 질문을 보고,
     - 어떤 도구를 쓸지
@@ -280,7 +391,17 @@ def run_tool_node(state: ChatState, llm) -> Dict[str, Any]:
             # planner에서 만든 query/keywords를 우리 함수 시그니처에 맞게 매핑
             question = params.get("query", "")
             keywords = params.get("keywords", [])
-            result = tool_fn(question=question, selected_keywords=keywords, llm=llm)
+            # 응답 캐시: 원래 사용자 질문 + 키워드 집합 + 데이터 epoch 기준
+            # (동시에 같은 질문이 오면 한 번만 계산해서 공유,
+            #  분석 실패나 더미 데이터가 섞인 결과는 캐시 안 함)
+            key = make_key(_last_user_text(state) or question, keywords, data_epoch())
+            cached, status = _response_cache.get_or_compute(
+                key,
+                lambda: tool_fn(question=question, selected_keywords=keywords, llm=llm),
+                cacheable=lambda r: bool(r.get("complete")),
+            )
+            tracing.count_cache("response", status)
+            result = {**cached, "cache_status": status}
         else:
             # (혹시 나중에 다른 툴 늘어나면)
             result = tool_fn(**params)
@@ -298,9 +419,7 @@ def run_tool_node(state: ChatState, llm) -> Dict[str, Any]:
 # 4. 그래프 컴파일 + 외부에서 쓸 helper 함수
 # ------------------------------------------------------------
 
-def _build_graph():
-    llm = get_llm()
-
+def _build_graph(llm):
     builder = StateGraph(ChatState)
     builder.add_node("planner", lambda s, _llm=llm: planner_node(s, _llm))
     builder.add_node("run_tool", lambda s, _llm=llm: run_tool_node(s, _llm))
@@ -312,7 +431,8 @@ def _build_graph():
     return builder.compile()
 
 
-_graph = _build_graph()
+_llm = get_llm()
+_graph = _build_graph(_llm)
 
 
 def run_fsd_agent(user_message: str) -> Dict[str, Any]:
@@ -322,13 +442,16 @@ def run_fsd_agent(user_message: str) -> Dict[str, Any]:
     아웃풋: {
       "answer": str,
       "sentiment_chart": List[SentimentRow],
-      "raw_tool_result": Dict[str, Any]
+      "raw_tool_result": Dict[str, Any],
+      "planner": Dict[str, Any],  # planner 경로/시간 (fast | llm | llm_fallback)
+      "cache_status": str         # 응답 캐시 상태 (hit | miss | shared)
     }
     """
     initial_state: ChatState = {
         "messages": [HumanMessage(content=user_message)],
         "tool_request": None,
         "tool_result": None,
+        "planner_info": None,
     }
 
     final_state: ChatState = _graph.invoke(initial_state)
@@ -346,4 +469,141 @@ def run_fsd_agent(user_message: str) -> Dict[str, Any]:
         "answer": answer,
         "sentiment_chart": sentiment_chart,
         "raw_tool_result": tool_result,
+        "planner": final_state.get("planner_info") or {},
+        "cache_status": tool_result.get("cache_status"),
+    }
+
+
+def stream_fsd_agent(
+    user_message: str,
+    emit: Callable[[Dict[str, Any]], None],
+    cancelled: Optional[threading.Event] = None,
+) -> None:
+    """
+    run_fsd_agent 의 스트리밍 버전 (SSE 엔드포인트용).
+    호출한 스레드에서 파이프라인을 그대로 돌리면서 진행되는 대로 이벤트 dict 를 emit 에 넘긴다.
+
+      {"event": "keywords", "keywords": [...], "planner": {...}}
+      {"event": "crawl_progress", "keyword": ..., "posts": n, "done": i, "total": k}
+      {"event": "sentiment_chart", "sentiment_chart": [...]}
+      {"event": "lda_topics", "lda_topics": [...]}
+      {"event": "token", "text": "..."}          ← 최종 답변을 토큰 단위로
+      {"event": "done", "answer": ..., "sentiment_chart": [...], "lda_topics": [...]}
+
+    cancelled 가 set 되면 다음 단계 경계(키워드 크롤링 하나 / 차트 / LDA / 요약 토큰)에서 멈춤
+    (done 없이 반환).
+
+    응답 캐시는 get/put 만 사용하고 single-flight 는 거치지 않음
+    (토큰을 흘려보내는 중이라 다른 요청과 계산을 공유할 수 없음 → 같은 질문이 동시에 오면 각자 계산).
+    저장 조건은 run_fsd_agent 와 같음 (모든 키워드가 실제 글을 가져온 경우만).
+    """
+    def check() -> None:
+        if cancelled is not None and cancelled.is_set():
+            raise StreamCancelled()
+
+    try:
+        _stream_fsd_agent(user_message, emit, check)
+    except StreamCancelled:
+        print("[fsd_graph] 스트리밍 클라이언트 연결 끊김 → 남은 단계 건너뜀")
+
+
+def _stream_fsd_agent(
+    user_message: str,
+    emit: Callable[[Dict[str, Any]], None],
+    check: Callable[[], None],
+) -> None:
+    state: ChatState = {
+        "messages": [HumanMessage(content=user_message)],
+        "tool_request": None,
+        "tool_result": None,
+        "planner_info": None,
     }
+
+    # 1) 키워드 계획
+    plan = planner_node(state, _llm)
+    req = plan.get("tool_request") or {}
+    params = req.get("parameters") or {}
+    if req.get("name") not in TOOLS:
+        emit({
+            "event": "done",
+            "answer": "도구 호출 계획을 만들지 못했습니다.",
+            "sentiment_chart": DEFAULT_SENTIMENT_CHART,
+            "lda_topics": [],
+        })
+        return
+
+    question = params.get("query") or user_message
+    keywords = params.get("keywords", []) or []
+    emit({"event": "keywords", "keywords": keywords, "planner": plan.get("planner_info") or {}})
+
+    # 캐시에 같은 응답이 있으면 파이프라인 없이 바로 전달
+    cache_key = make_key(user_message, keywords, data_epoch())
+    cached = _response_cache.get(cache_key)
+    tracing.count_cache("response", "hit" if cached is not None else "miss")
+    if cached is not None:
+        emit({"event": "sentiment_chart", "sentiment_chart": cached["sentiment_chart"]})
+        emit({"event": "lda_topics", "lda_topics": cached["lda_topics"]})
+        emit({"event": "token", "text": cached["answer"]})
+        emit({
+            "event": "done",
+            "answer": cached["answer"],
+            "sentiment_chart": cached["sentiment_chart"],
+            "lda_topics": cached["lda_topics"],
+            "cache_status": "hit",
+        })
+        return
+    check()
+
+    # 2) 크롤링/감성/LDA: 단계가 끝날 때마다 이벤트를 바로 넘기고, 넘기기 전에 끊겼는지 확인
+    seen = set()
+
+    def on_event(name: str, payload: Dict[str, Any]) -> None:
+        check()
+        seen.add(name)
+        emit({"event": name, **payload})
+
+    sentiment_chart, lda_topics, raw_count, complete = _run_analysis(question, keywords, on_event=on_event)
+    check()
+    # 분석이 실패해서 중간 이벤트가 안 나갔으면 기본값이라도 전달
+    if "sentiment_chart" not in seen:
+        emit({"event": "sentiment_chart", "sentiment_chart": sentiment_chart})
+    if "lda_topics" not in seen:
+        emit({"event": "lda_topics", "lda_topics": lda_topics})
+
+    # 3) 최종 요약은 ChatOllama 스트리밍으로 토큰 단위 전달
+    prompt = build_summary_prompt(question, keywords, sentiment_chart, lda_topics, raw_count)
+    parts: List[str] = []
+    with tracing.span("llm_summary", streaming=True) as sp:
+        for chunk in _llm.stream(prompt):
+            check()
+            text = chunk.content or ""
+            if text:
+                parts.append(text)
+                emit({"event": "token", "text": text})
+        sp.set(chunks=len(parts))
+
+    answer = "".join(parts)
+    if answer and complete:
+        _response_cache.put(
+            cache_key,
+            {
+                "answer": answer,
+                "sentiment_chart": sentiment_chart,
+                "lda_topics": lda_topics,
+                "raw_count": raw_count,
+                "complete": complete,
+            },
+        )
+
+    emit({
+        "event": "done",
+        "answer": answer or "분석 결과를 가져오지 못했습니다.",
+        "sentiment_chart": sentiment_chart,
+        "lda_topics": lda_topics,
+        "cache_status": "miss",
+    })
+
+
+def response_cache_stats() -> Dict[str, Any]:
+    """전체 응답 캐시 통계."""
+    return _response_cache.stats()
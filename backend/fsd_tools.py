@@ -10,23 +10,39 @@ FSD Research Assistant용 분석 파이프라인 모듈 (경량 버전)
 5) LangGraph 쪽에서는 이 모듈의 최상위 함수만 하나의 "툴"처럼 호출
 
 ※ Playwright / crawler_async 사용 X
-   -> requests 기반이라 Windows/배포 환경에서도 훨씬 안정적
+   -> requests 기반(reddit_client 공용 세션)이라 Windows/배포 환경에서도 훨씬 안정적
 """
 
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Tuple
 from pathlib import Path
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import copy
+import hashlib
+import json
+import multiprocessing
+import os
 import re
-import urllib.parse
+import threading
+import time
 
-import requests
+import joblib
+import numpy as np
 import pandas as pd
+import sklearn
 from nltk.sentiment import SentimentIntensityAnalyzer
 from sklearn.feature_extraction.text import CountVectorizer
 from sklearn.decomposition import LatentDirichletAllocation
 
+import reddit_client
+import tracing
+from corpus_store import CorpusStore
+from crawl_state import PAGE_LIMIT, CrawlStateStore, fetch_new_posts, post_from_listing
+from kv_cache import SqliteCache
+
 
 # ----- 0. 경로 / 상수 설정 -----
 
@@ -34,6 +50,71 @@ BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "data"
 DATA_DIR.mkdir(exist_ok=True)
 
+# Reddit 동시 요청 설정
+# - CRAWL_MAX_WORKERS: 키워드 검색을 동시에 보내는 스레드 수
+#   (reddit.com 동시 요청 수 / rate budget 은 reddit_client 의 전역 limiter 가 담당)
+CRAWL_MAX_WORKERS = 5
+
+# Reddit search.json 은 요청 한 번에 최대 100개(PAGE_LIMIT) → 그 이상은 after 커서로 페이지를 이어 받음
+# - 키워드당 총 개수는 max_posts 로 지정, SEARCH_MAX_PAGES 는 폭주 방지용 상한
+SEARCH_MAX_PAGES = 10
+
+# Reddit 검색 결과 디스크 캐시 (DATA_DIR/reddit_search_cache.sqlite3)
+# - TTL 안쪽: 바로 사용 / TTL ~ TTL+STALE_TTL: 일단 사용 + 백그라운드 재검증
+# - MAX_ENTRIES 초과 시 오래 안 쓴 키부터 삭제(LRU)
+SEARCH_CACHE_TTL = 6 * 60 * 60
+SEARCH_CACHE_STALE_TTL = 24 * 60 * 60
+SEARCH_CACHE_MAX_ENTRIES = 500
+
+# 증분 크롤링 high-water mark (DATA_DIR/crawl_state.sqlite3)
+# - crawl_new_posts: 키워드별로 지난 실행 이후 새 글만 sort=new 로 받아옴
+# - INCREMENTAL_MAX_PAGES: 한 번에 따라갈 최대 페이지(100개 단위) 수
+INCREMENTAL_MAX_PAGES = 10
+
+# 로컬 코퍼스 (DATA_DIR/corpus.sqlite3, corpus_store)
+# - 요청마다 크롤링/채점한 글을 post id 기준으로 upsert (배치 스크립트들과 같은 파일 공유)
+CORPUS_WRITE = True
+
+# 코퍼스 모드 (FSD_CORPUS_MODE: auto | off)
+# - auto: 키워드별로 코퍼스(역색인: 키워드 매핑 + FTS5)에서 먼저 찾고,
+#         매칭 글이 CORPUS_MIN_DOCS 미만인 키워드만 실시간 크롤링
+# - off : 항상 실시간 크롤링 (예전 동작)
+# - CORPUS_REFRESH_INTERVAL: 백그라운드 증분 갱신 주기(초, FSD_CORPUS_REFRESH_SEC, 0 이면 끔)
+# - CORPUS_REFRESH_DELAY: 서버 시작 후 첫 갱신까지 대기(초, FSD_CORPUS_REFRESH_DELAY_SEC)
+CORPUS_MODE = os.environ.get("FSD_CORPUS_MODE", "auto").lower()
+CORPUS_MIN_DOCS = int(os.environ.get("FSD_CORPUS_MIN_DOCS", "20"))
+CORPUS_WINDOW = 365 * 24 * 60 * 60  # 검색의 t=year 와 같은 범위
+CORPUS_REFRESH_INTERVAL = float(os.environ.get("FSD_CORPUS_REFRESH_SEC", "3600"))
+CORPUS_REFRESH_DELAY = float(os.environ.get("FSD_CORPUS_REFRESH_DELAY_SEC", "300"))
+CORPUS_REFRESH_MAX_KEYWORDS = 30
+
+# VADER 점수 캐시 (문서 내용 해시 → compound 점수)
+SENTIMENT_CACHE_MAX_ENTRIES = 50_000
+SENTIMENT_DISK_CACHE = True
+SENTIMENT_DISK_CACHE_MAX_ENTRIES = 500_000
+
+# 대량 백필용 멀티 프로세스 VADER 채점 (오프라인 전용, run_sentiment(workers=N>1) 로 직접 켤 때만)
+# - API 요청 경로에서는 자동으로 쓰지 않음 (멀티스레드 서버 안에서 프로세스 풀을 만들지 않도록)
+# - SENTIMENT_BATCH_CHUNK: 워커 하나에 한 번에 넘기는 문서 수
+SENTIMENT_BATCH_CHUNK = 1000
+
+# LDA 토픽 캐시 / 온라인 모델 (DATA_DIR/lda_topics.sqlite3, DATA_DIR/lda_online_k<N>.joblib)
+# - 같은 문서 집합(fingerprint)이면 저장된 토픽을 그대로 반환
+# - 다르면 저장된 어휘 + 온라인 LDA 를 새 문서로 partial_fit 해서 갱신 (처음 한 번만 전체 fit)
+# - LDA_VOCAB_MAX: 새 문서에서 어휘를 늘릴 때의 상한
+# - LDA_SEEN_MAX: 이미 학습에 쓴 문서 해시를 기억해 둘 최대 개수 (중복 학습 방지)
+LDA_CACHE_MAX_ENTRIES = 256
+LDA_ONLINE = True
+LDA_VOCAB_MAX = 20_000
+LDA_SEEN_MAX = 200_000
+# - LDA_EXTEND_VOCAB: 새 문서로 어휘를 늘릴지 (FSD_LDA_EXTEND_VOCAB=0 이면 기존 어휘로만 partial_fit)
+#   _extend_vocab 은 LatentDirichletAllocation 의 내부 속성(components_, exp_dirichlet_component_,
+#   n_features_in_)을 직접 고침 → 속성이 없거나 확장 후 partial_fit 이 실패하면 확장 없이 다시 학습
+# - 번들에는 학습한 scikit-learn 버전을 같이 저장, 설치된 버전과 다르면 내부 구조가 다를 수 있으므로
+#   불러오지 않고 새로 학습
+LDA_EXTEND_VOCAB = os.environ.get("FSD_LDA_EXTEND_VOCAB", "1") != "0"
+_LDA_INTERNALS = ("components_", "exp_dirichlet_component_", "topic_word_prior_", "n_features_in_")
+
 # 사용자가 미리 정의해 둔 후보 키워드 (질문에서 준 리스트 그대로)
 CANDIDATE_KEYWORDS = [
     "tesla", "musk", "fsd", "autopilot", "robotaxi", "cybercab",
@@ -61,56 +142,187 @@ class SentimentRow:
     sentiment: str      # "Negative" | "Neutral" | "Positive"
 
 
-# ----- 1. Reddit 크롤링 (requests 기반, 동기) -----
+# 진행 상황 콜백: on_event(event_name, payload)
+# (스트리밍 엔드포인트에서 단계별 결과를 바로 흘려보낼 때 사용)
+EventCallback = Callable[[str, Dict[str, Any]], None]
+
 
-def _crawl_one_keyword(keyword: str, max_posts: int = 40) -> List[Dict[str, Any]]:
+# ----- 1. Reddit 크롤링 (reddit_client 공용 세션, 동기) -----
+
+def _fetch_search_posts(keyword: str, t: str, sort: str, limit: int) -> List[Dict[str, Any]]:
+    """
+    Reddit 검색(JSON)을 실제로 호출해서 글 목록을 돌려준다.
+    limit 이 100(PAGE_LIMIT)을 넘으면 after 커서로 다음 페이지를 이어서 받음.
+    실패하면 예외를 그대로 올림 (캐시/더미 처리는 호출 측에서).
+    """
+    posts: List[Dict[str, Any]] = []
+    seen: set = set()
+    after: Optional[str] = None
+    pages = 0
+    nbytes = 0
+
+    with tracing.span("reddit_search", keyword=keyword) as sp:
+        while len(posts) < limit and pages < SEARCH_MAX_PAGES:
+            # t=year : 최근 1년, type=link(게시물)
+            params: Dict[str, Any] = {
+                "q": keyword,
+                "t": t,
+                "type": "link",
+                "sort": sort,
+                "limit": min(PAGE_LIMIT, limit - len(posts)),
+            }
+            if after:
+                params["after"] = after
+            print(f"[fsd_tools] Reddit JSON 검색: keyword='{keyword}' page={pages + 1} after={after}")
+            # 공용 세션(keep-alive) + 전역 rate limiter (User-Agent 는 reddit_client.DEFAULT_UA)
+            resp = reddit_client.get("https://www.reddit.com/search.json", params=params, timeout=10)
+            pages += 1
+            nbytes += len(resp.content)
+            sp.set(status=resp.status_code, pages=pages, bytes=nbytes)
+            resp.raise_for_status()
+            listing = resp.json().get("data", {}) or {}
+
+            children = listing.get("children", []) or []
+            for child in children:
+                post = post_from_listing(child.get("data", {}) or {})
+                # 페이지 경계에서 같은 글이 다시 나오는 경우가 있어서 id 로 한 번 더 거름
+                if post["post_id"] and post["post_id"] in seen:
+                    continue
+                seen.add(post["post_id"])
+                posts.append(post)
+
+            after = listing.get("after")
+            if not after or not children:
+                break
+
+        posts = posts[:limit]
+        sp.set(rows=len(posts))
+    return posts
+
+
+# ----- 1-1. 검색 결과 디스크 캐시 -----
+
+_search_cache = SqliteCache(
+    DATA_DIR / "reddit_search_cache.sqlite3",
+    table="search_results",
+    ttl=SEARCH_CACHE_TTL,
+    stale_ttl=SEARCH_CACHE_STALE_TTL,
+    max_entries=SEARCH_CACHE_MAX_ENTRIES,
+)
+_revalidating: set = set()
+_revalidating_lock = threading.Lock()
+_revalidate_count = 0
+
+
+def _search_cache_key(keyword: str, t: str, sort: str, limit: int) -> str:
+    return json.dumps([keyword, t, sort, int(limit)], ensure_ascii=False)
+
+
+def _revalidate_in_background(keyword: str, t: str, sort: str, limit: int) -> None:
+    """stale 캐시를 돌려준 뒤, 같은 키를 백그라운드 스레드에서 한 번만 새로 받아온다."""
+    global _revalidate_count
+    key = _search_cache_key(keyword, t, sort, limit)
+    with _revalidating_lock:
+        if key in _revalidating:
+            return
+        _revalidating.add(key)
+        _revalidate_count += 1
+
+    def _worker() -> None:
+        try:
+            posts = _fetch_search_posts(keyword, t, sort, limit)
+            if posts:
+                _search_cache.set(key, posts)
+        except Exception as e:
+            print(f"[fsd_tools] 백그라운드 갱신 실패(keyword='{keyword}'): {e}")
+        finally:
+            with _revalidating_lock:
+                _revalidating.discard(key)
+
+    threading.Thread(target=_worker, name="fsd-search-revalidate", daemon=True).start()
+
+
+def _cached_search_posts(
+    keyword: str,
+    t: str = "year",
+    sort: str = "relevance",
+    limit: int = 40,
+    use_cache: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    (keyword, t, sort, limit) 단위로 디스크 캐시를 먼저 확인.
+    - fresh hit  : 네트워크 없이 바로 반환
+    - stale hit  : 일단 반환 + 백그라운드에서 재검증
+    - miss       : 실제 검색 후 결과가 있으면 캐시에 저장
+    """
+    if use_cache:
+        key = _search_cache_key(keyword, t, sort, limit)
+        entry = _search_cache.get(key)
+        if entry is not None:
+            result = "stale" if entry.stale else "hit"
+            tracing.count_cache("search", result)
+            tracing.annotate(cache=result, cache_age_sec=round(entry.age, 1))
+            if entry.stale:
+                _revalidate_in_background(keyword, t, sort, limit)
+            print(
+                f"[fsd_tools] 검색 캐시 hit: keyword='{keyword}' "
+                f"(age {entry.age:.0f}s{', stale' if entry.stale else ''})"
+            )
+            return entry.value
+
+    if use_cache:
+        tracing.count_cache("search", "miss")
+        tracing.annotate(cache="miss")
+    posts = _fetch_search_posts(keyword, t, sort, limit)
+    if use_cache and posts:
+        _search_cache.set(_search_cache_key(keyword, t, sort, limit), posts)
+    return posts
+
+
+def data_epoch() -> int:
+    """
+    크롤링 데이터 freshness epoch.
+    검색 캐시 TTL 단위로 값이 바뀌므로, 응답 캐시 키에 넣으면 데이터가 갱신될 때 같이 무효화됨.
+    """
+    return int(time.time() // SEARCH_CACHE_TTL)
+
+
+def search_cache_stats() -> Dict[str, Any]:
+    """검색 캐시 hit/miss/age 통계 (TTL/크기 튜닝용)."""
+    stats = _search_cache.stats()
+    with _revalidating_lock:
+        stats["revalidations"] = _revalidate_count
+        stats["revalidating"] = len(_revalidating)
+    return stats
+
+
+def _crawl_one_keyword(
+    keyword: str,
+    max_posts: int = 40,
+    use_cache: bool = True,
+) -> List[Dict[str, Any]]:
     """
     하나의 키워드에 대해 Reddit 검색(JSON)을 사용해 글 목록 수집.
     - 최근 1년(t=year) 범위
     - title + selftext를 content로 사용
-    - 실패 시 더미 데이터로 fallback
+    - 같은 (keyword, t, sort, limit)는 디스크 캐시 재사용
+    - 실패 시 더미 데이터로 fallback (더미는 캐시하지 않음)
     """
-    search_q = urllib.parse.quote_plus(keyword)
-    # t=year : 최근 1년, type=link(게시물)
-    url = (
-        f"https://www.reddit.com/search.json"
-        f"?q={search_q}&t=year&type=link&sort=relevance&limit={max_posts}"
-    )
-    headers = {
-        # Reddit은 User-Agent 없으면 429/403 잘 내서 대충이라도 넣어준다
-        "User-Agent": "fsd-research-bot/0.1 by secha-capstone",
-    }
-
-    try:
-        print(f"[fsd_tools] Reddit JSON 검색: keyword='{keyword}' → {url}")
-        resp = requests.get(url, headers=headers, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
-
-        posts: List[Dict[str, Any]] = []
-        children = data.get("data", {}).get("children", [])
-        for child in children[:max_posts]:
-            d = child.get("data", {})
-            title = d.get("title", "") or ""
-            selftext = d.get("selftext", "") or ""
-            permalink = d.get("permalink", "") or ""
-            full_url = "https://www.reddit.com" + permalink if permalink else d.get("url", "")
-
-            posts.append(
-                {
-                    "title": title,
-                    "content": selftext,
-                    "url": full_url,
-                }
+    with tracing.span("crawl_keyword", keyword=keyword) as sp:
+        try:
+            posts = _cached_search_posts(
+                keyword, t="year", sort="relevance", limit=max_posts, use_cache=use_cache
             )
 
-        # 혹시 비어 있으면 더미로 fallback
-        if posts:
-            return posts
+            # 혹시 비어 있으면 더미로 fallback
+            if posts:
+                sp.set(rows=len(posts))
+                return posts
 
-        print(f"[fsd_tools] keyword='{keyword}' 결과 없음 → dummy 사용")
-    except Exception as e:
-        print(f"[fsd_tools] Reddit 검색 실패, dummy 사용: {e}")
+            print(f"[fsd_tools] keyword='{keyword}' 결과 없음 → dummy 사용")
+        except Exception as e:
+            print(f"[fsd_tools] Reddit 검색 실패, dummy 사용: {e}")
+        sp.set(rows=2, dummy=True)
 
     # 실패 또는 결과 없음일 때: dummy 데이터
     return [
@@ -127,22 +339,89 @@ def _crawl_one_keyword(keyword: str, max_posts: int = 40) -> List[Dict[str, Any]
     ]
 
 
-def crawl_posts_sync(keywords: List[str], max_posts: int = 40) -> pd.DataFrame:
+_POST_ID_RE = re.compile(r"/comments/([a-z0-9]+)/", re.IGNORECASE)
+
+
+def _post_id_from_url(url: str) -> str:
+    m = _POST_ID_RE.search(url or "")
+    return m.group(1) if m else ""
+
+
+def _post_keys(df: pd.DataFrame) -> pd.Series:
+    """
+    같은 글 판별용 키: post_id, 없으면(더미 등) text 자체.
+    여러 키워드에서 같이 검색된 글은 키가 같음.
+    """
+    text = df["text"].fillna("").astype(str)
+    if "post_id" not in df.columns:
+        return text
+    pid = df["post_id"].fillna("").astype(str)
+    return pid.where(pid != "", "text:" + text)
+
+
+def crawl_posts_sync(
+    keywords: List[str],
+    max_posts: int = 40,
+    max_workers: Optional[int] = None,
+    use_cache: bool = True,
+    on_event: Optional[EventCallback] = None,
+) -> pd.DataFrame:
     """
-    여러 키워드에 대해 순차적으로 Reddit JSON 검색 → pandas DataFrame으로 변환.
+    여러 키워드에 대해 Reddit JSON 검색 → pandas DataFrame으로 변환.
     (동기 함수라 LangGraph/일반 Python 코드에서 바로 호출 가능)
+
+    - 키워드 검색은 스레드 풀로 동시에 보내고, 호스트 단위 제한은 reddit_client.limiter가 담당
+      → 전체 소요 시간 ≈ 가장 느린 키워드 하나
+    - max_workers=1 이면 예전처럼 순차 실행
+    - 결과 row 순서는 항상 입력 keywords 순서를 따름 (DataFrame 결정적)
+    - use_cache=False 면 검색 캐시를 건너뛰고 항상 네트워크 호출
+    - 같은 글이 여러 키워드에 걸리면 키워드마다 row 가 생김 (키워드별 집계용),
+      post_id 컬럼으로 구분해서 채점/LDA 는 글 하나당 한 번만
+    - on_event 가 있으면 키워드 하나가 끝날 때마다 "crawl_progress" 이벤트 전달
     """
     rows: List[Dict[str, Any]] = []
 
-    for kw in keywords:
-        posts = _crawl_one_keyword(kw, max_posts=max_posts)
+    workers = max_workers if max_workers is not None else CRAWL_MAX_WORKERS
+    workers = max(1, min(workers, len(keywords) or 1))
+
+    done_lock = threading.Lock()
+    done_count = 0
+
+    def crawl(kw: str) -> List[Dict[str, Any]]:
+        nonlocal done_count
+        posts = _crawl_one_keyword(kw, max_posts=max_posts, use_cache=use_cache)
+        if on_event is not None:
+            with done_lock:
+                done_count += 1
+                done = done_count
+            on_event(
+                "crawl_progress",
+                {"keyword": kw, "posts": len(posts), "done": done, "total": len(keywords)},
+            )
+        return posts
+
+    with tracing.span("crawl", keywords=len(keywords)) as sp:
+        if workers == 1:
+            results = [crawl(kw) for kw in keywords]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fsd-crawl") as pool:
+                # executor.map 은 제출 순서대로 결과를 돌려줌
+                # (tracing.bind: 워커 스레드의 span 도 현재 요청 trace 에 모이도록)
+                results = list(pool.map(tracing.bind(crawl), keywords))
+        sp.set(rows=sum(len(p) for p in results))
+
+    for kw, posts in zip(keywords, results):
         for p in posts:
+            url = p.get("url", "")
             rows.append(
                 {
                     "keyword": kw,
                     "title": p.get("title", ""),
                     "content": p.get("content", ""),
-                    "url": p.get("url", ""),
+                    "url": url,
+                    # 예전 캐시 항목에는 post_id 가 없으므로 URL 에서 추출
+                    "post_id": p.get("post_id") or _post_id_from_url(url),
+                    "created_utc": p.get("created_utc"),
                 }
             )
 
@@ -155,6 +434,52 @@ def crawl_posts_sync(keywords: List[str], max_posts: int = 40) -> pd.DataFrame:
     return df
 
 
+# ----- 1-2. 증분 크롤링 (지난 실행 이후 새 글만) -----
+
+_crawl_state = CrawlStateStore(DATA_DIR / "crawl_state.sqlite3")
+
+
+def _incremental_key(keyword: str, t: str) -> str:
+    return json.dumps(["search", keyword, t], ensure_ascii=False)
+
+
+def crawl_new_posts(
+    keywords: List[str],
+    t: str = "year",
+    max_pages: Optional[int] = None,
+    max_workers: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    키워드별 high-water mark 이후에 올라온 글만 수집 → DataFrame
+    (컬럼: keyword, title, content, url, post_id, created_utc, text).
+
+    - 첫 실행은 t 범위를 max_pages 페이지까지 백필, 이후에는 이미 본 글에 닿는 순간 중단
+    - 실패한 키워드는 건너뛰고 mark 도 그대로 둠 → 다음 실행에서 다시 시도
+    - 검색 캐시는 쓰지 않음 (항상 최신 상태 확인이 목적)
+    """
+    pages = max_pages if max_pages is not None else INCREMENTAL_MAX_PAGES
+    workers = max_workers if max_workers is not None else CRAWL_MAX_WORKERS
+    workers = max(1, min(workers, len(keywords) or 1))
+
+    def crawl(kw: str) -> List[Dict[str, Any]]:
+        with tracing.span("crawl_incremental", keyword=kw) as sp:
+            try:
+                posts = fetch_new_posts(_crawl_state, _incremental_key(kw, t), kw, t=t, max_pages=pages)
+            except Exception as e:
+                print(f"[fsd_tools] 증분 크롤링 실패(keyword='{kw}'): {e}")
+                posts = []
+            sp.set(rows=len(posts))
+            return posts
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fsd-crawl") as pool:
+        results = list(pool.map(tracing.bind(crawl), keywords))
+
+    rows = [{"keyword": kw, **p} for kw, posts in zip(keywords, results) for p in posts]
+    df = pd.DataFrame(rows, columns=["keyword", "title", "content", "url", "post_id", "created_utc"])
+    df["text"] = (df["title"].fillna("") + " " + df["content"].fillna("")).str.strip()
+    return df
+
+
 # ----- 2. 감성 분석 -----
 
 _sia: SentimentIntensityAnalyzer | None = None
@@ -167,23 +492,191 @@ def _get_sia() -> SentimentIntensityAnalyzer:
     return _sia
 
 
-def run_sentiment(df: pd.DataFrame) -> pd.DataFrame:
+# ----- 2-1. 문서 해시 기반 VADER 점수 캐시 -----
+# 1차: 프로세스 메모리 LRU (SENTIMENT_CACHE_MAX_ENTRIES)
+# 2차: (옵션) DATA_DIR/vader_scores.sqlite3 디스크 캐시 → 서버 재시작 후에도 재사용
+
+_score_cache: "OrderedDict[str, float]" = OrderedDict()
+_score_cache_lock = threading.Lock()
+_score_cache_hits = 0
+_score_cache_misses = 0
+
+_score_disk_cache: Optional[SqliteCache] = (
+    SqliteCache(
+        DATA_DIR / "vader_scores.sqlite3",
+        table="vader_scores",
+        max_entries=SENTIMENT_DISK_CACHE_MAX_ENTRIES,
+    )
+    if SENTIMENT_DISK_CACHE
+    else None
+)
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8", errors="replace")).hexdigest()
+
+
+def _score_one(sia: SentimentIntensityAnalyzer, text: str) -> float:
+    s = sia.polarity_scores(text or "")
+    return float(s["compound"])
+
+
+def _remember_scores(scores: Dict[str, float]) -> None:
+    with _score_cache_lock:
+        for h, v in scores.items():
+            _score_cache[h] = v
+            _score_cache.move_to_end(h)
+        while len(_score_cache) > SENTIMENT_CACHE_MAX_ENTRIES:
+            _score_cache.popitem(last=False)
+
+
+# ----- 2-2. 프로세스 풀 배치 채점 -----
+
+_worker_sia: SentimentIntensityAnalyzer | None = None
+
+
+def _init_sentiment_worker() -> None:
+    """프로세스 풀 initializer: 워커마다 SentimentIntensityAnalyzer를 한 번만 생성."""
+    global _worker_sia
+    _worker_sia = SentimentIntensityAnalyzer()
+
+
+def _score_chunk(texts: List[str]) -> List[float]:
+    sia = _worker_sia if _worker_sia is not None else _get_sia()
+    return [_score_one(sia, t) for t in texts]
+
+
+def iter_sentiment_scores(
+    texts: List[str],
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> Iterator[float]:
+    """
+    텍스트 리스트를 chunk 단위로 나눠 프로세스 풀에서 채점하고,
+    점수를 입력 순서대로 하나씩 흘려보내는 제너레이터 (캐시 미사용, 순수 계산).
+
+    - workers: 프로세스 수 (기본: CPU 코어 수)
+    - chunk_size: 워커당 한 번에 넘기는 문서 수 (기본: SENTIMENT_BATCH_CHUNK)
+    - 워커는 spawn 으로 띄움 → 부모의 스레드/SQLite 커넥션 상태를 fork 로 물려받지 않음
+    """
+    if not texts:
+        return
+
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or SENTIMENT_BATCH_CHUNK
+    chunks = [texts[i : i + chunk_size] for i in range(0, len(texts), chunk_size)]
+
+    if workers <= 1 or len(chunks) == 1:
+        for chunk in chunks:
+            yield from _score_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(chunks)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_sentiment_worker,
+    ) as pool:
+        # pool.map 은 제출 순서대로 결과를 돌려주므로 순서가 유지됨
+        for chunk_scores in pool.map(_score_chunk, chunks):
+            yield from chunk_scores
+
+
+def score_texts(texts: List[str], workers: Optional[int] = None) -> List[float]:
+    """
+    텍스트 리스트 → VADER compound 점수 리스트 (입력 순서 유지).
+    - 같은 내용은 해시가 같으므로 한 번만 계산 (여러 키워드에 중복된 글 포함)
+    - 메모리 LRU → 디스크 캐시 → 실제 계산 순으로 조회
+    - workers > 1 을 직접 넘긴 경우에만 프로세스 풀로 나눠서 계산 (오프라인 백필용)
+    """
+    global _score_cache_hits, _score_cache_misses
+
+    hashes = [_text_hash(t) for t in texts]
+    unique: Dict[str, str] = {}
+    for h, t in zip(hashes, texts):
+        unique.setdefault(h, t)
+
+    scores: Dict[str, float] = {}
+    with _score_cache_lock:
+        for h in unique:
+            v = _score_cache.get(h)
+            if v is not None:
+                scores[h] = v
+                _score_cache.move_to_end(h)
+        _score_cache_hits += len(scores)
+    tracing.count_cache("vader", "hit", len(scores))
+
+    missing = [h for h in unique if h not in scores]
+    if missing and _score_disk_cache is not None:
+        disk_hits = {h: float(e.value) for h, e in _score_disk_cache.get_many(missing).items()}
+        if disk_hits:
+            scores.update(disk_hits)
+            _remember_scores(disk_hits)
+            with _score_cache_lock:
+                _score_cache_hits += len(disk_hits)
+            tracing.count_cache("vader_disk", "hit", len(disk_hits))
+            missing = [h for h in missing if h not in disk_hits]
+
+    if missing:
+        if (workers or 0) > 1:
+            computed = iter_sentiment_scores([unique[h] for h in missing], workers=workers)
+            fresh = dict(zip(missing, computed))
+        else:
+            sia = _get_sia()
+            fresh = {h: _score_one(sia, unique[h]) for h in missing}
+        scores.update(fresh)
+        _remember_scores(fresh)
+        if _score_disk_cache is not None:
+            _score_disk_cache.set_many(fresh.items())
+        with _score_cache_lock:
+            _score_cache_misses += len(fresh)
+        tracing.count_cache("vader", "miss", len(fresh))
+
+    tracing.annotate(unique=len(unique), cache_hits=len(unique) - len(missing), scored=len(missing))
+    return [scores[h] for h in hashes]
+
+
+def sentiment_cache_stats() -> Dict[str, Any]:
+    """VADER 점수 캐시 통계 (메모리 + 디스크)."""
+    with _score_cache_lock:
+        lookups = _score_cache_hits + _score_cache_misses
+        stats: Dict[str, Any] = {
+            "memory_entries": len(_score_cache),
+            "hits": _score_cache_hits,
+            "misses": _score_cache_misses,
+            "hit_ratio": (_score_cache_hits / lookups) if lookups else 0.0,
+        }
+    if _score_disk_cache is not None:
+        stats["disk"] = _score_disk_cache.stats()
+    return stats
+
+
+def run_sentiment(df: pd.DataFrame, workers: Optional[int] = None) -> pd.DataFrame:
     """
     각 row의 text에 대해 VADER 감성 점수(compound)를 계산해서 sentiment_score 컬럼 추가.
+    (점수는 score_texts 캐시를 거치므로 이미 본 문서는 다시 계산하지 않음)
+
+    - workers=None/1: 단일 프로세스 (API 요청 경로의 기본)
+    - workers=N(>1) : 오프라인 백필 등에서만 프로세스 풀 사용 (opt-in)
     """
     if df.empty:
         df["sentiment_score"] = pd.Series(dtype=float)
         return df
 
-    sia = _get_sia()
-
-    def score_text(text: str) -> float:
-        text = text or ""
-        s = sia.polarity_scores(text)
-        return float(s["compound"])
-
     df = df.copy()
-    df["sentiment_score"] = df["text"].astype(str).map(score_text)
+    # 코퍼스에서 온 row 처럼 이미 점수가 있으면 그대로 두고 빈 것만 채점
+    if "sentiment_score" in df.columns:
+        existing = pd.to_numeric(df["sentiment_score"], errors="coerce")
+    else:
+        existing = pd.Series(float("nan"), index=df.index)
+    need = existing.isna()
+
+    # 여러 키워드에 중복된 글은 한 번만 채점하고 나머지 row 에 같은 점수를 나눠 줌
+    keys = _post_keys(df)
+    first = need & ~keys.where(need).duplicated()
+    texts = df.loc[first, "text"].fillna("").astype(str).tolist()
+    with tracing.span("sentiment", rows=len(df), unique_posts=len(texts)):
+        unique_scores = dict(zip(keys[first], score_texts(texts, workers=workers)))
+    df["sentiment_score"] = existing.where(~need, keys.map(unique_scores)).astype(float)
     return df
 
 
@@ -226,17 +719,265 @@ def aggregate_to_topics(df: pd.DataFrame) -> List[SentimentRow]:
     return rows[:5]
 
 
+def aggregate_keywords(
+    keywords: List[str],
+    df: Optional[pd.DataFrame] = None,
+    since_utc: Optional[float] = None,
+) -> List[SentimentRow]:
+    """
+    키워드별 평균 점수 (상위 5개, |score| 큰 순).
+    코퍼스의 keyword_daily 집계를 먼저 보고(키워드당 인덱스 조회 한 번),
+    집계가 없는 키워드만 df 의 groupby 평균으로 채움.
+    """
+    try:
+        stored = _corpus.keyword_aggregates(keywords, since_utc=since_utc) if CORPUS_WRITE else {}
+    except Exception as e:
+        print(f"[fsd_tools] 키워드 집계 조회 실패, DataFrame 집계 사용: {e}")
+        stored = {}
+
+    rows = [
+        SentimentRow(topic=kw, score=agg["mean"], sentiment=_score_to_label(agg["mean"]))
+        for kw, agg in stored.items()
+    ]
+    rest = [kw for kw in keywords if kw not in stored]
+    if rest and df is not None and not df.empty and "keyword" in df.columns:
+        rows.extend(aggregate_to_topics(df[df["keyword"].isin(rest)]))
+
+    rows.sort(key=lambda r: abs(r.score), reverse=True)
+    return rows[:5]
+
+
+def keyword_sentiment(
+    keywords: List[str],
+    days: Optional[int] = None,
+    series: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    기간별 키워드 감성 조회 (최근 days 일, None 이면 전체).
+    [{keyword, count, mean, std, min, max, sentiment, series?}] — 집계가 없는 키워드는 count 0.
+    """
+    since = time.time() - days * 24 * 60 * 60 if days else None
+    stored = _corpus.keyword_aggregates(keywords, since_utc=since)
+    out: List[Dict[str, Any]] = []
+    for kw in dict.fromkeys(keywords):
+        agg = stored.get(kw) or {"count": 0, "mean": 0.0, "std": 0.0, "min": None, "max": None}
+        item = {"keyword": kw, **agg, "sentiment": _score_to_label(agg["mean"])}
+        if series:
+            item["series"] = _corpus.keyword_series(kw, since_utc=since)
+        out.append(item)
+    return out
+
+
 # ----- 4. LDA 토픽 모델링 -----
 
-def run_lda_topics(df: pd.DataFrame, n_topics: int = 3, n_words: int = 6) -> List[Dict[str, Any]]:
+_lda_cache = SqliteCache(
+    DATA_DIR / "lda_topics.sqlite3",
+    table="lda_topics",
+    max_entries=LDA_CACHE_MAX_ENTRIES,
+)
+_lda_models: Dict[int, Dict[str, Any]] = {}
+_lda_lock = threading.Lock()        # _lda_models 조회/교체용 (학습 중에는 잡지 않음)
+_lda_save_lock = threading.Lock()   # 디스크 저장 순서 보장용
+
+
+def _lda_fingerprint(texts: List[str]) -> str:
+    """문서 집합 fingerprint (순서/중복 무관)."""
+    h = hashlib.sha1()
+    for th in sorted({_text_hash(t) for t in texts}):
+        h.update(th.encode("ascii"))
+    return h.hexdigest()
+
+
+def _lda_model_path(n_topics: int) -> Path:
+    return DATA_DIR / f"lda_online_k{n_topics}.joblib"
+
+
+def _load_lda_model(n_topics: int) -> Optional[Dict[str, Any]]:
     """
-    크롤링된 전체 텍스트에 대해 LDA를 돌려,
-    각 토픽별 상위 키워드 리스트를 리턴.
+    메모리 → 디스크 순으로 온라인 모델 번들 {vocab, lda, seen, n_docs, sklearn} 조회 (_lda_lock 안에서 호출).
+    다른 scikit-learn 버전으로 저장된 번들은 버리고 None (→ 새로 학습해서 덮어씀).
     """
-    if df.empty:
-        return []
+    bundle = _lda_models.get(n_topics)
+    if bundle is not None:
+        return bundle
+    path = _lda_model_path(n_topics)
+    if not path.exists():
+        return None
+    try:
+        bundle = joblib.load(path)
+    except Exception as e:
+        print(f"[fsd_tools] LDA 모델 로드 실패, 새로 학습: {e}")
+        return None
+    if bundle.get("sklearn") != sklearn.__version__:
+        print(
+            f"[fsd_tools] LDA 모델 {path.name} 은 scikit-learn {bundle.get('sklearn') or '(알 수 없음)'} 로 저장됨 "
+            f"(설치: {sklearn.__version__}) → 새로 학습"
+        )
+        return None
+    print(f"[fsd_tools] LDA 모델 로드: {path.name} (어휘 {len(bundle['vocab'])}개, 문서 {bundle['n_docs']}개)")
+    _lda_models[n_topics] = bundle
+    return bundle
+
 
-    texts = df["text"].astype(str).tolist()
+def preload_lda_models(n_topics_list: Iterable[int] = (3,)) -> int:
+    """서버 시작 시 저장된 온라인 LDA 모델을 미리 메모리에 올림. 로드한 개수 반환."""
+    with _lda_lock:
+        return sum(_load_lda_model(k) is not None for k in n_topics_list)
+
+
+def _save_lda_model(n_topics: int, bundle: Dict[str, Any]) -> None:
+    path = _lda_model_path(n_topics)
+    tmp = path.with_suffix(".tmp")
+    try:
+        joblib.dump(bundle, tmp)
+        os.replace(tmp, path)
+    except Exception as e:
+        print(f"[fsd_tools] LDA 모델 저장 실패: {e}")
+
+
+def _extend_vocab(bundle: Dict[str, Any], texts: List[str]) -> None:
+    """
+    새 문서에서 2번 이상 나온 새 단어를 어휘에 추가하고,
+    LDA 의 topic-word 행렬도 prior 값으로 열을 늘려서 partial_fit 을 이어갈 수 있게 함.
+    scikit-learn 내부 속성을 고치므로 LDA_EXTEND_VOCAB 이 꺼져 있거나 고칠 속성이 없으면 아무것도 안 함.
+    bundle 은 학습용 복사본이어야 함 (실패하면 호출 측이 원본에서 다시 시작).
+    """
+    room = LDA_VOCAB_MAX - len(bundle["vocab"])
+    if room <= 0 or not LDA_EXTEND_VOCAB or not all(hasattr(bundle["lda"], a) for a in _LDA_INTERNALS):
+        return
+    probe = CountVectorizer(max_df=0.95, min_df=2, stop_words="english")
+    try:
+        counts = probe.fit_transform(texts)
+    except ValueError:  # 새 문서에 쓸 만한 단어가 없음
+        return
+    known = set(bundle["vocab"])
+    df_counts = np.asarray((counts > 0).sum(axis=0)).ravel()
+    new_terms = [
+        (df_counts[i], term)
+        for term, i in probe.vocabulary_.items()
+        if term not in known
+    ]
+    if not new_terms:
+        return
+    new_terms.sort(key=lambda x: (-x[0], x[1]))
+    added = [term for _, term in new_terms[:room]]
+
+    lda = bundle["lda"]
+    prior = lda.topic_word_prior_
+    lda.components_ = np.hstack([lda.components_, np.full((lda.components_.shape[0], len(added)), prior)])
+    # partial_fit 이 쓰는 exp(E[log beta]) 도 새 크기로 다시 계산
+    from scipy.special import psi
+
+    comp = lda.components_
+    lda.exp_dirichlet_component_ = np.exp(psi(comp) - psi(comp.sum(axis=1))[:, np.newaxis])
+    lda.n_features_in_ = comp.shape[1]
+    bundle["vocab"] = bundle["vocab"] + added
+
+
+def _topics_from_model(
+    lda: LatentDirichletAllocation,
+    feature_names: List[str],
+    X: Any,
+    n_words: int,
+) -> List[Dict[str, Any]]:
+    """토픽별 상위 단어. 현재 문서들에서 비중이 큰 토픽부터 (topic_id 는 모델 기준 번호)."""
+    weights = lda.transform(X).sum(axis=0) if X.shape[0] else np.zeros(len(lda.components_))
+    topics: List[Dict[str, Any]] = []
+    for topic_idx in np.argsort(-weights, kind="stable"):
+        topic = lda.components_[topic_idx]
+        top_indices = topic.argsort()[:-n_words - 1:-1]
+        topics.append(
+            {
+                "topic_id": int(topic_idx),
+                "keywords": [feature_names[i] for i in top_indices],
+            }
+        )
+    return topics
+
+
+def _partial_fit_copy(base: Dict[str, Any], fresh: List[str], extend_vocab: bool) -> Dict[str, Any]:
+    """base 를 복사해서 fresh 문서로 partial_fit 한 번들 (base 는 건드리지 않음)."""
+    bundle = {**base, "lda": copy.deepcopy(base["lda"]), "vocab": list(base["vocab"])}
+    if extend_vocab:
+        _extend_vocab(bundle, fresh)
+    X_new = CountVectorizer(vocabulary=bundle["vocab"], stop_words="english").transform(fresh)
+    bundle["lda"].partial_fit(X_new)
+    return bundle
+
+
+def _fit_lda_online(
+    texts: List[str],
+    n_topics: int,
+    n_words: int,
+    train_texts: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    저장된 어휘 + 온라인 LDA 로 토픽 추출.
+    - 모델이 없으면 train_texts 로 전체 fit 후 저장
+    - 있으면 train_texts 중 처음 보는 문서만 partial_fit (어휘도 필요하면 확장) 후 저장
+    - train_texts 기본값은 texts (더미 등 모델에 남기면 안 되는 문서는 호출 측에서 빼고 넘김)
+    - 학습은 번들 복사본으로 하고 _lda_lock 은 조회/교체에만 잡음 → 여러 요청의 LDA 가 병렬로 돎
+      (그 사이 다른 요청이 먼저 갱신했으면 그쪽을 유지, 이번 문서는 다음 요청에서 다시 학습됨)
+    """
+    train = texts if train_texts is None else train_texts
+    with _lda_lock:
+        base = _load_lda_model(n_topics)
+
+    if base is None:
+        if not train:
+            return _fit_lda_batch(texts, n_topics, n_words)
+        vectorizer = CountVectorizer(max_df=0.95, min_df=2, stop_words="english")
+        X = vectorizer.fit_transform(train)
+        lda = LatentDirichletAllocation(
+            n_components=n_topics,
+            learning_method="online",
+            random_state=42,
+        )
+        lda.fit(X)
+        bundle = {
+            "vocab": list(vectorizer.get_feature_names_out()),
+            "lda": lda,
+            "seen": [_text_hash(t) for t in train],
+            "n_docs": len(train),
+            "sklearn": sklearn.__version__,
+        }
+        changed = True
+        tracing.annotate(lda_path="full_fit", new_docs=len(train))
+    else:
+        seen = set(base["seen"])
+        fresh = [t for t in train if _text_hash(t) not in seen]
+        bundle = base
+        if fresh:
+            try:
+                bundle = _partial_fit_copy(base, fresh, extend_vocab=True)
+            except Exception as e:
+                # 어휘 확장 후의 내부 상태를 이 scikit-learn 이 받아들이지 않음 → 확장 없이
+                print(f"[fsd_tools] 어휘 확장 후 partial_fit 실패, 기존 어휘로만 학습: {e}")
+                bundle = _partial_fit_copy(base, fresh, extend_vocab=False)
+            bundle["seen"] = (base["seen"] + [_text_hash(t) for t in fresh])[-LDA_SEEN_MAX:]
+            bundle["n_docs"] = base["n_docs"] + len(fresh)
+        changed = bool(fresh)
+        tracing.annotate(lda_path="partial_fit" if fresh else "reuse", new_docs=len(fresh))
+
+    vectorizer = CountVectorizer(vocabulary=bundle["vocab"], stop_words="english")
+    X = vectorizer.transform(texts)
+    topics = _topics_from_model(bundle["lda"], bundle["vocab"], X, n_words)
+
+    if changed:
+        with _lda_lock:
+            # 시작할 때 본 모델이 아직 최신일 때만 교체 (동시에 갱신한 다른 요청의 결과를 덮지 않음)
+            publish = _lda_models.get(n_topics) is base
+            if publish:
+                _lda_models[n_topics] = bundle
+        if publish:
+            with _lda_save_lock:
+                if _lda_models.get(n_topics) is bundle:
+                    _save_lda_model(n_topics, bundle)
+    return topics
+
+
+def _fit_lda_batch(texts: List[str], n_topics: int, n_words: int) -> List[Dict[str, Any]]:
+    """예전 방식: 매번 새 어휘 + batch LDA 로 처음부터 학습."""
     vectorizer = CountVectorizer(
         max_df=0.95,
         min_df=2,
@@ -267,29 +1008,277 @@ def run_lda_topics(df: pd.DataFrame, n_topics: int = 3, n_words: int = 6) -> Lis
     return topics
 
 
-# ----- 5. 상위 함수: 하나의 "툴"로 사용할 진입점 -----
+def run_lda_topics(df: pd.DataFrame, n_topics: int = 3, n_words: int = 6) -> List[Dict[str, Any]]:
+    """
+    크롤링된 전체 텍스트에 대해 LDA를 돌려,
+    각 토픽별 상위 키워드 리스트를 리턴.
+
+    - 같은 문서 집합이면 디스크 캐시(lda_topics.sqlite3)의 토픽을 그대로 반환
+    - LDA_ONLINE 이면 저장된 온라인 모델을 새 문서로만 갱신 (LDA_ONLINE=False 면 예전처럼 매번 학습)
+      post_id 가 없는 row(검색 실패 시 더미)는 토픽 계산에는 쓰되 저장 모델 학습에는 안 씀
+    """
+    if df.empty:
+        return []
+
+    # 여러 키워드에 중복된 글이 토픽을 과대 대표하지 않도록 글 하나당 한 문서로
+    docs = df.loc[~_post_keys(df).duplicated()]
+    texts = docs["text"].astype(str).tolist()
+    if "post_id" in docs.columns:
+        real = docs["post_id"].fillna("").astype(str) != ""
+        train_texts = docs.loc[real, "text"].astype(str).tolist()
+    else:
+        train_texts = []
+
+    key = json.dumps([_lda_fingerprint(texts), n_topics, n_words, "online" if LDA_ONLINE else "batch"])
+    entry = _lda_cache.get(key)
+    if entry is not None:
+        tracing.count_cache("lda", "hit")
+        tracing.annotate(cache="hit")
+        return entry.value
+    tracing.count_cache("lda", "miss")
+    tracing.annotate(cache="miss")
+
+    if LDA_ONLINE:
+        topics = _fit_lda_online(texts, n_topics, n_words, train_texts=train_texts)
+    else:
+        topics = _fit_lda_batch(texts, n_topics, n_words)
+    _lda_cache.set(key, topics)
+    return topics
+
+
+def lda_cache_stats() -> Dict[str, Any]:
+    stats = _lda_cache.stats()
+    with _lda_lock:
+        stats["models"] = {
+            k: {"vocab": len(b["vocab"]), "n_docs": b["n_docs"]} for k, b in _lda_models.items()
+        }
+    return stats
+
+
+# ----- 5. 로컬 코퍼스 저장 -----
+
+_corpus = CorpusStore(DATA_DIR / "corpus.sqlite3")
+
+
+def save_to_corpus(df: pd.DataFrame, posts_mask: Optional[pd.Series] = None) -> int:
+    """
+    채점까지 끝난 크롤링 결과를 코퍼스에 upsert (+ 글 ↔ 키워드 매핑 + 키워드별 감성 집계).
+    - posts_mask 가 있으면 그 row 의 글만 upsert (코퍼스에서 읽어 온 글은 다시 쓰지 않음)
+    - 키워드 집계(record_scores)는 이미 반영된 (글, 키워드) 를 건너뛰므로 전체를 넘겨도 됨
+    post_id 가 없는 row(더미 등)는 건너뜀. 실패해도 분석 결과에는 영향 없음.
+    """
+    if not CORPUS_WRITE or df.empty or "post_id" not in df.columns:
+        return 0
+    cols = [c for c in ("post_id", "url", "title", "content", "created_utc", "sentiment_score") if c in df.columns]
+    try:
+        with tracing.span("corpus_write", rows=len(df)):
+            posts = df[cols] if posts_mask is None else df.loc[posts_mask.values, cols]
+            n = _corpus.upsert(posts.drop_duplicates("post_id").to_dict("records"))
+            _corpus.add_keywords(zip(df["post_id"], df["keyword"]))
+            if "sentiment_score" in df.columns:
+                created = df["created_utc"] if "created_utc" in df.columns else pd.Series(None, index=df.index)
+                _corpus.record_scores(zip(df["post_id"], df["keyword"], df["sentiment_score"], created))
+        return n
+    except Exception as e:
+        print(f"[fsd_tools] 코퍼스 저장 실패: {e}")
+        return 0
+
+
+# ----- 5-1. 코퍼스 모드: 미리 쌓아 둔 글로 답하기 -----
+
+_CORPUS_COLUMNS = ["url", "title", "content", "created_utc", "sentiment_score"]
+
+
+def corpus_posts(keywords: List[str], max_posts: int = 40) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    키워드별로 코퍼스에서 최근 1년 글을 골라 crawl_posts_sync 와 같은 모양의 DataFrame 으로.
+    - 후보: 그 키워드로 수집된 글(post_keywords) + 제목/본문 FTS 매칭
+    - 최신순 max_posts 개
+    반환: (DataFrame, 매칭 글이 CORPUS_MIN_DOCS 미만이라 실시간 크롤링이 필요한 키워드)
+    """
+    since = time.time() - CORPUS_WINDOW
+    rows: List[Dict[str, Any]] = []
+    missing: List[str] = []
+    for kw in keywords:
+        ids = list(dict.fromkeys(_corpus.keyword_post_ids(kw) + _corpus.search(kw, limit=max_posts * 5)))
+        found = list(_corpus.iter_rows(_CORPUS_COLUMNS, post_ids=ids, since_utc=since))
+        if len(found) < CORPUS_MIN_DOCS:
+            missing.append(kw)
+            continue
+        found.sort(key=lambda r: r.get("created_utc") or 0.0, reverse=True)
+        rows.extend({"keyword": kw, **r} for r in found[:max_posts])
+
+    df = pd.DataFrame(rows, columns=["keyword", "post_id"] + _CORPUS_COLUMNS)
+    for col in ("title", "content", "url"):
+        df[col] = df[col].fillna("")
+    df["text"] = (df["title"] + " " + df["content"]).str.strip()
+    return df, missing
+
+
+_refresh_lock = threading.Lock()
+_refresh_stop = threading.Event()
+_refresh_thread: Optional[threading.Thread] = None
+_requested_keywords: "OrderedDict[str, float]" = OrderedDict()
+_refresh_runs = 0
+_refresh_last: Optional[float] = None
+
+
+def _remember_requested(keywords: List[str]) -> None:
+    """최근 요청된 키워드를 기억해 두고 백그라운드 갱신 대상에 포함."""
+    with _refresh_lock:
+        for kw in keywords:
+            _requested_keywords[kw] = time.time()
+            _requested_keywords.move_to_end(kw)
+        while len(_requested_keywords) > CORPUS_REFRESH_MAX_KEYWORDS:
+            _requested_keywords.popitem(last=False)
+
+
+def _refresh_keywords() -> List[str]:
+    with _refresh_lock:
+        recent = list(reversed(_requested_keywords))
+    # Reddit 검색은 영어 결과가 대부분이라 기본 대상은 영어 후보 키워드만
+    defaults = [k for k in CANDIDATE_KEYWORDS if k.isascii()]
+    return list(dict.fromkeys(recent + defaults))[:CORPUS_REFRESH_MAX_KEYWORDS]
+
+
+def refresh_corpus(keywords: Optional[List[str]] = None) -> int:
+    """
+    키워드별 새 글만 증분 크롤링 → 채점 → 코퍼스 upsert. 저장한 글 수 반환.
+    Reddit 요청은 reddit_client.background() 로 보냄 → 사용자 요청의 실시간 크롤링이 우선.
+    """
+    global _refresh_runs, _refresh_last
+    kws = keywords or _refresh_keywords()
+    with tracing.span("corpus_refresh", keywords=len(kws)) as sp:
+        with reddit_client.background():
+            df = crawl_new_posts(kws, max_workers=reddit_client.BACKGROUND_CONCURRENCY)
+        n = save_to_corpus(run_sentiment(df)) if not df.empty else 0
+        sp.set(rows=n)
+    with _refresh_lock:
+        _refresh_runs += 1
+        _refresh_last = time.time()
+    print(f"[fsd_tools] 코퍼스 갱신: 키워드 {len(kws)}개, 새 글 {n}개")
+    return n
+
+
+def start_corpus_refresher(interval: Optional[float] = None, delay: Optional[float] = None) -> bool:
+    """
+    백그라운드 스레드에서 delay 초 뒤부터 interval 초마다 refresh_corpus 실행 (이미 돌고 있으면 무시).
+    (서버 시작 직후 몰리는 요청과 겹치지 않도록 첫 갱신은 delay 만큼 미룸)
+    interval <= 0 이거나 코퍼스 모드가 꺼져 있으면 시작하지 않음.
+    """
+    global _refresh_thread
+    interval = CORPUS_REFRESH_INTERVAL if interval is None else interval
+    delay = CORPUS_REFRESH_DELAY if delay is None else delay
+    if interval <= 0 or CORPUS_MODE == "off":
+        return False
+
+    def _loop() -> None:
+        if _refresh_stop.wait(max(delay, 0.0)):
+            return
+        while not _refresh_stop.is_set():
+            try:
+                refresh_corpus()
+            except Exception as e:
+                print(f"[fsd_tools] 코퍼스 갱신 실패: {e}")
+            _refresh_stop.wait(interval)
+
+    with _refresh_lock:
+        if _refresh_thread is not None and _refresh_thread.is_alive():
+            return False
+        _refresh_stop.clear()
+        _refresh_thread = threading.Thread(target=_loop, name="fsd-corpus-refresh", daemon=True)
+        _refresh_thread.start()
+    return True
+
+
+def stop_corpus_refresher() -> None:
+    _refresh_stop.set()
+
+
+def corpus_stats() -> Dict[str, Any]:
+    stats = _corpus.stats()
+    with _refresh_lock:
+        stats["mode"] = CORPUS_MODE
+        stats["refresh_runs"] = _refresh_runs
+        stats["refresh_last_age_sec"] = (time.time() - _refresh_last) if _refresh_last else None
+        stats["refresh_running"] = _refresh_thread is not None and _refresh_thread.is_alive()
+    return stats
+
+
+# ----- 6. 상위 함수: 하나의 "툴"로 사용할 진입점 -----
 
 def analyze_market_sentiment(
     user_query: str,
     selected_keywords: List[str],
     max_posts: int = 40,
+    on_event: Optional[EventCallback] = None,
 ) -> Dict[str, Any]:
     """
     LangGraph 에이전트가 호출할 단일 엔트리 함수.
 
-    1) selected_keywords 로 Reddit 검색(JSON) 크롤링
+    1) selected_keywords 로 글 모으기
+       - 코퍼스 모드(auto): 코퍼스에서 먼저 찾고, 글이 부족한 키워드만 Reddit 검색(JSON) 크롤링
+       - off: 전부 실시간 크롤링
     2) 감성 분석(VADER)
     3) 키워드별 평균 점수 → 바 차트용 데이터 생성
     4) LDA 토픽 추출
+
+    on_event 를 넘기면 "crawl_progress" / "sentiment_chart" / "lda_topics" 이벤트를
+    각 단계가 끝나는 즉시 전달한다.
     """
-    # 1) 크롤링
-    df_raw = crawl_posts_sync(selected_keywords, max_posts=max_posts)
+    # 1) 코퍼스 조회 → 부족한 키워드만 크롤링
+    _remember_requested(selected_keywords)
+    live_keywords = list(selected_keywords)
+    frames: List[pd.DataFrame] = []
+    if CORPUS_MODE != "off":
+        try:
+            with tracing.span("corpus_lookup", keywords=len(selected_keywords)) as sp:
+                df_corpus, live_keywords = corpus_posts(selected_keywords, max_posts=max_posts)
+                sp.set(rows=len(df_corpus), live_keywords=len(live_keywords))
+            frames.append(df_corpus)
+        except Exception as e:
+            print(f"[fsd_tools] 코퍼스 조회 실패, 실시간 크롤링 사용: {e}")
+            live_keywords = list(selected_keywords)
 
-    # 2) 감성 분석
+    corpus_keywords = [kw for kw in selected_keywords if kw not in live_keywords]
+    total = len(selected_keywords)
+    if on_event is not None:
+        for i, kw in enumerate(corpus_keywords, 1):
+            n = int((frames[0]["keyword"] == kw).sum())
+            on_event("crawl_progress", {"keyword": kw, "posts": n, "done": i, "total": total, "source": "corpus"})
+
+    if live_keywords:
+        live_event: Optional[EventCallback] = None
+        if on_event is not None:
+            def live_event(name: str, payload: Dict[str, Any]) -> None:
+                on_event(name, {
+                    **payload,
+                    "done": payload["done"] + len(corpus_keywords),
+                    "total": total,
+                    "source": "live",
+                })
+        frames.append(crawl_posts_sync(live_keywords, max_posts=max_posts, on_event=live_event))
+
+    non_empty = [f for f in frames if not f.empty]
+    if non_empty:
+        df_raw = pd.concat(non_empty, ignore_index=True)
+    else:
+        # 키워드가 없거나 코퍼스/크롤링 모두 비어 있음 → 빈 결과
+        df_raw = pd.DataFrame(columns=["keyword", "post_id"] + _CORPUS_COLUMNS + ["text"])
+
+    # 2) 감성 분석 (코퍼스에서 이미 채점된 글은 건너뜀) → 새로 채점한 글은 코퍼스에 저장
+    if "sentiment_score" in df_raw.columns:
+        unsaved = pd.to_numeric(df_raw["sentiment_score"], errors="coerce").isna()
+    else:
+        unsaved = pd.Series(True, index=df_raw.index)
     df_scored = run_sentiment(df_raw)
+    save_to_corpus(df_scored, posts_mask=unsaved)
 
-    # 3) 키워드별 집계 (상위 5개)
-    topic_rows = aggregate_to_topics(df_scored)
+    # 3) 키워드별 집계 (상위 5개, 코퍼스의 최근 1년 집계 우선)
+    with tracing.span("aggregate", rows=len(df_scored)):
+        topic_rows = aggregate_keywords(
+            selected_keywords, df_scored, since_utc=time.time() - CORPUS_WINDOW
+        )
     sentiment_chart = [
         {
             "topic": r.topic,
@@ -298,12 +1287,32 @@ def analyze_market_sentiment(
         }
         for r in topic_rows
     ]
+    if on_event is not None:
+        on_event("sentiment_chart", {"sentiment_chart": sentiment_chart})
 
     # 4) LDA 토픽
-    lda_topics = run_lda_topics(df_scored, n_topics=3, n_words=6)
+    unique_count = int((~_post_keys(df_scored).duplicated()).sum()) if not df_scored.empty else 0
+    with tracing.span("lda", rows=unique_count):
+        lda_topics = run_lda_topics(df_scored, n_topics=3, n_words=6)
+    if on_event is not None:
+        on_event("lda_topics", {"lda_topics": lda_topics})
+
+    # 검색 실패/결과 없음으로 들어간 더미 row 는 post_id 가 없음
+    # → 모든 키워드가 실제 글을 가져왔는지 (응답 캐시 가능 여부) 판단용
+    if df_scored.empty or "post_id" not in df_scored.columns:
+        real = pd.Series(False, index=df_scored.index)
+    else:
+        real = df_scored["post_id"].fillna("").astype(str) != ""
+    real_keywords = set(df_scored.loc[real, "keyword"]) if real.any() else set()
+    dummy_keywords = [kw for kw in selected_keywords if kw not in real_keywords]
 
     return {
         "sentiment_chart": sentiment_chart,
         "lda_topics": lda_topics,
         "raw_count": int(len(df_scored)),
+        "real_count": int(real.sum()),
+        "dummy_keywords": dummy_keywords,
+        "unique_count": unique_count,
+        "corpus_keywords": corpus_keywords,
+        "live_keywords": live_keywords,
     }
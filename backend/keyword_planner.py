@@ -0,0 +1,156 @@
+# backend/keyword_planner.py
+"""
+LLM 없이 질문 → 검색 키워드를 고르는 빠른 planner
+
+- 후보 키워드(TESLA_KEYWORD_CANDIDATES)마다 한/영 별칭(alias)을 미리 정의
+- 별칭을 하나의 정규식으로 컴파일해 두고, 질문에서 매칭된 별칭에
+  IDF 가중치(여러 후보에 걸친 별칭일수록 낮음)를 줘서 후보별 점수 계산
+- 점수 합으로 confidence(0~1)를 만들고, 낮으면 호출 측(fsd_graph)이 LLM planner로 폴백
+
+Reddit 검색은 영어 결과가 대부분이라, 한국어 별칭도 영어 후보 키워드로 매핑한다.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+import math
+import re
+import threading
+import time
+
+
+# 후보 키워드 → 별칭 (소문자 기준)
+KEYWORD_ALIASES: Dict[str, List[str]] = {
+    "tesla": ["tesla", "tsla", "model 3", "model y", "model s", "model x", "cybertruck",
+              "테슬라", "모델3", "모델 3", "모델y", "모델 y", "사이버트럭"],
+    "musk": ["musk", "elon", "머스크", "일론"],
+    "fsd": ["fsd", "full self-driving", "full self driving", "완전자율주행", "완전 자율주행", "풀셀프"],
+    "autopilot": ["autopilot", "auto pilot", "오토파일럿", "오토 파일럿"],
+    "robotaxi": ["robotaxi", "robo-taxi", "robo taxi", "로보택시", "로봇택시", "로보 택시"],
+    "cybercab": ["cybercab", "cyber cab", "사이버캡"],
+    "self-driving": ["self-driving", "self driving", "셀프드라이빙", "셀프 드라이빙"],
+    "autonomous driving": ["autonomous", "autonomy", "자율주행", "자율 주행"],
+    "driverless": ["driverless", "unsupervised", "무인", "운전자 없는", "무인운전"],
+    "safety": ["safety", "safe", "unsafe", "안전", "안전성", "위험"],
+    "crash": ["crash", "crashes", "accident", "accidents", "fatal", "사고", "사망", "추돌"],
+    "collision": ["collision", "collide", "충돌"],
+    "recall": ["recall", "recalls", "리콜", "결함"],
+    "investigation": ["investigation", "investigate", "probe", "조사", "수사"],
+    "nhtsa": ["nhtsa", "도로교통안전국", "미국 교통당국"],
+    "dmv": ["dmv", "차량국"],
+    "cpuc": ["cpuc", "공공유틸리티위원회"],
+    "disengagement": ["disengagement", "disengage", "intervention", "개입", "해제"],
+    "permit": ["permit", "license", "approval", "허가", "인허가", "승인", "면허"],
+    "ride-hailing": ["ride-hailing", "ride hailing", "ridehail", "uber", "lyft", "차량호출", "호출 서비스"],
+    "캘리포니아": ["california", "캘리포니아", "san francisco", "샌프란시스코"],
+}
+
+# 매칭이 부족할 때 채워 넣는 기본 키워드 (3개 미만이면 순서대로 추가)
+DEFAULT_FILL_KEYWORDS = ["tesla", "fsd", "safety"]
+
+MIN_KEYWORDS = 3
+MAX_KEYWORDS = 5
+
+# confidence = min(1, 점수 합 / CONFIDENCE_TARGET)
+# 서로 다른 후보에 걸리지 않는 별칭 하나가 1.0점 → 별칭 2개 이상 매칭되면 confidence 1.0
+CONFIDENCE_TARGET = 2.0
+
+
+def _is_ascii(s: str) -> bool:
+    return all(ord(ch) < 128 for ch in s)
+
+
+@dataclass
+class KeywordPlan:
+    keywords: List[str]
+    confidence: float
+    scores: Dict[str, float] = field(default_factory=dict)
+    matched_aliases: List[str] = field(default_factory=list)
+    elapsed_us: float = 0.0
+
+
+class KeywordIndex:
+    """별칭 → 후보 역색인 + IDF 가중치 (생성 시 한 번만 계산)."""
+
+    def __init__(self, aliases: Dict[str, List[str]]):
+        self.candidates = list(aliases)
+
+        alias_to_candidates: Dict[str, List[str]] = {}
+        for cand, names in aliases.items():
+            for name in names:
+                alias_to_candidates.setdefault(name.lower(), []).append(cand)
+        self.alias_to_candidates = alias_to_candidates
+
+        # IDF: 여러 후보에 걸친 별칭일수록 가중치가 낮음, 최대 1.0 으로 정규화
+        n = len(self.candidates)
+        max_idf = math.log(1 + n)
+        self.alias_weight: Dict[str, float] = {
+            a: math.log(1 + n / len(cands)) / max_idf for a, cands in alias_to_candidates.items()
+        }
+
+        # 긴 별칭부터 매칭되도록 정렬해 하나의 정규식으로 컴파일
+        # - 영어 별칭: 단어 경계 기준 ("safe" 가 "safety" 안에서 중복 매칭되지 않게)
+        # - 한국어 별칭: 조사가 붙으므로 부분 문자열 매칭
+        parts: List[str] = []
+        for a in sorted(alias_to_candidates, key=len, reverse=True):
+            esc = re.escape(a)
+            parts.append(rf"(?<![a-z0-9]){esc}(?![a-z0-9])" if _is_ascii(a) else esc)
+        self._pattern = re.compile("|".join(parts))
+
+    def score(self, question: str) -> Tuple[Dict[str, float], List[str]]:
+        scores: Dict[str, float] = {}
+        matched: List[str] = []
+        for m in self._pattern.finditer(question.lower()):
+            alias = m.group(0)
+            matched.append(alias)
+            w = self.alias_weight[alias]
+            for cand in self.alias_to_candidates[alias]:
+                scores[cand] = scores.get(cand, 0.0) + w
+        return scores, matched
+
+
+_index = KeywordIndex(KEYWORD_ALIASES)
+
+
+def plan_keywords(question: str) -> KeywordPlan:
+    """
+    질문 → 3~5개 후보 키워드 + confidence.
+    점수 높은 순으로 고르고, 3개가 안 되면 DEFAULT_FILL_KEYWORDS로 채움.
+    """
+    t0 = time.perf_counter()
+    scores, matched = _index.score(question or "")
+
+    ranked = sorted(scores, key=lambda c: (-scores[c], _index.candidates.index(c)))
+    keywords = ranked[:MAX_KEYWORDS]
+    for kw in DEFAULT_FILL_KEYWORDS:
+        if len(keywords) >= MIN_KEYWORDS:
+            break
+        if kw not in keywords:
+            keywords.append(kw)
+
+    confidence = min(1.0, sum(scores.values()) / CONFIDENCE_TARGET)
+    elapsed_us = (time.perf_counter() - t0) * 1e6
+    return KeywordPlan(
+        keywords=keywords,
+        confidence=confidence,
+        scores=scores,
+        matched_aliases=matched,
+        elapsed_us=elapsed_us,
+    )
+
+
+# ----- planner 경로 통계 (fast / llm / llm_fallback) -----
+
+_stats_lock = threading.Lock()
+_path_counts: Dict[str, int] = {}
+
+
+def record_planner_path(path: str) -> None:
+    with _stats_lock:
+        _path_counts[path] = _path_counts.get(path, 0) + 1
+
+
+def planner_stats() -> Dict[str, int]:
+    with _stats_lock:
+        return dict(_path_counts)
@@ -0,0 +1,221 @@
+# backend/kv_cache.py
+"""
+SQLite 기반의 작은 key-value 캐시 (디스크 영속)
+
+- 값은 JSON으로 직렬화해서 저장
+- ttl: 이 시간(초)이 지나면 "stale" 상태 (None이면 만료 없음)
+- stale_ttl: ttl 이후에도 이 시간 동안은 stale 값을 돌려줄 수 있음
+             (stale-while-revalidate 용, 호출 측에서 백그라운드 갱신)
+- max_entries: 초과 시 마지막 접근 시각(last_access)이 가장 오래된 것부터 삭제(LRU)
+- 여러 스레드에서 같이 써도 되도록 connection 하나 + lock 으로 보호
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import json
+import sqlite3
+import threading
+import time
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    age: float          # 저장된 뒤 지난 시간(초)
+    stale: bool         # ttl은 지났지만 stale_ttl 안쪽인 경우 True
+
+
+class SqliteCache:
+    def __init__(
+        self,
+        path: Path | str,
+        table: str = "cache",
+        ttl: Optional[float] = None,
+        stale_ttl: float = 0.0,
+        max_entries: Optional[int] = None,
+    ):
+        if not table.isidentifier():
+            raise ValueError(f"잘못된 테이블 이름: {table}")
+
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.table = table
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                key         TEXT PRIMARY KEY,
+                value       TEXT NOT NULL,
+                created_at  REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_last_access ON {table}(last_access)"
+        )
+        self._conn.commit()
+
+        # 튜닝용 통계 (프로세스 단위)
+        self._hits = 0
+        self._stale_hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evictions = 0
+        self._hit_age_sum = 0.0
+
+    # ----- 조회 -----
+
+    def _classify(self, created_at: float, now: float) -> Tuple[bool, bool]:
+        """(사용 가능 여부, stale 여부)"""
+        age = now - created_at
+        if self.ttl is None or age <= self.ttl:
+            return True, False
+        if age <= self.ttl + self.stale_ttl:
+            return True, True
+        return False, True
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, CacheEntry]:
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+
+        now = time.time()
+        found: Dict[str, CacheEntry] = {}
+
+        with self._lock:
+            rows: List[Tuple[str, str, float]] = []
+            # SQLite 파라미터 개수 제한(기본 999)을 피하려고 나눠서 조회
+            for i in range(0, len(keys), 500):
+                chunk = keys[i : i + 500]
+                marks = ",".join("?" * len(chunk))
+                rows.extend(
+                    self._conn.execute(
+                        f"SELECT key, value, created_at FROM {self.table} WHERE key IN ({marks})",
+                        chunk,
+                    ).fetchall()
+                )
+
+            touched: List[Tuple[float, str]] = []
+            for key, raw, created_at in rows:
+                usable, stale = self._classify(created_at, now)
+                if not usable:
+                    self._expired += 1
+                    continue
+                age = now - created_at
+                found[key] = CacheEntry(value=json.loads(raw), age=age, stale=stale)
+                touched.append((now, key))
+                if stale:
+                    self._stale_hits += 1
+                else:
+                    self._hits += 1
+                self._hit_age_sum += age
+
+            self._misses += len(keys) - len(found)
+
+            if touched:
+                self._conn.executemany(
+                    f"UPDATE {self.table} SET last_access = ? WHERE key = ?", touched
+                )
+                self._conn.commit()
+
+        return found
+
+    # ----- 저장 / 삭제 -----
+
+    def set(self, key: str, value: Any) -> None:
+        self.set_many([(key, value)])
+
+    def set_many(self, items: Iterable[Tuple[str, Any]]) -> None:
+        now = time.time()
+        payload = [(k, json.dumps(v, ensure_ascii=False), now, now) for k, v in items]
+        if not payload:
+            return
+
+        with self._lock:
+            self._conn.executemany(
+                f"""
+                INSERT INTO {self.table} (key, value, created_at, last_access)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    value = excluded.value,
+                    created_at = excluded.created_at,
+                    last_access = excluded.last_access
+                """,
+                payload,
+            )
+            self._evict_locked()
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+
+    def _evict_locked(self) -> None:
+        # 1) 완전히 만료된 것(ttl + stale_ttl 초과) 정리
+        if self.ttl is not None:
+            cutoff = time.time() - (self.ttl + self.stale_ttl)
+            cur = self._conn.execute(f"DELETE FROM {self.table} WHERE created_at < ?", (cutoff,))
+            self._evictions += max(cur.rowcount, 0)
+
+        # 2) 크기 제한 초과분은 LRU 순서로 삭제
+        if self.max_entries is None:
+            return
+        (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                f"""
+                DELETE FROM {self.table} WHERE key IN (
+                    SELECT key FROM {self.table} ORDER BY last_access ASC LIMIT ?
+                )
+                """,
+                (overflow,),
+            )
+            self._evictions += overflow
+
+    # ----- 통계 -----
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT COUNT(*), MIN(created_at), MAX(created_at) FROM {self.table}"
+            ).fetchone()
+            lookups = self._hits + self._stale_hits + self._misses
+            served = self._hits + self._stale_hits
+            now = time.time()
+            count, oldest, newest = row
+            return {
+                "entries": int(count or 0),
+                "hits": self._hits,
+                "stale_hits": self._stale_hits,
+                "misses": self._misses,
+                "expired": self._expired,
+                "evictions": self._evictions,
+                "hit_ratio": (served / lookups) if lookups else 0.0,
+                "avg_hit_age_sec": (self._hit_age_sum / served) if served else 0.0,
+                "oldest_age_sec": (now - oldest) if oldest else None,
+                "newest_age_sec": (now - newest) if newest else None,
+                "ttl": self.ttl,
+                "stale_ttl": self.stale_ttl,
+                "max_entries": self.max_entries,
+            }
@@ -0,0 +1,278 @@
+# backend/reddit_client.py
+"""
+Reddit 공용 HTTP 클라이언트 (fsd_tools / reddit_fetch_posts 공용)
+
+- 프로세스 전체에서 세션 하나 공유 → keep-alive 커넥션 풀 재사용 (매 요청 TCP+TLS 핸드셰이크 X)
+- httpx + h2 가 설치돼 있으면 HTTP/2, 아니면 requests.Session(HTTP/1.1 keep-alive)
+- gzip/deflate 응답 압축
+- 프로세스 전역 rate limiter 하나를 모든 호출자가 공유
+  · 동시 요청 수 제한 + 요청 시작 간 최소 간격
+  · 429/503 의 Retry-After → 그 시간 동안 모든 호출자 대기
+  · X-Ratelimit-Remaining / X-Ratelimit-Reset → 남은 quota 를 reset 까지 고르게 분배,
+    거의 바닥나면 reset 까지 전체 대기
+- with background(): 안의 요청(코퍼스 주기 갱신 등)은 낮은 우선순위
+  · 동시 슬롯 BACKGROUND_CONCURRENCY 개, 요청 간격 BACKGROUND_MIN_INTERVAL 이상
+  → 사용자 요청(/fsd-chat 실시간 크롤링)이 limiter 를 대부분 쓰도록
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+import importlib.util
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import httpx  # type: ignore
+except ImportError:  # httpx 없으면 requests 로 동작
+    httpx = None  # type: ignore
+
+HAS_HTTP2 = httpx is not None and importlib.util.find_spec("h2") is not None
+
+
+# ---------------------------
+# 기본값/설정
+# ---------------------------
+DEFAULT_UA = "fsd-research-bot/0.1 by secha-capstone"
+
+MAX_CONNECTIONS = 8          # 커넥션 풀 크기
+MAX_CONCURRENCY = 4          # reddit.com 동시 요청 수
+MIN_INTERVAL = 0.2           # 요청 시작 간 최소 간격(초)
+RATELIMIT_RESERVE = 5        # X-Ratelimit-Remaining 이 이 이하면 reset 까지 전체 대기
+DEFAULT_RETRY_AFTER = 5.0    # 429 인데 Retry-After 가 없을 때 기본 대기(초)
+BACKGROUND_CONCURRENCY = 1   # 백그라운드 요청이 동시에 쓸 수 있는 슬롯 수 (MAX_CONCURRENCY 중)
+BACKGROUND_MIN_INTERVAL = 2.0  # 백그라운드 요청 시작 간 최소 간격(초)
+
+
+def _to_float(v: Any) -> Optional[float]:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """
+    프로세스 전역 rate limiter.
+    with limiter: 로 감싼 구간이 곧 요청 1회. 응답을 받으면 update() 로 헤더를 반영.
+    """
+
+    def __init__(self, max_concurrency: int, min_interval: float, reserve: int = RATELIMIT_RESERVE):
+        self._sem = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self.min_interval = min_interval
+        self.reserve = reserve
+
+        self._interval = min_interval     # 현재 적용 중인 간격 (quota 에 따라 늘어남)
+        self._next_start = 0.0            # 다음 요청이 시작될 수 있는 시각(monotonic)
+        self._blocked_until = 0.0         # Retry-After / quota 소진으로 전체 대기 중인 시각
+
+        self.remaining: Optional[float] = None
+        self.reset_in: Optional[float] = None
+        self.total_wait = 0.0
+        self.throttled = 0
+
+    def __enter__(self) -> "RateLimiter":
+        self._sem.acquire()
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start, self._blocked_until)
+            self._next_start = start + self._interval
+            wait = start - now
+            self.total_wait += max(wait, 0.0)
+        if wait > 0:
+            time.sleep(wait)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._sem.release()
+
+    def block_for(self, seconds: float) -> None:
+        """지금부터 seconds 동안 모든 호출자가 새 요청을 시작하지 않도록 막음."""
+        with self._lock:
+            until = time.monotonic() + max(seconds, 0.0)
+            self._blocked_until = max(self._blocked_until, until)
+
+    def update(self, status: int, headers: Any) -> None:
+        """응답 상태/헤더로 전역 대기 시간과 간격을 조정."""
+        remaining = _to_float(headers.get("X-Ratelimit-Remaining"))
+        reset_in = _to_float(headers.get("X-Ratelimit-Reset"))
+        retry_after = _to_float(headers.get("Retry-After"))
+
+        if status in (429, 503):
+            with self._lock:
+                self.throttled += 1
+            wait = retry_after if retry_after is not None else DEFAULT_RETRY_AFTER
+            self.block_for(wait + random.uniform(0.1, 0.5))
+
+        if remaining is None or reset_in is None:
+            return
+
+        with self._lock:
+            self.remaining = remaining
+            self.reset_in = reset_in
+            usable = remaining - self.reserve
+            if usable <= 0:
+                # quota 거의 소진 → reset 까지 전체 대기, 간격은 원래대로
+                self._blocked_until = max(self._blocked_until, time.monotonic() + reset_in)
+                self._interval = self.min_interval
+            else:
+                # 남은 quota 를 reset 까지 고르게 나눠 씀
+                self._interval = max(self.min_interval, reset_in / usable)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "interval_sec": self._interval,
+                "blocked_for_sec": max(self._blocked_until - now, 0.0),
+                "ratelimit_remaining": self.remaining,
+                "ratelimit_reset_sec": self.reset_in,
+                "throttled": self.throttled,
+                "total_wait_sec": self.total_wait,
+            }
+
+
+limiter = RateLimiter(MAX_CONCURRENCY, MIN_INTERVAL)
+
+
+class BackgroundGate:
+    """
+    백그라운드 요청 전용 관문. 전역 limiter 에 들어가기 전에 통과.
+    동시 개수와 시작 간격을 따로 제한해서 백그라운드 작업이 limiter 의 작은 몫만 쓰게 함.
+    """
+
+    def __init__(self, concurrency: int, min_interval: float):
+        self._sem = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+        self.min_interval = min_interval
+        self._next_start = 0.0
+        self.requests = 0
+
+    def __enter__(self) -> "BackgroundGate":
+        self._sem.acquire()
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.min_interval
+            self.requests += 1
+        if start > now:
+            time.sleep(start - now)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._sem.release()
+
+
+_background_gate = BackgroundGate(BACKGROUND_CONCURRENCY, BACKGROUND_MIN_INTERVAL)
+_background: ContextVar[bool] = ContextVar("reddit_background", default=False)
+
+
+@contextmanager
+def background() -> Iterator[None]:
+    """
+    이 블록 안의 get() 을 낮은 우선순위로 보냄 (contextvar 라 tracing.bind 로 넘긴 스레드에도 적용).
+    """
+    token = _background.set(True)
+    try:
+        yield
+    finally:
+        _background.reset(token)
+
+
+# ---------------------------
+# 공유 세션
+# ---------------------------
+_client: Any = None
+_client_lock = threading.Lock()
+_request_count = 0
+
+
+def _make_client() -> Any:
+    headers = {
+        "User-Agent": DEFAULT_UA,
+        "Accept": "application/json",
+        "Accept-Encoding": "gzip, deflate",
+    }
+    if HAS_HTTP2:
+        return httpx.Client(
+            http2=True,
+            headers=headers,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_CONNECTIONS,
+            ),
+        )
+
+    sess = requests.Session()
+    sess.headers.update(headers)
+    # 상태 코드 재시도(429 등)는 여기서 안 함 → get() 이 전역 limiter 를 거쳐 처리
+    retry = Retry(total=3, connect=3, read=2, status=0, backoff_factor=0.5, allowed_methods=["GET"])
+    adapter = HTTPAdapter(
+        pool_connections=MAX_CONNECTIONS,
+        pool_maxsize=MAX_CONNECTIONS,
+        max_retries=retry,
+    )
+    sess.mount("https://", adapter)
+    sess.mount("http://", adapter)
+    return sess
+
+
+def get_client() -> Any:
+    """프로세스 공용 세션 (처음 호출 시 생성)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _make_client()
+    return _client
+
+
+def get(
+    url: str,
+    params: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 10,
+    max_retries: int = 2,
+) -> Any:
+    """
+    공용 세션 + 전역 limiter 로 GET.
+    429/503 이면 limiter 가 Retry-After 만큼 모두를 멈춘 뒤 max_retries 번까지 다시 시도.
+    반환값은 requests.Response 또는 httpx.Response (status_code / headers / json() / content 공통).
+    """
+    global _request_count
+    client = get_client()
+
+    attempt = 0
+    while True:
+        if _background.get():
+            with _background_gate, limiter:
+                resp = client.get(url, params=params, headers=headers, timeout=timeout)
+        else:
+            with limiter:
+                resp = client.get(url, params=params, headers=headers, timeout=timeout)
+        with _client_lock:
+            _request_count += 1
+        limiter.update(resp.status_code, resp.headers)
+
+        if resp.status_code in (429, 503) and attempt < max_retries:
+            attempt += 1
+            continue
+        return resp
+
+
+def client_stats() -> Dict[str, Any]:
+    stats = limiter.stats()
+    with _client_lock:
+        stats["requests"] = _request_count
+    stats["http2"] = HAS_HTTP2
+    stats["background_requests"] = _background_gate.requests
+    return stats
@@ -10,22 +10,30 @@ reddit_fetch_posts.py
   python reddit_fetch_posts.py --posts_file Tesla_posts.json --start 46 --end 151
   python reddit_fetch_posts.py --out_csv out.csv --out_json out.json
   python reddit_fetch_posts.py --ua "my-research-script by u/xxx"
+  python reddit_fetch_posts.py --async_mode --max_concurrency 4   # 병렬 수집(적응형 속도 제한)
+  python reddit_fetch_posts.py --resume                           # 중단된 실행 이어서(체크포인트 기준)
+  python reddit_fetch_posts.py --deep_comments --max_comments 3000  # "more" 댓글까지 펼쳐서 수집
+  python reddit_fetch_posts.py --no_corpus                       # 로컬 코퍼스(corpus_store)에 쓰지 않음
+
+- 게시물 하나를 받을 때마다 체크포인트(JSONL, 기본: <out_json 이름>.checkpoint.jsonl)에 바로 추가
+- 최종 JSON/CSV 는 체크포인트를 스트리밍으로 읽어서 입력 순서대로 작성
 """
 
 import os
 import re
 import sys
+import csv
 import time
 import json
 import random
+import asyncio
 import argparse
+from collections import deque
 from datetime import datetime
-from typing import List, Dict, Tuple, Optional
+from typing import Any, Callable, Iterable, Iterator, List, Dict, Set, Tuple, Optional, Union
 
-import requests
-import pandas as pd
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+import reddit_client
+from corpus_store import DEFAULT_PATH as DEFAULT_CORPUS_PATH, CorpusStore
 
 # ---------------------------
 # 기본값/설정
@@ -35,6 +43,11 @@ DEFAULT_UA = "tesla-research-script by u/your_username (contact: email@example.c
 
 ID_RE = re.compile(r"/comments/([a-z0-9]+)/", re.IGNORECASE)
 
+MORECHILDREN_URL = "https://www.reddit.com/api/morechildren.json"
+MORECHILDREN_BATCH = 100          # /api/morechildren 한 번에 넘길 수 있는 최대 id 수
+DEFAULT_MAX_COMMENTS = 2000       # deep 모드에서 게시물당 댓글 상한
+DEFAULT_COMMENTS_TIME_BUDGET = 30.0  # deep 모드에서 게시물당 "more" 펼치기 시간 예산(초)
+
 
 def log(msg: str) -> None:
     now = datetime.now().strftime("%H:%M:%S")
@@ -65,48 +78,174 @@ def extract_post_id(url: str) -> Optional[str]:
     return m.group(1) if m else None
 
 
-def flatten_comments(tree, out_list: List[str]) -> None:
-    """레딧 .json 댓글 트리를 평탄화해서 문자열 리스트(out_list)에 누적"""
-    if not isinstance(tree, (list, dict)):
-        return
-    if isinstance(tree, list):
-        for t in tree:
-            flatten_comments(t, out_list)
-        return
+class CommentRecord:
+    """댓글 한 개 (필요한 필드만, __slots__ 로 인스턴스 dict 없이)."""
 
-    kind = tree.get("kind")
-    data = tree.get("data", {})
-    if kind == "t1":  # comment
-        body = (data.get("body") or "").strip()
-        if body:
-            out_list.append(body)
-        replies = data.get("replies")
-        if isinstance(replies, dict):
-            flatten_comments(replies.get("data", {}).get("children", []), out_list)
-    elif kind in ("Listing", None):
-        for c in data.get("children", []):
-            flatten_comments(c, out_list)
-    # t3(post)/more 등은 여기선 스킵
+    __slots__ = ("id", "parent_id", "body", "score", "depth", "created_utc")
 
+    def __init__(self, id: str, parent_id: str, body: str, score: int, depth: int, created_utc: float):
+        self.id = id
+        self.parent_id = parent_id
+        self.body = body
+        self.score = score
+        self.depth = depth
+        self.created_utc = created_utc
 
-# ---------------------------
-# 세션/재시도 설정
-# ---------------------------
-def make_session(ua: str) -> requests.Session:
-    sess = requests.Session()
-    sess.headers.update({"User-Agent": ua, "Accept": "application/json"})
-    retry = Retry(
-        total=10,
-        backoff_factor=1.5,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=["GET"],
-        respect_retry_after_header=True,
-        raise_on_status=False,
-    )
-    adapter = HTTPAdapter(max_retries=retry)
-    sess.mount("https://", adapter)
-    sess.mount("http://", adapter)
-    return sess
+    @classmethod
+    def from_data(cls, data: Dict, depth: int) -> "CommentRecord":
+        return cls(
+            id=data.get("id") or "",
+            parent_id=data.get("parent_id") or "",
+            body=(data.get("body") or "").strip(),
+            score=int(data.get("score") or 0),
+            depth=int(data.get("depth", depth) or 0),
+            created_utc=float(data.get("created_utc") or 0.0),
+        )
+
+
+COMMENT_META_FIELDS = ("id", "parent_id", "score", "depth", "created_utc")
+
+
+def iter_comments(tree, more_ids: Optional[List[str]] = None) -> Iterator[CommentRecord]:
+    """
+    레딧 .json 댓글 트리를 재귀 없이(명시적 스택) 전위 순회하며 CommentRecord 를 하나씩 yield.
+    - 답글 체인이 아주 깊어도 recursion limit 에 걸리지 않음
+    - 본문이 빈 댓글(삭제 등)은 건너뜀, 답글은 계속 탐색
+    - more_ids 를 주면 kind == "more" 스텁의 댓글 id 들을 모아 둠 (deep 모드용)
+    """
+    stack: List[Tuple[Any, int]] = [(tree, 0)]
+    while stack:
+        node, depth = stack.pop()
+        if isinstance(node, list):
+            # 원래 순서대로 꺼내지도록 뒤에서부터 push
+            stack.extend((c, depth) for c in reversed(node))
+            continue
+        if not isinstance(node, dict):
+            continue
+
+        kind = node.get("kind")
+        data = node.get("data", {}) or {}
+        if kind == "t1":  # comment
+            rec = CommentRecord.from_data(data, depth)
+            if rec.body:
+                yield rec
+            replies = data.get("replies")
+            if isinstance(replies, dict):
+                children = replies.get("data", {}).get("children", []) or []
+                stack.extend((c, rec.depth + 1) for c in reversed(children))
+        elif kind in ("Listing", None):
+            children = data.get("children", []) or []
+            stack.extend((c, depth) for c in reversed(children))
+        elif kind == "more" and more_ids is not None:
+            more_ids.extend(data.get("children", []) or [])
+        # t3(post) 등은 여기선 스킵
+
+
+def flatten_comments(tree, out_list: List[str], more_ids: Optional[List[str]] = None) -> None:
+    """레딧 .json 댓글 트리를 평탄화해서 본문 문자열만 out_list 에 누적 (예전 인터페이스)."""
+    out_list.extend(rec.body for rec in iter_comments(tree, more_ids))
+
+
+class CommentColumns:
+    """
+    댓글을 순회하는 대로 필드별 배열에 바로 추가 (CommentRecord 리스트를 따로 들고 있지 않음).
+    bodies 는 예전 comments 리스트, meta 는 같은 순서의 comment_meta 컬럼 배열.
+    """
+
+    __slots__ = ("bodies", "meta")
+
+    def __init__(self) -> None:
+        self.bodies: List[str] = []
+        self.meta: Dict[str, List[Any]] = {f: [] for f in COMMENT_META_FIELDS}
+
+    def __len__(self) -> int:
+        return len(self.bodies)
+
+    def append(self, rec: CommentRecord) -> None:
+        self.bodies.append(rec.body)
+        for f in COMMENT_META_FIELDS:
+            self.meta[f].append(getattr(rec, f))
+
+    def extend(self, records: Iterable[CommentRecord], limit: Optional[int] = None) -> None:
+        """limit 를 주면 전체 개수가 limit 에 닿는 순간 순회를 멈춤."""
+        for rec in records:
+            if limit is not None and len(self.bodies) >= limit:
+                return
+            self.append(rec)
+
+
+def parse_post_columns(
+    data, more_ids: Optional[List[str]] = None, limit: Optional[int] = None
+) -> Tuple[str, CommentColumns]:
+    """comments/<id>.json 응답 → (content, CommentColumns). more_ids 에는 "more" 스텁 id 누적."""
+    # data[0] = post, data[1] = comments
+    post_blob = data[0]["data"]["children"][0]["data"]
+    content = (post_blob.get("selftext") or "").strip()
+    comments = CommentColumns()
+    comments.extend(iter_comments(data[1]["data"]["children"], more_ids), limit)
+    return content, comments
+
+
+def expand_more_comments(
+    pid: str,
+    more_ids: List[str],
+    ua: str,
+    out: CommentColumns,
+    limit: int,
+    deadline: float,
+) -> None:
+    """
+    "more" 스텁 id 들을 /api/morechildren 로 최대 100개씩 묶어서 펼쳐 out 에 바로 추가.
+    - 응답 안의 새 "more" 스텁도 큐에 넣어 계속 펼침
+    - out 이 limit(게시물당 댓글 상한)개가 되거나 deadline(time.monotonic 기준)에 닿으면 중단
+    - 요청은 reddit_client 전역 rate limiter 를 거침
+    """
+    queue = deque(i for i in more_ids if i and i != "_")
+
+    while queue and len(out) < limit and time.monotonic() < deadline:
+        batch = [queue.popleft() for _ in range(min(MORECHILDREN_BATCH, len(queue)))]
+        params = {
+            "api_type": "json",
+            "link_id": f"t3_{pid}",
+            "children": ",".join(batch),
+            "limit_children": "false",
+            "raw_json": 1,
+        }
+        r = reddit_client.get(MORECHILDREN_URL, params=params, headers={"User-Agent": ua}, timeout=20)
+        if r.status_code != 200:
+            log(f"  ⚠️ morechildren HTTP {r.status_code} → 남은 {len(queue) + len(batch)}개 id 포기")
+            break
+
+        things = r.json().get("json", {}).get("data", {}).get("things", []) or []
+        for th in things:
+            kind = th.get("kind")
+            d = th.get("data", {}) or {}
+            if kind == "t1":
+                rec = CommentRecord.from_data(d, 0)
+                if rec.body and len(out) < limit:
+                    out.append(rec)
+            elif kind == "more":
+                queue.extend(i for i in (d.get("children") or []) if i and i != "_")
+
+    if queue and time.monotonic() >= deadline:
+        log(f"  ⏱ 댓글 펼치기 시간 예산 초과 → {len(queue)}개 id 남기고 중단")
+
+
+def collect_post(
+    pid: str,
+    data,
+    ua: str,
+    deep_comments: bool = False,
+    max_comments: int = DEFAULT_MAX_COMMENTS,
+    time_budget: float = DEFAULT_COMMENTS_TIME_BUDGET,
+) -> Tuple[str, CommentColumns]:
+    """파싱 + (deep 모드면) more 스텁 펼치기 + 게시물당 댓글 상한 적용."""
+    more_ids: Optional[List[str]] = [] if deep_comments else None
+    content, comments = parse_post_columns(data, more_ids, max_comments if deep_comments else None)
+    if more_ids and len(comments) < max_comments:
+        deadline = time.monotonic() + time_budget
+        expand_more_comments(pid, more_ids, ua, comments, max_comments, deadline)
+    return content, comments
 
 
 def fetch_post_via_json(
@@ -114,45 +253,41 @@ def fetch_post_via_json(
     ua: str,
     max_retries: int = 6,
     cooldown: float = 2.0,
-) -> Tuple[str, List[str]]:
+    deep_comments: bool = False,
+    max_comments: int = DEFAULT_MAX_COMMENTS,
+    time_budget: float = DEFAULT_COMMENTS_TIME_BUDGET,
+) -> Tuple[str, CommentColumns]:
     """
     reddit.com/comments/<id>.json 으로 본문(selftext)과 댓글을 가져온다.
-    반환: (content, comments)
+    deep_comments=True 면 "more" 스텁을 /api/morechildren 로 펼쳐서
+    max_comments / time_budget 안에서 댓글을 더 모은다.
+    반환: (content, CommentColumns)
     """
     pid = extract_post_id(post_url)
     if not pid:
         raise ValueError("URL에서 post id를 찾지 못함: " + post_url)
 
     api = f"https://www.reddit.com/comments/{pid}.json"
-    sess = make_session(ua)
+    headers = {"User-Agent": ua}
     last_err = None
 
     for attempt in range(1, max_retries + 1):
         try:
-            r = sess.get(api, timeout=20)
+            # 공용 세션(keep-alive 커넥션 재사용) + 프로세스 전역 rate limiter
+            # 429/503 의 Retry-After 는 limiter 가 모든 요청에 반영하므로 여기선 재시도만 결정
+            r = reddit_client.get(api, headers=headers, timeout=20, max_retries=0)
             if r.status_code == 200:
-                data = r.json()
-                # data[0] = post, data[1] = comments
-                post_blob = data[0]["data"]["children"][0]["data"]
-                content = (post_blob.get("selftext") or "").strip()
-
-                comments_tree = data[1]["data"]["children"]
-                comments: List[str] = []
-                flatten_comments(comments_tree, comments)
-                return content, comments
+                return collect_post(pid, r.json(), ua, deep_comments, max_comments, time_budget)
 
             if r.status_code == 429:
-                retry_after = r.headers.get("Retry-After")
-                if retry_after:
-                    try:
-                        wait = float(retry_after)
-                    except ValueError:
-                        wait = cooldown * (2 ** (attempt - 1))
-                else:
-                    wait = cooldown * (2 ** (attempt - 1))
-                wait += random.uniform(0.3, 1.1)  # 지터
+                if r.headers.get("Retry-After"):
+                    # Retry-After 만큼은 limiter 가 이미 전체 대기를 걸어둠
+                    log(f"  ⏳ 429 응답. Retry-After={r.headers.get('Retry-After')}s 후 재시도({attempt}/{max_retries})")
+                    last_err = "HTTP 429(Retry-After)"
+                    continue
+                wait = cooldown * (2 ** (attempt - 1)) + random.uniform(0.3, 1.1)  # 지터
+                reddit_client.limiter.block_for(wait)
                 log(f"  ⏳ 429 응답. {wait:.1f}s 대기 후 재시도({attempt}/{max_retries})")
-                time.sleep(wait)
                 last_err = f"HTTP 429(backoff {wait:.1f}s)"
                 continue
 
@@ -176,6 +311,300 @@ def fetch_post_via_json(
     raise RuntimeError(f".json 요청 실패: {post_url} (마지막 오류: {last_err})")
 
 
+# ---------------------------
+# 비동기 병렬 수집 (적응형 token bucket)
+# ---------------------------
+class AdaptiveTokenBucket:
+    """
+    AIMD 방식 token bucket.
+    - 처음엔 안전한 속도(rate req/s, concurrency)로 시작
+    - 200 응답이 이어지면 rate 를 조금씩 올리고, 일정 횟수마다 동시 요청 수도 +1
+    - 429/403/503 이 오면 rate·동시 요청 수를 즉시 절반으로
+    (실제 요청은 reddit_client 전역 limiter 도 거치므로 Retry-After 는 그쪽에서 지켜짐)
+    """
+
+    def __init__(
+        self,
+        rate: float = 0.5,
+        max_rate: float = 5.0,
+        min_rate: float = 0.1,
+        concurrency: int = 2,
+        max_concurrency: int = 8,
+        increase: float = 0.1,
+        grow_every: int = 5,
+    ):
+        self.rate = rate
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.concurrency = concurrency
+        self.max_concurrency = max_concurrency
+        self.increase = increase
+        self.grow_every = grow_every
+
+        self._tokens = 1.0
+        self._last = time.monotonic()
+        self._inflight = 0
+        self._streak = 0
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(1.0, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    async def acquire(self) -> None:
+        while True:
+            async with self._lock:
+                self._refill()
+                if self._tokens >= 1.0 and self._inflight < self.concurrency:
+                    self._tokens -= 1.0
+                    self._inflight += 1
+                    return
+                wait = max((1.0 - self._tokens) / self.rate, 0.05)
+            await asyncio.sleep(wait)
+
+    def release(self, status: Optional[int]) -> None:
+        self._inflight -= 1
+        if status == 200:
+            self._streak += 1
+            self.rate = min(self.max_rate, self.rate + self.increase)
+            if self._streak % self.grow_every == 0:
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+        elif status in (429, 403, 503):
+            self._streak = 0
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.concurrency = max(1, self.concurrency // 2)
+            log(f"  ↘ {status} 응답 → 속도 {self.rate:.2f} req/s, 동시 {self.concurrency}개로 감속")
+
+
+def _fetch_post_once(
+    post_url: str,
+    ua: str,
+    deep_comments: bool = False,
+    max_comments: int = DEFAULT_MAX_COMMENTS,
+    time_budget: float = DEFAULT_COMMENTS_TIME_BUDGET,
+) -> Tuple[int, Optional[Tuple[str, CommentColumns]]]:
+    """재시도 없이 한 번만 요청 → (status, (content, comments) 또는 None)"""
+    pid = extract_post_id(post_url)
+    if not pid:
+        raise ValueError("URL에서 post id를 찾지 못함: " + post_url)
+    api = f"https://www.reddit.com/comments/{pid}.json"
+    r = reddit_client.get(api, headers={"User-Agent": ua}, timeout=20, max_retries=0)
+    if r.status_code != 200:
+        return r.status_code, None
+    return 200, collect_post(pid, r.json(), ua, deep_comments, max_comments, time_budget)
+
+
+def make_result(idx, title: str, url: str, content: str, comments: CommentColumns) -> Dict:
+    """
+    comments 는 예전처럼 본문 문자열 리스트, comment_meta 는 같은 순서의 컬럼 배열
+    (id / parent_id / score / depth / created_utc) → 점수·깊이 가중치를 재수집 없이 계산 가능
+    """
+    return dict(
+        index=idx,
+        post_id=extract_post_id(url),
+        title=title,
+        url=url,
+        content=content,
+        comments=comments.bodies,
+        num_comments=len(comments),
+        comment_meta=comments.meta,
+        crawled_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    )
+
+
+async def fetch_posts_async(
+    target: List[Dict],
+    start: int,
+    ua: str,
+    max_retries: int = 6,
+    bucket: Optional[AdaptiveTokenBucket] = None,
+    on_result: Optional[Callable[[Dict], None]] = None,
+    deep_comments: bool = False,
+    max_comments: int = DEFAULT_MAX_COMMENTS,
+    time_budget: float = DEFAULT_COMMENTS_TIME_BUDGET,
+) -> List[Union[Dict, bool, None]]:
+    """
+    target 게시물들을 bucket 이 허용하는 만큼 병렬로 수집.
+    반환 리스트는 입력 순서 그대로 (실패한 항목은 None).
+    on_result 를 주면 결과를 받는 즉시 넘기고(체크포인트 기록용), 리스트에는 보관하지 않고 True.
+    """
+    bucket = bucket or AdaptiveTokenBucket()
+    total = len(target)
+    done = 0
+
+    async def one(i: int, post: Dict) -> Union[Dict, bool, None]:
+        nonlocal done
+        idx = post.get("index", start + i)
+        title = (post.get("title") or "").strip()
+        url = post.get("url") or ""
+        last_err = None
+
+        # 잘못된 URL 은 다시 요청해도 같음 → 재시도 없이 바로 실패
+        if not extract_post_id(url):
+            done += 1
+            log(f"[{done}/{total}] ❌ 실패: {title[:60]} (URL에서 post id를 찾지 못함: {url})")
+            return None
+
+        for attempt in range(1, max_retries + 1):
+            await bucket.acquire()
+            status: Optional[int] = None
+            try:
+                status, payload = await asyncio.to_thread(
+                    _fetch_post_once, url, ua, deep_comments, max_comments, time_budget
+                )
+            except Exception as e:
+                payload = None
+                last_err = str(e)
+            finally:
+                bucket.release(status)
+
+            if payload is not None:
+                content, comments = payload
+                done += 1
+                log(f"[{done}/{total}] ✅ {title[:60]} — 본문 {len(content)}자 / 댓글 {len(comments)}개")
+                result = make_result(idx, title, url, content, comments)
+                if on_result is not None:
+                    on_result(result)
+                    return True
+                return result
+
+            if status is not None:
+                last_err = f"HTTP {status}"
+                if status not in (429, 403, 503) and status < 500:
+                    break
+
+        done += 1
+        log(f"[{done}/{total}] ❌ 실패: {title[:60]} ({last_err})")
+        return None
+
+    return await asyncio.gather(*(one(i, p) for i, p in enumerate(target, 1)))
+
+
+# ---------------------------
+# 체크포인트(JSONL) / 최종 출력
+# ---------------------------
+def _truncate_partial_line(path: str, block: int = 64 * 1024) -> int:
+    """
+    쓰다가 죽어서 개행 없이 끝난 마지막 줄을 잘라냄 (마지막 '\n' 뒤까지만 남김).
+    그대로 append 하면 새 레코드가 조각 뒤에 붙어 한 줄로 깨지기 때문.
+    반환: 잘라낸 바이트 수
+    """
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            start = max(0, end - block)
+            f.seek(start)
+            chunk = f.read(end - start)
+            nl = chunk.rfind(b"\n")
+            if nl >= 0:
+                keep = start + nl + 1
+                break
+            end = start
+        else:
+            keep = 0
+        if keep < size:
+            f.truncate(keep)
+        return size - keep
+
+
+class CheckpointWriter:
+    """결과 한 건마다 JSONL 한 줄을 append + flush (프로세스가 죽어도 그때까지는 보존)."""
+
+    def __init__(self, path: str, fresh: bool):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.count = 0
+        if not fresh:
+            cut = _truncate_partial_line(path)
+            if cut:
+                log(f"  ⚠️ 체크포인트 끝의 미완성 줄 {cut}바이트 제거")
+        self._f = open(path, "w" if fresh else "a", encoding="utf-8")
+
+    def write(self, result: Dict) -> None:
+        self._f.write(json.dumps(result, ensure_ascii=False) + "\n")
+        self._f.flush()
+        self.count += 1
+
+    def close(self) -> None:
+        self._f.close()
+
+
+def iter_checkpoint(path: str) -> Iterator[Tuple[int, Dict]]:
+    """체크포인트를 한 줄씩 읽어 (바이트 오프셋, 레코드)를 돌려줌. 깨진 마지막 줄은 무시."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        while True:
+            offset = f.tell()
+            line = f.readline()
+            if not line:
+                break
+            try:
+                yield offset, json.loads(line.decode("utf-8"))
+            except (ValueError, UnicodeDecodeError):
+                log(f"  ⚠️ 체크포인트 손상된 줄 무시 (offset {offset})")
+
+
+def load_done_ids(path: str) -> Set[str]:
+    return {rec.get("post_id") or extract_post_id(rec.get("url") or "") for _, rec in iter_checkpoint(path)}
+
+
+def build_outputs_from_checkpoint(
+    checkpoint: str,
+    order: List[Optional[str]],
+    out_json: str,
+    out_csv: str,
+) -> int:
+    """
+    체크포인트 → 최종 JSON/CSV.
+    전체를 메모리에 올리지 않고 post_id → 파일 오프셋 색인만 만든 뒤,
+    입력 순서(order)대로 한 줄씩 다시 읽어서 스트리밍으로 기록.
+    (order 에 없는 체크포인트 항목은 뒤에 체크포인트 순서대로 붙임)
+    """
+    offsets: Dict[str, int] = {}
+    for offset, rec in iter_checkpoint(checkpoint):
+        pid = rec.get("post_id") or extract_post_id(rec.get("url") or "")
+        if pid:
+            offsets[pid] = offset  # 같은 글이 여러 번 있으면 마지막 것 사용
+
+    seen: Set[str] = set()
+    ordered: List[int] = []
+    for pid in order:
+        if pid and pid in offsets and pid not in seen:
+            seen.add(pid)
+            ordered.append(offsets[pid])
+    ordered.extend(off for pid, off in offsets.items() if pid not in seen)
+
+    os.makedirs(os.path.dirname(out_json) or ".", exist_ok=True)
+    os.makedirs(os.path.dirname(out_csv) or ".", exist_ok=True)
+
+    n = 0
+    with open(checkpoint, "rb") as src, \
+            open(out_json, "w", encoding="utf-8") as fj, \
+            open(out_csv, "w", encoding="utf-8-sig", newline="") as fc:
+        writer: Optional[csv.DictWriter] = None
+        fj.write("[")
+        for off in ordered:
+            src.seek(off)
+            rec = json.loads(src.readline().decode("utf-8"))
+
+            body = json.dumps(rec, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+            fj.write(("," if n else "") + "\n  " + body)
+
+            if writer is None:
+                writer = csv.DictWriter(fc, fieldnames=list(rec.keys()), extrasaction="ignore")
+                writer.writeheader()
+            # 리스트 컬럼은 예전 pandas 출력과 같은 파이썬 리스트 표기로
+            writer.writerow({k: (str(v) if isinstance(v, list) else v) for k, v in rec.items()})
+            n += 1
+        fj.write("\n]" if n else "]")
+    return n
+
+
 def main():
     ap = argparse.ArgumentParser(description="Reddit posts 본문+댓글 수집(.json 엔드포인트)")
     ap.add_argument("--posts_file", default=None, help="입력 posts JSON 경로(미지정 시 자동 탐색)")
@@ -186,7 +615,30 @@ def main():
     ap.add_argument("--out_csv", default="Tesla_posts_full.csv", help="결과 저장 CSV 경로")
     ap.add_argument("--retries", type=int, default=6, help="요청 재시도 횟수(429 대비)")
     ap.add_argument("--cooldown", type=float, default=2.0, help="기본 대기(초) - 백오프/지터에 활용")
+    ap.add_argument("--async_mode", action="store_true", help="비동기 병렬 수집(적응형 token bucket)")
+    ap.add_argument("--rate", type=float, default=0.5, help="[async] 시작 속도(req/s)")
+    ap.add_argument("--max_rate", type=float, default=5.0, help="[async] 최대 속도(req/s)")
+    ap.add_argument("--concurrency", type=int, default=2, help="[async] 시작 동시 요청 수")
+    ap.add_argument("--max_concurrency", type=int, default=reddit_client.MAX_CONCURRENCY,
+                    help="[async] 최대 동시 요청 수 (reddit_client 전역 상한 이내)")
+    ap.add_argument("--checkpoint", default=None,
+                    help="체크포인트 JSONL 경로 (기본: <out_json 이름>.checkpoint.jsonl)")
+    ap.add_argument("--resume", action="store_true", help="체크포인트에 이미 있는 post id는 건너뛰고 이어서 수집")
+    ap.add_argument("--deep_comments", action="store_true",
+                    help='"more" 댓글 스텁을 /api/morechildren 로 펼쳐서 수집')
+    ap.add_argument("--max_comments", type=int, default=DEFAULT_MAX_COMMENTS, help="[deep] 게시물당 댓글 상한")
+    ap.add_argument("--comments_time_budget", type=float, default=DEFAULT_COMMENTS_TIME_BUDGET,
+                    help="[deep] 게시물당 댓글 펼치기 시간 예산(초)")
+    ap.add_argument("--corpus", default=str(DEFAULT_CORPUS_PATH),
+                    help="수집 결과를 post id 기준으로 upsert 할 코퍼스 SQLite 경로")
+    ap.add_argument("--no_corpus", action="store_true", help="코퍼스에 쓰지 않고 JSON/CSV만 저장")
     args = ap.parse_args()
+    if args.max_concurrency > reddit_client.MAX_CONCURRENCY:
+        # 실제 동시 요청은 reddit_client 전역 limiter 가 막으므로 그 이상은 의미 없음
+        log(f"⚠️ --max_concurrency {args.max_concurrency} → 전역 상한 {reddit_client.MAX_CONCURRENCY} 로 낮춤")
+        args.max_concurrency = reddit_client.MAX_CONCURRENCY
+    if args.concurrency > args.max_concurrency:
+        args.concurrency = args.max_concurrency
 
     posts_path = find_posts_file(args.posts_file)
     posts = load_posts(posts_path)
@@ -198,51 +650,85 @@ def main():
     if not target:
         raise ValueError(f"처리할 구간이 비었습니다. (총 {len(posts)}개, 지정: [{start}:{end}])")
 
+    # 원래 위치 기준 index 를 먼저 고정 (--resume 으로 일부를 건너뛰어도 index 가 밀리지 않게)
+    for i, post in enumerate(target, 1):
+        post.setdefault("index", start + i)
+
     log(f"입력: {posts_path} (총 {len(posts)}개)")
     log(f"대상 범위: [{start}:{end}] → {len(target)}개")
     log(f"UA: {args.ua}")
 
-    results: List[Dict] = []
+    checkpoint = args.checkpoint or (os.path.splitext(args.out_json)[0] + ".checkpoint.jsonl")
+    order = [extract_post_id(p.get("url") or "") for p in target]
+    if args.resume:
+        done_ids = load_done_ids(checkpoint)
+        before = len(target)
+        target = [p for p, pid in zip(target, order) if pid not in done_ids]
+        log(f"이어서 수집: 체크포인트 {len(done_ids)}개 → {before - len(target)}개 건너뜀, {len(target)}개 남음")
+    elif os.path.exists(checkpoint):
+        log(f"⚠️ 기존 체크포인트를 새로 시작합니다(--resume 없음): {checkpoint}")
+    ckpt = CheckpointWriter(checkpoint, fresh=not args.resume)
+    log(f"체크포인트: {checkpoint}")
+
+    corpus = None if args.no_corpus else CorpusStore(args.corpus)
+    if corpus is not None:
+        log(f"코퍼스: {corpus.path} (현재 {corpus.count()}개)")
+
+    def write(result: Dict) -> None:
+        ckpt.write(result)
+        if corpus is not None:
+            corpus.upsert([result])
 
-    for i, post in enumerate(target, 1):
-        idx = post.get("index", start + i)
-        title = (post.get("title") or "").strip()
-        url = post.get("url") or ""
-        log(f"[{i}/{len(target)}] {title[:80]}")
-
-        try:
-            content, comments = fetch_post_via_json(
-                url, ua=args.ua, max_retries=args.retries, cooldown=args.cooldown
-            )
-            results.append(
-                dict(
-                    index=idx,
-                    title=title,
-                    url=url,
-                    content=content,
-                    comments=comments,
-                    num_comments=len(comments),
-                    crawled_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                )
-            )
-            log(f"  ✅ 본문 {len(content)}자 / 댓글 {len(comments)}개")
-        except Exception as e:
-            log(f"  ❌ 실패: {e}")
-        finally:
-            # ▶ 요청 간 랜덤 대기(2.0~4.0s)로 속도 낮춤(429 예방)
-            time.sleep(random.uniform(2.0, 4.0))
-
-    # 저장
-    os.makedirs(os.path.dirname(args.out_json) or ".", exist_ok=True)
-    with open(args.out_json, "w", encoding="utf-8") as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+    try:
+        _fetch_into_checkpoint(args, target, start, write)
+    finally:
+        ckpt.close()
 
-    df = pd.DataFrame(results)
-    os.makedirs(os.path.dirname(args.out_csv) or ".", exist_ok=True)
-    df.to_csv(args.out_csv, index=False, encoding="utf-8-sig")
+    # 저장 (체크포인트 → JSON/CSV 스트리밍)
+    n = build_outputs_from_checkpoint(checkpoint, order, args.out_json, args.out_csv)
 
     log(f"저장 완료: {args.out_json}, {args.out_csv}")
-    log(f"총 {len(df)}개 수집 완료")
+    log(f"총 {n}개 수집 완료 (이번 실행 {ckpt.count}개)")
+
+
+def _fetch_into_checkpoint(args, target: List[Dict], start: int, write: Callable[[Dict], None]) -> None:
+    if args.async_mode:
+        bucket = AdaptiveTokenBucket(
+            rate=args.rate,
+            max_rate=args.max_rate,
+            concurrency=args.concurrency,
+            max_concurrency=args.max_concurrency,
+        )
+        asyncio.run(
+            fetch_posts_async(
+                target, start, ua=args.ua, max_retries=args.retries,
+                bucket=bucket, on_result=write,
+                deep_comments=args.deep_comments,
+                max_comments=args.max_comments,
+                time_budget=args.comments_time_budget,
+            )
+        )
+    else:
+        for i, post in enumerate(target, 1):
+            idx = post.get("index", start + i)
+            title = (post.get("title") or "").strip()
+            url = post.get("url") or ""
+            log(f"[{i}/{len(target)}] {title[:80]}")
+
+            try:
+                content, comments = fetch_post_via_json(
+                    url, ua=args.ua, max_retries=args.retries, cooldown=args.cooldown,
+                    deep_comments=args.deep_comments,
+                    max_comments=args.max_comments,
+                    time_budget=args.comments_time_budget,
+                )
+                write(make_result(idx, title, url, content, comments))
+                log(f"  ✅ 본문 {len(content)}자 / 댓글 {len(comments)}개")
+            except Exception as e:
+                log(f"  ❌ 실패: {e}")
+            finally:
+                # ▶ 요청 간 랜덤 대기(2.0~4.0s)로 속도 낮춤(429 예방)
+                time.sleep(random.uniform(2.0, 4.0))
 
 
 if __name__ == "__main__":
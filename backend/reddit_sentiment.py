@@ -1,25 +1,63 @@
 # -*- coding: utf-8 -*-
 """
 reddit_sentiment.py
-- 입력: tesla_evs_reddit_post.xlsx (또는 --in_xlsx로 지정)
+- 입력: tesla_evs_reddit_post.xlsx (또는 --in_xlsx로 지정, .sqlite3 면 로컬 코퍼스)
 - 동작: title / content / comments(앞 N개) 감성분석
 - 출력: reddit_tesla_sentiment.xlsx / .csv
+- 라벨 캐시: (모델, revision, 텍스트 해시) → 라벨을 data/sentiment_labels.sqlite3 에 저장
+             → 재실행 시 새로 들어왔거나 바뀐 텍스트만 모델로 보냄
+        (코퍼스 입력이면 전체 글을 읽어 라벨 캐시로 판단 → 새 글/수정된 글만 추론,
+         라벨이 실제로 바뀐 글만 코퍼스에 upsert)
 
 사용 예)
   python reddit_sentiment.py
   python reddit_sentiment.py --in_xlsx tesla_evs_reddit_post.xlsx --out_xlsx out.xlsx --comments_top_k 5
+  python reddit_sentiment.py --in_xlsx data/corpus.sqlite3            # 새로 들어왔거나 수정된 글만 라벨링
+  python reddit_sentiment.py --in_xlsx data/corpus.sqlite3 --no_label_cache --relabel  # 코퍼스 전체 다시 추론
+  python reddit_sentiment.py --backend onnx --quantize int8            # ONNX Runtime + int8 (CPU)
+  python reddit_sentiment.py --backend onnx --quantize int8 --bench 500  # torch 대비 일치율/속도만 측정
+  python reddit_sentiment.py --workers 8                               # 8 프로세스 (워커당 코어 수 // 8 스레드)
 """
 
 import os
 import re
 import ast
 import json
+import hashlib
+import time
+import shutil
 import argparse
-from typing import List, Any, Optional, Dict
+import importlib.util
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Any, Optional, Dict, Iterable, Iterator, Tuple
 
 import pandas as pd
 from transformers import pipeline
 
+from corpus_store import CorpusStore, is_corpus_path
+from kv_cache import SqliteCache
+
+
+MAX_LENGTH = 256             # 토큰 기준 최대 길이 (넘으면 잘라냄)
+DEFAULT_TOKEN_BUDGET = 8192  # 한 번의 forward 에 넣을 (배치 크기 × 최장 길이) 상한
+DEFAULT_MAX_BATCH = 64       # 짧은 텍스트만 모여도 한 배치 최대 개수
+DEFAULT_SHARD_ROWS = 500     # --workers 모드에서 워커에 한 번에 넘기는 행 수 (샤드 = 출력에 이어 쓰는 단위)
+LABEL_CACHE_PATH = Path(__file__).resolve().parent / "data" / "sentiment_labels.sqlite3"
+
+# ONNX Runtime 백엔드 (선택): pip install "optimum[onnxruntime]"
+HAS_OPTIMUM = (
+    importlib.util.find_spec("optimum") is not None
+    and importlib.util.find_spec("onnxruntime") is not None
+)
+ONNX_DIR = Path(__file__).resolve().parent / "data" / "onnx"  # export 한 그래프 캐시 (모델별 폴더)
+BACKENDS = ("torch", "onnx")
+LABEL_COLUMNS = ["title_sentiment", "content_sentiment", "comments_sentiment"]
+LABEL_RECORD_COLUMNS = ["post_id"] + LABEL_COLUMNS
+STORED_PREFIX = "stored_"    # 코퍼스 입력: 이미 저장돼 있던 라벨 컬럼 (바뀐 글만 upsert 하려고 비교용)
+QUANTIZE_MODES = ("none", "int8")
+
 
 # -----------------------------
 # 유틸
@@ -93,16 +131,125 @@ def parse_comments_cell(x: Any) -> List[str]:
     parts = [clean_text(t) for t in s.splitlines() if t.strip()]
     return parts
 
-def make_pipeline(model_name: str):
+def make_pipeline(model_name: str, backend: str = "torch", quantize: str = "none", threads: Optional[int] = None):
+    """
+    backend="torch": 기존 PyTorch eager (CPU만 있어도 동작, GPU 있으면 자동 사용)
+    backend="onnx" : ONNX Runtime (quantize="int8" 이면 동적 int8 양자화 그래프)
+                     라벨(id2label)은 원본 config 그대로라 torch 와 같은 라벨이 나옴
+    threads: [onnx] 세션 intra-op 스레드 수 (torch 는 limit_threads 로 프로세스 단위 제한)
+    """
+    if backend == "onnx":
+        model, tokenizer = load_onnx_model(model_name, quantize, threads)
+        return pipeline(
+            "sentiment-analysis",
+            model=model,
+            tokenizer=tokenizer,
+            truncation=True,
+            max_length=MAX_LENGTH,
+        )
     # CPU만 있어도 동작. GPU가 있다면 자동 사용.
     return pipeline(
         "sentiment-analysis",
         model=model_name,
         truncation=True,          # 토크나이저에서 잘라줌
-        max_length=256,           # 너무 긴 텍스트는 256 토큰까지만
+        max_length=MAX_LENGTH,    # 너무 긴 텍스트는 256 토큰까지만
         # device_map="auto"       # 필요시 주석 해제
     )
 
+def _onnx_dir(model_name: str, quantize: str) -> Path:
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name)
+    return ONNX_DIR / (slug if quantize == "none" else f"{slug}-{quantize}")
+
+def _build_into(final_dir: Path, build) -> None:
+    """임시 폴더에 만들고 끝나면 rename → 중간에 죽어도 반쯤 만든 캐시를 읽지 않음."""
+    tmp = final_dir.with_name(final_dir.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    try:
+        build(tmp)
+        # 이전 실행이 남긴 (불완전한) 폴더가 있으면 비어 있지 않아 os.replace 가 실패함
+        shutil.rmtree(final_dir, ignore_errors=True)
+        os.replace(tmp, final_dir)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def export_onnx_model(model_name: str, quantize: str = "none") -> Tuple[Path, str]:
+    """
+    ONNX 그래프를 ONNX_DIR 아래에 한 번만 export / 양자화해 둠 (이미 있으면 그대로).
+    반환: (그래프 폴더, onnx 파일 이름)
+    """
+    if not HAS_OPTIMUM:
+        raise RuntimeError('ONNX 백엔드에는 optimum + onnxruntime 이 필요합니다: pip install "optimum[onnxruntime]"')
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+    from transformers import AutoTokenizer
+
+    fp32_dir = _onnx_dir(model_name, "none")
+    if not (fp32_dir / "model.onnx").exists():
+        print(f"ONNX export (최초 1회): {model_name} → {fp32_dir}")
+
+        def export(out: Path) -> None:
+            ORTModelForSequenceClassification.from_pretrained(model_name, export=True).save_pretrained(out)
+            AutoTokenizer.from_pretrained(model_name).save_pretrained(out)
+
+        _build_into(fp32_dir, export)
+
+    if quantize == "none":
+        return fp32_dir, "model.onnx"
+
+    q_dir = _onnx_dir(model_name, quantize)
+    if not (q_dir / "model_quantized.onnx").exists():
+        from optimum.onnxruntime import ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+        print(f"int8 동적 양자화 (최초 1회): {fp32_dir} → {q_dir}")
+
+        def quantize_into(out: Path) -> None:
+            # 동적 양자화라 캘리브레이션 데이터 불필요. avx2 설정이 대부분의 x86 CPU 에서 동작
+            qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+            ORTQuantizer.from_pretrained(fp32_dir).quantize(save_dir=out, quantization_config=qconfig)
+            AutoTokenizer.from_pretrained(fp32_dir).save_pretrained(out)
+
+        _build_into(q_dir, quantize_into)
+
+    return q_dir, "model_quantized.onnx"
+
+def load_onnx_model(model_name: str, quantize: str = "none", threads: Optional[int] = None):
+    """
+    export_onnx_model 로 캐시된 그래프를 ONNX Runtime 세션으로 로드.
+    threads 가 있으면 세션의 intra-op 스레드 수를 그 값으로 제한.
+    반환: (ORTModelForSequenceClassification, tokenizer)
+    """
+    model_dir, file_name = export_onnx_model(model_name, quantize)
+    import onnxruntime as ort
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+    from transformers import AutoTokenizer
+
+    opts = ort.SessionOptions()
+    if threads:
+        opts.intra_op_num_threads = threads
+        opts.inter_op_num_threads = 1
+    return (
+        ORTModelForSequenceClassification.from_pretrained(model_dir, file_name=file_name, session_options=opts),
+        AutoTokenizer.from_pretrained(model_dir),
+    )
+
+def limit_threads(threads: int) -> None:
+    """
+    이 프로세스의 연산 스레드 수 제한 (--workers 모드에서 워커끼리 코어를 나눠 쓰도록).
+    OMP/MKL 환경변수는 torch 스레드 풀이 뜨기 전에만 먹으므로 torch.set_num_threads 도 같이 호출.
+    """
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # 이미 병렬 작업이 시작된 뒤면 바꿀 수 없음
+
 def analyze_single(text: str, nlp) -> Optional[str]:
     text = clean_text(text)
     if not text:
@@ -110,19 +257,237 @@ def analyze_single(text: str, nlp) -> Optional[str]:
     res = nlp(text)[0]  # {'label': 'positive|neutral|negative', 'score': ...}
     return res.get("label")
 
-def analyze_batch(texts: List[str], nlp) -> List[Optional[str]]:
-    # 빈 문자열은 None 처리
-    payload = [clean_text(t) if clean_text(t) else " " for t in texts]
-    outputs = nlp(payload)
-    labels = []
-    for out, raw in zip(outputs, texts):
-        if not clean_text(raw):
-            labels.append(None)
-        else:
-            labels.append(out.get("label"))
+def make_buckets(lengths: List[int], token_budget: int, max_batch: int) -> List[List[int]]:
+    """
+    토큰 길이 기준으로 인덱스를 정렬한 뒤, (배치 크기 × 배치 안 최장 길이) 가
+    token_budget 을 넘지 않게 묶는다. → 비슷한 길이끼리 모여서 padding 낭비가 적음.
+    반환: 버킷별 원래 인덱스 리스트 (짧은 것부터)
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    buckets: List[List[int]] = []
+    cur: List[int] = []
+    for i in order:
+        longest = lengths[i]  # 정렬돼 있으므로 방금 넣을 것이 가장 김
+        if cur and (len(cur) >= max_batch or (len(cur) + 1) * longest > token_budget):
+            buckets.append(cur)
+            cur = []
+        cur.append(i)
+    if cur:
+        buckets.append(cur)
+    return buckets
+
+
+def analyze_batch(
+    texts: List[str],
+    nlp,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    max_batch: int = DEFAULT_MAX_BATCH,
+) -> List[Optional[str]]:
+    """
+    길이별 버킷 배치 추론.
+    1) 빈 텍스트는 모델에 넣지 않고 None
+    2) 토크나이저로 길이(최대 MAX_LENGTH)를 재서 make_buckets 로 묶음
+    3) 버킷 하나 = forward 한 번 (pipeline batch_size = 버킷 크기)
+    4) 결과를 원래 순서로 되돌림
+    """
+    cleaned = [clean_text(t) for t in texts]
+    labels: List[Optional[str]] = [None] * len(texts)
+    idx = [i for i, t in enumerate(cleaned) if t]
+    if not idx:
+        return labels
+
+    payload = [cleaned[i] for i in idx]
+    enc = nlp.tokenizer(payload, truncation=True, max_length=MAX_LENGTH)
+    lengths = [len(ids) for ids in enc["input_ids"]]
+    buckets = make_buckets(lengths, token_budget, max_batch)
+
+    for b in buckets:
+        outputs = nlp([payload[j] for j in b], batch_size=len(b))
+        for j, out in zip(b, outputs):
+            labels[idx[j]] = out.get("label")
+
+    if len(payload) >= 100:
+        real = sum(lengths)
+        padded = sum(len(b) * lengths[b[-1]] for b in buckets)
+        print(f"  · {len(payload)}개 → 배치 {len(buckets)}번 (padding {100 * (padded - real) / max(padded, 1):.1f}%)")
     return labels
 
 
+def flatten_texts(
+    titles: List[str],
+    contents: List[str],
+    comments: List[Any],
+    top_k: int,
+) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """
+    [타이틀 n개] + [본문 n개] + [행별 댓글 앞 top_k개 ...] 를 한 리스트로 펼침.
+    반환: (texts, comment_spans) — comment_spans[r] = 행 r 댓글의 texts 안 [start, end) 구간
+    """
+    texts: List[str] = list(titles) + list(contents)
+    spans: List[Tuple[int, int]] = []
+    for cs in comments:
+        start = len(texts)
+        if isinstance(cs, list):
+            texts.extend(cs[:top_k])
+        spans.append((start, len(texts)))
+    return texts, spans
+
+
+# --workers 모드: 워커 프로세스마다 파이프라인 하나
+_worker_nlp = None
+_worker_opts: Dict[str, int] = {}
+
+
+def _init_label_worker(
+    model_name: str, backend: str, quantize: str, threads: int, token_budget: int, max_batch: int
+) -> None:
+    """프로세스 풀 initializer: 스레드 수를 먼저 제한한 뒤 워커마다 모델을 한 번만 로드."""
+    global _worker_nlp, _worker_opts
+    limit_threads(threads)
+    _worker_nlp = make_pipeline(model_name, backend, quantize, threads)
+    _worker_opts = {"token_budget": token_budget, "max_batch": max_batch}
+
+
+def _label_shard(texts: List[str]) -> List[Optional[str]]:
+    return analyze_batch(texts, _worker_nlp, **_worker_opts)
+
+
+def iter_label_shards(
+    shards: List[List[str]],
+    model_name: str,
+    backend: str,
+    quantize: str,
+    workers: int,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    max_batch: int = DEFAULT_MAX_BATCH,
+    threads: Optional[int] = None,
+) -> Iterator[List[Optional[str]]]:
+    """
+    텍스트 샤드들을 프로세스 풀에서 라벨링하고 샤드 결과를 입력 순서대로 흘려보냄.
+    - 워커마다 모델 한 번 로드 (initializer), intra-op 스레드는 threads (기본: 코어 수 // workers)
+    - spawn 으로 띄움 → 부모의 torch 스레드 풀 상태를 물려받지 않음
+    """
+    workers = max(1, min(workers, len(shards)))
+    threads = threads or max(1, (os.cpu_count() or 1) // workers)
+    if backend == "onnx":
+        export_onnx_model(model_name, quantize)  # 워커들이 동시에 export 하지 않도록 부모에서 먼저
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_label_worker,
+        initargs=(model_name, backend, quantize, threads, token_budget, max_batch),
+    ) as pool:
+        # pool.map 은 제출 순서대로 결과를 돌려주므로 순서가 유지됨
+        yield from pool.map(_label_shard, shards)
+
+
+# -----------------------------
+# 라벨 캐시 (재실행 시 바뀐 텍스트만 모델로)
+# -----------------------------
+def resolve_revision(model_name: str) -> str:
+    """
+    허깅페이스 모델의 현재 커밋 해시 (config 만 받아서 확인, 로컬 캐시에 있으면 네트워크 X).
+    캐시 키에 넣으므로 모델이 갱신되면 예전 라벨은 자동으로 안 쓰임.
+    확인이 안 되면(로컬 경로 모델 등) "local" — 이때 모델을 바꿨다면 --no_label_cache 로 돌릴 것.
+    """
+    try:
+        from transformers import AutoConfig
+
+        return getattr(AutoConfig.from_pretrained(model_name), "_commit_hash", None) or "local"
+    except Exception as e:
+        print(f"[경고] 모델 revision 확인 실패: {e}")
+        return "local"
+
+
+class LabelCache:
+    """
+    (모델 이름, revision, 백엔드) + 텍스트 sha1 → 라벨.
+    kv_cache.SqliteCache(만료 없음) 위에 키 규칙만 얹음. 같은 텍스트는 한 번만 조회/저장.
+    """
+
+    def __init__(self, path: Path | str, model_name: str, revision: str, variant: str = "torch"):
+        self._cache = SqliteCache(path, table="labels")
+        self.prefix = f"{model_name}@{revision}/{variant}:"
+        self.lookups = 0
+        self.hits = 0
+
+    def _key(self, text: str) -> str:
+        return self.prefix + hashlib.sha1(text.encode("utf-8", errors="replace")).hexdigest()
+
+    def get_many(self, texts: Iterable[str]) -> Dict[str, str]:
+        """texts 중 캐시에 있는 것 → {텍스트: 라벨}."""
+        keys = {self._key(t): t for t in dict.fromkeys(texts)}
+        found = {keys[k]: e.value for k, e in self._cache.get_many(keys).items()}
+        self.lookups += len(keys)
+        self.hits += len(found)
+        return found
+
+    def set_many(self, texts: List[str], labels: List[Optional[str]]) -> None:
+        self._cache.set_many((self._key(t), lab) for t, lab in zip(texts, labels) if lab is not None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_ratio": self.hits / self.lookups if self.lookups else 0.0,
+            "entries": self._cache.stats()["entries"],
+        }
+
+
+def compare_backends(
+    texts: List[str],
+    model_name: str,
+    backend: str,
+    quantize: str,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    max_batch: int = DEFAULT_MAX_BATCH,
+) -> Dict[str, Any]:
+    """
+    같은 텍스트로 torch 기준 파이프라인과 (backend, quantize) 파이프라인을 돌려
+    라벨 일치율(정확도 parity)과 처리량(texts/sec)을 비교.
+    각 파이프라인은 로딩 직후 워밍업 한 번 뒤에 측정.
+    """
+    texts = [t for t in (clean_text(x) for x in texts) if t]
+    result: Dict[str, Any] = {"texts": len(texts)}
+    labels: Dict[str, List[Optional[str]]] = {}
+    for name, b, q in (("torch", "torch", "none"), ("candidate", backend, quantize)):
+        nlp = make_pipeline(model_name, b, q)
+        analyze_batch(texts[:max_batch], nlp, token_budget, max_batch)  # 워밍업
+        t0 = time.perf_counter()
+        labels[name] = analyze_batch(texts, nlp, token_budget, max_batch)
+        elapsed = time.perf_counter() - t0
+        result[f"{name}_sec"] = elapsed
+        result[f"{name}_texts_per_sec"] = len(texts) / max(elapsed, 1e-9)
+        del nlp
+
+    same = sum(a == b for a, b in zip(labels["torch"], labels["candidate"]))
+    result["agreement"] = same / max(len(texts), 1)
+    result["speedup"] = result["torch_sec"] / max(result["candidate_sec"], 1e-9)
+    return result
+
+
+def _same_label(a: Any, b: Any) -> bool:
+    """라벨 값 비교 (None / NaN 은 둘 다 '없음', 댓글 라벨은 리스트끼리 비교)."""
+    a_missing = a is None or (isinstance(a, float) and a != a)
+    b_missing = b is None or (isinstance(b, float) and b != b)
+    if a_missing or b_missing:
+        return a_missing and b_missing
+    return a == b
+
+
+def format_for_save(df: pd.DataFrame) -> pd.DataFrame:
+    """리스트 컬럼을 엑셀/CSV 호환 문자열로 바꾼 복사본."""
+    out = df.copy()
+    out["comments"] = out["comments"].apply(
+        lambda xs: "\n".join(xs) if isinstance(xs, list) else ""
+    )
+    out["comments_sentiment"] = out["comments_sentiment"].apply(
+        lambda xs: ", ".join([x if x is not None else "None" for x in xs]) if isinstance(xs, list) else ""
+    )
+    return out
+
+
 # -----------------------------
 # 메인
 # -----------------------------
@@ -133,10 +498,39 @@ def main():
     ap.add_argument("--out_csv",  default="reddit_tesla_sentiment.csv",  help="출력 CSV 파일")
     ap.add_argument("--comments_top_k", type=int, default=5, help="댓글 상위 N개만 분석")
     ap.add_argument("--model", default="cardiffnlp/twitter-roberta-base-sentiment-latest", help="허깅페이스 모델 이름")
+    ap.add_argument("--relabel", action="store_true",
+                    help="[코퍼스 입력 + --no_label_cache] 이미 라벨이 있는 글도 다시 분석 (캐시를 쓰면 항상 전체 글을 캐시로 판단)")
+    ap.add_argument("--token_budget", type=int, default=DEFAULT_TOKEN_BUDGET,
+                    help="배치 하나의 (개수 × 최장 토큰 길이) 상한")
+    ap.add_argument("--max_batch", type=int, default=DEFAULT_MAX_BATCH, help="배치 하나의 최대 텍스트 수")
+    ap.add_argument("--backend", choices=BACKENDS, default="torch", help="추론 백엔드 (onnx: ONNX Runtime)")
+    ap.add_argument("--quantize", choices=QUANTIZE_MODES, default="none", help="[onnx] int8 동적 양자화")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="N>1 이면 행을 샤드로 나눠 N개 프로세스에서 추론 (워커마다 모델 1개)")
+    ap.add_argument("--worker_threads", type=int, default=0,
+                    help="[--workers] 워커당 연산 스레드 수 (0: 코어 수 // workers)")
+    ap.add_argument("--shard_rows", type=int, default=DEFAULT_SHARD_ROWS, help="[--workers] 샤드 하나의 행 수")
+    ap.add_argument("--label_cache", default=str(LABEL_CACHE_PATH), help="라벨 캐시 SQLite 경로")
+    ap.add_argument("--no_label_cache", action="store_true", help="라벨 캐시 없이 전부 다시 추론")
+    ap.add_argument("--bench", type=int, default=0,
+                    help="N>0 이면 입력 앞쪽 텍스트 N개로 torch 대비 라벨 일치율/처리량만 측정하고 종료")
     args = ap.parse_args()
+    if args.quantize != "none" and args.backend != "onnx":
+        ap.error("--quantize 는 --backend onnx 에서만 사용할 수 있습니다")
+    if args.bench > 0 and args.backend != "onnx":
+        ap.error("--bench 는 torch 와 비교하므로 --backend onnx 에서만 사용할 수 있습니다")
 
     print(f"입력 로드: {args.in_xlsx}")
-    df = load_df(args.in_xlsx)
+    corpus: Optional[CorpusStore] = None
+    if is_corpus_path(args.in_xlsx):
+        # 필요한 컬럼 + 저장된 라벨. 어떤 텍스트를 모델에 보낼지는 라벨 캐시(텍스트 해시)가 판단
+        # → 제목/본문/댓글이 수정된 글도 새 텍스트로 다시 추론됨
+        corpus = CorpusStore(args.in_xlsx)
+        df = corpus.read_df(["title", "content", "comments"] + LABEL_COLUMNS)
+        df = df.rename(columns={c: STORED_PREFIX + c for c in LABEL_COLUMNS})
+        print(f"코퍼스에서 {len(df)}개 로드")
+    else:
+        df = load_df(args.in_xlsx)
 
     # 존재 컬럼 가드
     for col in ("title", "content", "comments"):
@@ -148,43 +542,138 @@ def main():
     df["content"] = df["content"].map(clean_text)
     df["comments"] = df["comments"].map(parse_comments_cell)
 
-    print("모델 로딩 중...")
-    nlp = make_pipeline(args.model)
-    print("모델 준비 완료")
-
-    # 타이틀/본문: 배치로 빠르게
+    if corpus is not None and args.no_label_cache and not args.relabel:
+        # 라벨 캐시가 없으면 전체를 다시 추론하지 않고, 텍스트가 있는데 라벨이 빈 글만
+        # (corpus_store.upsert 가 텍스트가 바뀐 글의 라벨을 비워 두므로 수정된 글도 여기에 걸림)
+        need = (
+            ((df["title"] != "") & df[STORED_PREFIX + "title_sentiment"].isna())
+            | ((df["content"] != "") & df[STORED_PREFIX + "content_sentiment"].isna())
+            | df[STORED_PREFIX + "comments_sentiment"].isna()
+        )
+        df = df[need].reset_index(drop=True)
+        print(f"라벨이 빈 글 {len(df)}개만 분석 (--no_label_cache)")
+    if df.empty:
+        print("새로 분석할 글이 없습니다.")
+        return
+
+    # 타이틀 / 본문 / 댓글(각 행 앞 K개)을 한 줄로 펼쳐서 같은 버킷 큐에서 한 번에 추론
+    # → 행마다 1~5개짜리 작은 호출 대신 큰 배치로 모델을 계속 돌림
+    K = args.comments_top_k
     titles = df["title"].tolist()
     contents = df["content"].tolist()
+    comments = df["comments"].tolist()
+
+    if args.bench > 0:
+        texts, _ = flatten_texts(titles, contents, comments, K)
+        print(f"백엔드 비교: torch vs {args.backend}/{args.quantize} (텍스트 {args.bench}개)")
+        r = compare_backends(
+            texts[: args.bench], args.model, args.backend, args.quantize, args.token_budget, args.max_batch
+        )
+        print(
+            f"  · torch      {r['torch_texts_per_sec']:.1f} texts/s ({r['torch_sec']:.2f}s)\n"
+            f"  · {args.backend}/{args.quantize:<5} {r['candidate_texts_per_sec']:.1f} texts/s "
+            f"({r['candidate_sec']:.2f}s, x{r['speedup']:.2f})\n"
+            f"  · 라벨 일치율 {100 * r['agreement']:.2f}% ({r['texts']}개)"
+        )
+        return
+
+    texts, comment_spans = flatten_texts(titles, contents, comments, K)
+    backend_name = args.backend + ("/" + args.quantize if args.quantize != "none" else "")
+
+    # 1) 캐시 조회 → 캐시에 없는 (고유) 텍스트만 모델로
+    cache: Optional[LabelCache] = None
+    known: Dict[str, str] = {}
+    nonempty = [t for t in texts if t]
+    if not args.no_label_cache:
+        cache = LabelCache(args.label_cache, args.model, resolve_revision(args.model), backend_name)
+        known = cache.get_many(nonempty)
+    pending = [t for t in dict.fromkeys(nonempty) if t not in known]
+    if cache is not None:
+        st = cache.stats()
+        print(
+            f"라벨 캐시: {st['hits']}/{st['lookups']} 적중 ({100 * st['hit_ratio']:.1f}%) "
+            f"→ 모델 추론 {len(pending)}개 (텍스트 {len(texts)}개 중, 캐시 {st['entries']}개)"
+        )
+
+    n = len(df)
+
+    def label_of(t: str) -> Optional[str]:
+        return known.get(t) if t else None
+
+    stored_cols = [STORED_PREFIX + c for c in LABEL_COLUMNS if STORED_PREFIX + c in df.columns]
+    stored_labels = df[stored_cols]
+
+    def labeled(lo: int, hi: int) -> pd.DataFrame:
+        """행 lo..hi-1 에 라벨 컬럼을 붙인 DataFrame (texts 는 행 순서대로 펼쳐져 있음)."""
+        return df.iloc[lo:hi].drop(columns=stored_cols).assign(
+            title_sentiment=[label_of(t) for t in titles[lo:hi]],
+            content_sentiment=[label_of(t) for t in contents[lo:hi]],
+            comments_sentiment=[[label_of(t) for t in texts[a:b]] for a, b in comment_spans[lo:hi]],
+        )
+
+    def save_labels(part: pd.DataFrame) -> int:
+        """코퍼스에 저장된 라벨과 달라진 행만 라벨 컬럼 upsert (본문/댓글 등 다른 단계가 쓴 컬럼은 그대로)."""
+        stored = stored_labels.loc[part.index]
+        changed = [
+            not all(_same_label(new, old) for new, old in zip(row_new, row_old))
+            for row_new, row_old in zip(
+                part[LABEL_COLUMNS].itertuples(index=False), stored.itertuples(index=False)
+            )
+        ]
+        return corpus.upsert(part.loc[changed, LABEL_RECORD_COLUMNS].to_dict("records"))
+
+    # 2) 남은 텍스트 추론
+    scope = f"타이틀/본문 {2 * n}개 + 댓글 (각 행 앞 {K}개)"
+    os.makedirs(os.path.dirname(args.out_csv) or ".", exist_ok=True)
+    streamed = False
+    if not pending:
+        print("새로 추론할 텍스트가 없습니다.")
+    elif args.workers > 1 and n > args.shard_rows:
+        # 행 단위 샤드 (샤드마다 그 행들의 아직 라벨 없는 텍스트만) → 워커별 추론
+        # → 끝난 샤드부터 입력 순서대로 라벨 캐시 / 코퍼스 / CSV 에 바로 씀 (중간에 죽어도 그때까지는 보존)
+        bounds = [(lo, min(lo + args.shard_rows, n)) for lo in range(0, n, args.shard_rows)]
+        assigned = set(known)
+        shards: List[List[str]] = []
+        for lo, hi in bounds:
+            shard_texts = titles[lo:hi] + contents[lo:hi] + texts[comment_spans[lo][0] : comment_spans[hi - 1][1]]
+            todo = [t for t in dict.fromkeys(shard_texts) if t and t not in assigned]
+            assigned.update(todo)
+            shards.append(todo)
+        print(f"감성분석… {scope} / {backend_name}, 워커 {args.workers}개 / 샤드 {len(shards)}개 ({args.shard_rows}행씩)")
+        results = iter_label_shards(
+            shards, args.model, args.backend, args.quantize, args.workers,
+            args.token_budget, args.max_batch, args.worker_threads or None,
+        )
+        for (lo, hi), shard, shard_labels in zip(bounds, shards, results):
+            known.update(zip(shard, shard_labels))
+            if cache is not None:
+                cache.set_many(shard, shard_labels)
+            part = labeled(lo, hi)
+            if corpus is not None:
+                save_labels(part)
+            format_for_save(part).to_csv(
+                args.out_csv, mode="w" if lo == 0 else "a", header=lo == 0, index=False, encoding="utf-8-sig"
+            )
+            print(f"  · 샤드 {lo}~{hi - 1} 완료 ({hi}/{n}행, 추론 {len(shard)}개) → {args.out_csv}")
+        streamed = True
+    else:
+        print(f"모델 로딩 중... ({backend_name})")
+        nlp = make_pipeline(args.model, args.backend, args.quantize)
+        print("모델 준비 완료")
+        print(f"감성분석… {scope}")
+        pending_labels = analyze_batch(pending, nlp, args.token_budget, args.max_batch)
+        known.update(zip(pending, pending_labels))
+        if cache is not None:
+            cache.set_many(pending, pending_labels)
 
-    print("타이틀 감성분석...")
-    df["title_sentiment"] = analyze_batch(titles, nlp)
+    # 3) 텍스트 → 라벨을 행 단위로 되돌림
+    df = labeled(0, n)
 
-    print("본문 감성분석...")
-    df["content_sentiment"] = analyze_batch(contents, nlp)
+    if corpus is not None and not streamed:
+        print(f"코퍼스 라벨 갱신: {save_labels(df)}개")
 
-    # 댓글: 각 행마다 앞 N개만, 리스트로 라벨 저장
-    K = args.comments_top_k
-    print(f"댓글 감성분석… (각 행 앞 {K}개)")
-    comments_labels: List[List[Optional[str]]] = []
-    for comments in df["comments"]:
-        if isinstance(comments, list) and len(comments) > 0:
-            sub = comments[:K]
-            labels = analyze_batch(sub, nlp)
-        else:
-            labels = []
-        comments_labels.append(labels)
-
-    df["comments_sentiment"] = comments_labels
-
-    # 저장
-    # 리스트 컬럼을 엑셀/CSV 호환 문자열로 바꾸기
-    df_to_save = df.copy()
-    df_to_save["comments"] = df_to_save["comments"].apply(
-        lambda xs: "\n".join(xs) if isinstance(xs, list) else ""
-    )
-    df_to_save["comments_sentiment"] = df_to_save["comments_sentiment"].apply(
-        lambda xs: ", ".join([x if x is not None else "None" for x in xs]) if isinstance(xs, list) else ""
-    )
+    # 저장 (워커 모드는 CSV 를 샤드마다 이미 이어 씀)
+    df_to_save = format_for_save(df)
 
     os.makedirs(os.path.dirname(args.out_xlsx) or ".", exist_ok=True)
     # 엑셀 저장 시도 (openpyxl 필요). 실패해도 CSV는 항상 저장.
@@ -194,7 +683,8 @@ def main():
     except Exception as e:
         print(f"[경고] 엑셀 저장 실패: {e}")
 
-    df_to_save.to_csv(args.out_csv, index=False, encoding="utf-8-sig")
+    if not streamed:
+        df_to_save.to_csv(args.out_csv, index=False, encoding="utf-8-sig")
     print(f"CSV 저장 완료: {args.out_csv}")
 
     print("샘플 미리보기:")
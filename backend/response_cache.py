@@ -0,0 +1,132 @@
+# backend/response_cache.py
+"""
+/fsd-chat 전체 응답 캐시 (프로세스 메모리)
+
+- 키: 정규화한 질문 + 정렬한 키워드 집합 + 크롤링 데이터 freshness epoch
+- TTL 이 지나면 무시, max_entries 초과 시 LRU 삭제
+- single-flight: 같은 키로 동시에 들어온 요청은 먼저 온 요청 하나만 실제로 계산하고
+  나머지는 그 결과(또는 예외)를 함께 기다린다
+- 실패(예외)나 cacheable 검사를 통과하지 못한 결과는 캐시하지 않음
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+import json
+import re
+import threading
+import time
+import unicodedata
+
+
+_SPACE_RE = re.compile(r"\s+")
+_TRAILING_PUNCT_RE = re.compile(r"[\s?!.~。？！]+$")
+
+
+def normalize_question(question: str) -> str:
+    """대소문자/공백/끝 문장부호 차이는 같은 질문으로 취급."""
+    q = unicodedata.normalize("NFKC", question or "").lower()
+    q = _SPACE_RE.sub(" ", q).strip()
+    return _TRAILING_PUNCT_RE.sub("", q)
+
+
+def make_key(question: str, keywords: Iterable[str], epoch: int) -> str:
+    kws = sorted({str(k).strip().lower() for k in keywords if str(k).strip()})
+    return json.dumps([normalize_question(question), kws, int(epoch)], ensure_ascii=False)
+
+
+class ResponseCache:
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+
+        self._hits = 0
+        self._misses = 0
+        self._shared = 0
+
+    def _get_locked(self, key: str) -> Optional[Any]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        stored_at, value = item
+        if time.time() - stored_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            value = self._get_locked(key)
+            if value is not None:
+                self._hits += 1
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        cacheable: Optional[Callable[[Any], bool]] = None,
+    ) -> Tuple[Any, str]:
+        """
+        (값, 상태) 반환. 상태: "hit" | "miss"(직접 계산) | "shared"(다른 요청의 계산을 공유)
+        cacheable(value) 가 False 면 대기 중인 요청에는 공유하되 캐시에는 넣지 않음.
+        """
+        with self._lock:
+            value = self._get_locked(key)
+            if value is not None:
+                self._hits += 1
+                return value, "hit"
+
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = Future()
+                self._inflight[key] = fut
+                self._misses += 1
+            else:
+                self._shared += 1
+
+        if not leader:
+            return fut.result(), "shared"
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            fut.set_exception(e)
+            raise
+
+        if cacheable is None or cacheable(value):
+            self.put(key, value)
+        with self._lock:
+            self._inflight.pop(key, None)
+        fut.set_result(value)
+        return value, "miss"
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses + self._shared
+            return {
+                "entries": len(self._entries),
+                "inflight": len(self._inflight),
+                "hits": self._hits,
+                "misses": self._misses,
+                "shared": self._shared,
+                "hit_ratio": ((self._hits + self._shared) / lookups) if lookups else 0.0,
+                "ttl": self.ttl,
+                "max_entries": self.max_entries,
+            }
@@ -0,0 +1,5 @@
+# backend 모듈들은 backend/ 를 작업 디렉터리로 두고 평평하게 import 하므로 테스트에서도 같은 경로를 씀
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
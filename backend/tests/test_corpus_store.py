@@ -0,0 +1,115 @@
+import pytest
+
+from corpus_store import CorpusStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CorpusStore(tmp_path / "corpus.sqlite3")
+
+
+def row(store, post_id):
+    return next(store.iter_rows(post_ids=[post_id]))
+
+
+def test_upsert_keeps_values_on_none_and_nan(store):
+    store.upsert([{"post_id": "a", "title": "t", "created_utc": 100.0, "sentiment_score": 0.5}])
+    store.upsert([{"post_id": "a", "created_utc": None, "sentiment_score": float("nan")}])
+    r = row(store, "a")
+    assert r["created_utc"] == 100.0
+    assert r["sentiment_score"] == 0.5
+
+
+def test_text_change_clears_dependent_labels(store):
+    store.upsert([{"post_id": "a", "title": "old", "content": "body", "comments": ["c"], "sentiment_score": 0.5}])
+    store.upsert([{
+        "post_id": "a",
+        "title_sentiment": "positive",
+        "content_sentiment": "neutral",
+        "comments_sentiment": ["negative"],
+    }])
+
+    store.upsert([{"post_id": "a", "title": "edited"}])
+    r = row(store, "a")
+    assert r["title"] == "edited"
+    assert r["title_sentiment"] is None
+    assert r["sentiment_score"] is None
+    # 바뀌지 않은 텍스트로 만든 라벨은 그대로
+    assert r["content_sentiment"] == "neutral"
+    assert r["comments_sentiment"] == ["negative"]
+    assert [x["post_id"] for x in store.iter_rows(["title"], only_missing="title_sentiment")] == ["a"]
+
+
+def test_text_change_with_new_labels_keeps_new_values(store):
+    store.upsert([{"post_id": "a", "title": "old", "content": "body", "sentiment_score": 0.5}])
+    store.upsert([{"post_id": "a", "title": "new", "content": "body", "sentiment_score": -0.3}])
+    assert row(store, "a")["sentiment_score"] == -0.3
+
+
+def test_same_text_keeps_labels(store):
+    store.upsert([{"post_id": "a", "title": "t", "comments": ["c"], "sentiment_score": 0.5}])
+    store.upsert([{"post_id": "a", "title_sentiment": "positive", "comments_sentiment": ["neutral"]}])
+    store.upsert([{"post_id": "a", "title": "t", "comments": ["c"], "title_sentiment": None}])
+    r = row(store, "a")
+    assert r["title_sentiment"] == "positive"
+    assert r["comments_sentiment"] == ["neutral"]
+    assert r["sentiment_score"] == 0.5
+
+
+DAY = 24 * 60 * 60
+
+
+def test_record_scores_sums_and_skips_resaves(store):
+    rows = [("a", "fsd", 0.5, 10 * DAY), ("b", "fsd", -0.1, 10 * DAY + 5), ("c", "fsd", 0.2, 11 * DAY)]
+    assert store.record_scores(rows) == 3
+    # 같은 점수/날짜로 다시 저장하면 집계에 다시 더하지 않음
+    assert store.record_scores(rows) == 0
+
+    agg = store.keyword_aggregates(["fsd"])["fsd"]
+    assert agg["count"] == 3
+    assert agg["mean"] == pytest.approx((0.5 - 0.1 + 0.2) / 3)
+    assert agg["min"] == pytest.approx(-0.1)
+    assert agg["max"] == pytest.approx(0.5)
+    assert store.keyword_aggregates(["fsd"], since_utc=11 * DAY)["fsd"]["count"] == 1
+
+
+def test_record_scores_moves_post_between_day_buckets(store):
+    store.record_scores([("a", "fsd", 0.9, 10 * DAY), ("b", "fsd", 0.1, 10 * DAY), ("c", "fsd", -0.4, 12 * DAY)])
+    # a 를 다시 채점했더니 점수도 바뀌고 날짜도 12일로 옮겨감
+    assert store.record_scores([("a", "fsd", -0.2, 12 * DAY)]) == 1
+
+    day10 = store.keyword_aggregates(["fsd"], since_utc=10 * DAY)
+    assert day10["fsd"]["count"] == 3
+    assert day10["fsd"]["mean"] == pytest.approx((0.1 - 0.4 - 0.2) / 3)
+    scores = [0.1, -0.4, -0.2]
+    mean = sum(scores) / 3
+    std = (sum((s - mean) ** 2 for s in scores) / 3) ** 0.5
+    assert day10["fsd"]["std"] == pytest.approx(std)
+    # 0.9 는 더 이상 어떤 글의 점수도 아님 → max 에 남으면 안 됨
+    assert day10["fsd"]["max"] == pytest.approx(0.1)
+    assert day10["fsd"]["min"] == pytest.approx(-0.4)
+
+    series = {p["day"]: p for p in store.keyword_series("fsd")}
+    assert [p["count"] for p in series.values()] == [1, 2]
+    assert list(series.values())[0]["mean"] == pytest.approx(0.1)
+    assert list(series.values())[1]["mean"] == pytest.approx(-0.3)
+
+    day12 = store.keyword_aggregates(["fsd"], since_utc=12 * DAY)["fsd"]
+    assert (day12["count"], day12["min"], day12["max"]) == (2, pytest.approx(-0.4), pytest.approx(-0.2))
+
+
+def test_record_scores_rescore_in_same_bucket_narrows_min_max(store):
+    store.record_scores([("a", "fsd", 0.9, 10 * DAY), ("b", "fsd", 0.1, 10 * DAY)])
+    store.record_scores([("a", "fsd", 0.3, 10 * DAY)])
+    agg = store.keyword_aggregates(["fsd"])["fsd"]
+    assert agg["count"] == 2
+    assert agg["mean"] == pytest.approx(0.2)
+    assert agg["max"] == pytest.approx(0.3)
+
+
+def test_record_scores_without_created_keeps_first_day(store):
+    store.record_scores([("a", "fsd", 0.5, 10 * DAY)])
+    store.record_scores([("a", "fsd", 0.7, None)])
+    agg = store.keyword_aggregates(["fsd"], since_utc=10 * DAY)["fsd"]
+    assert (agg["count"], agg["mean"]) == (1, pytest.approx(0.7))
+    assert store.keyword_aggregates(["fsd"], since_utc=11 * DAY) == {}
@@ -0,0 +1,74 @@
+import pytest
+
+import kv_cache
+from kv_cache import SqliteCache
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(kv_cache.time, "time", c.time)
+    return c
+
+
+def test_fresh_stale_and_expired(tmp_path, clock):
+    cache = SqliteCache(tmp_path / "c.sqlite3", ttl=10, stale_ttl=5)
+    cache.set("k", {"v": 1})
+
+    clock.now += 10
+    e = cache.get("k")
+    assert e.value == {"v": 1} and not e.stale
+
+    # ttl 은 지났지만 stale_ttl 안쪽 → stale 값을 돌려줌 (호출 측이 백그라운드 갱신)
+    clock.now += 3
+    e = cache.get("k")
+    assert e.value == {"v": 1} and e.stale
+
+    clock.now += 3
+    assert cache.get("k") is None
+    s = cache.stats()
+    assert (s["hits"], s["stale_hits"], s["misses"], s["expired"]) == (1, 1, 1, 1)
+
+
+def test_set_refreshes_created_at(tmp_path, clock):
+    cache = SqliteCache(tmp_path / "c.sqlite3", ttl=10)
+    cache.set("k", 1)
+    clock.now += 8
+    cache.set("k", 2)
+    clock.now += 8
+    assert cache.get("k").value == 2
+
+
+def test_lru_eviction_keeps_recently_read(tmp_path, clock):
+    cache = SqliteCache(tmp_path / "c.sqlite3", max_entries=2)
+    cache.set("a", 1)
+    clock.now += 1
+    cache.set("b", 2)
+    clock.now += 1
+    cache.get("a")  # a 가 더 최근에 쓰임 → b 가 먼저 밀려남
+    clock.now += 1
+    cache.set("c", 3)
+
+    assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_get_many_and_set_many(tmp_path):
+    cache = SqliteCache(tmp_path / "c.sqlite3", table="labels")
+    cache.set_many((f"k{i}", i) for i in range(1200))
+    found = cache.get_many(f"k{i}" for i in range(0, 1300, 2))
+    assert len(found) == 600
+    assert found["k1198"].value == 1198
+
+
+def test_rejects_bad_table_name(tmp_path):
+    with pytest.raises(ValueError):
+        SqliteCache(tmp_path / "c.sqlite3", table="bad name")
@@ -0,0 +1,78 @@
+import joblib
+import numpy as np
+import pytest
+
+fsd_tools = pytest.importorskip("fsd_tools")
+
+
+@pytest.fixture
+def lda_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(fsd_tools, "_lda_models", {})
+    monkeypatch.setattr(fsd_tools, "_lda_model_path", lambda k: tmp_path / f"lda_online_k{k}.joblib")
+    return tmp_path
+
+
+def docs(words, n=12):
+    rng = np.random.RandomState(0)
+    return [" ".join(rng.choice(words, size=5)) for _ in range(n)]
+
+
+FIRST = ["battery", "charging", "range", "supercharger", "winter", "cells"]
+SECOND = ["autopilot", "lidar", "camera", "robotaxi", "steering", "highway"]
+
+
+def test_partial_fit_and_transform_after_vocab_extension(lda_dir):
+    fsd_tools._fit_lda_online(docs(FIRST), n_topics=2, n_words=4)
+    base = fsd_tools._lda_models[2]
+    vocab_before = len(base["vocab"])
+
+    texts = docs(SECOND)
+    topics = fsd_tools._fit_lda_online(texts, n_topics=2, n_words=4)
+
+    bundle = fsd_tools._lda_models[2]
+    assert bundle is not base
+    assert len(bundle["vocab"]) > vocab_before
+    assert set(SECOND) <= set(bundle["vocab"])
+    lda = bundle["lda"]
+    assert lda.components_.shape == (2, len(bundle["vocab"]))
+    assert lda.n_features_in_ == len(bundle["vocab"])
+    # 원본 번들은 그대로 (copy-on-write)
+    assert base["lda"].components_.shape[1] == vocab_before
+
+    # 늘어난 어휘로 다시 partial_fit / transform 이 돌아야 함
+    X = fsd_tools.CountVectorizer(vocabulary=bundle["vocab"], stop_words="english").transform(texts)
+    lda.partial_fit(X)
+    assert lda.transform(X).shape == (len(texts), 2)
+    assert len(topics) == 2 and all(len(t["keywords"]) == 4 for t in topics)
+
+
+def test_bundle_from_other_sklearn_version_is_rebuilt(lda_dir):
+    fsd_tools._fit_lda_online(docs(FIRST), n_topics=2, n_words=4)
+    path = fsd_tools._lda_model_path(2)
+    saved = joblib.load(path)
+    assert saved["sklearn"] == fsd_tools.sklearn.__version__
+
+    saved["sklearn"] = "0.0.1"
+    joblib.dump(saved, path)
+    fsd_tools._lda_models.clear()
+
+    fsd_tools._fit_lda_online(docs(SECOND), n_topics=2, n_words=4)
+    rebuilt = joblib.load(path)
+    assert rebuilt["sklearn"] == fsd_tools.sklearn.__version__
+    # 예전 어휘를 이어 쓰지 않고 새로 학습
+    assert not set(FIRST) & set(rebuilt["vocab"])
+    assert rebuilt["n_docs"] == len(docs(SECOND))
+
+
+def test_extension_failure_falls_back_to_existing_vocab(lda_dir, monkeypatch):
+    fsd_tools._fit_lda_online(docs(FIRST), n_topics=2, n_words=4)
+    vocab_before = list(fsd_tools._lda_models[2]["vocab"])
+
+    def broken(bundle, texts):
+        bundle["vocab"] = bundle["vocab"] + ["zzz"]  # 행렬은 안 늘린 채 어휘만 늘어난 상태
+
+    monkeypatch.setattr(fsd_tools, "_extend_vocab", broken)
+    fsd_tools._fit_lda_online(docs(SECOND), n_topics=2, n_words=4)
+    bundle = fsd_tools._lda_models[2]
+    assert bundle["vocab"] == vocab_before
+    assert bundle["n_docs"] == 2 * len(docs(FIRST))
@@ -0,0 +1,21 @@
+import pytest
+
+pytest.importorskip("transformers")
+
+from reddit_sentiment import make_buckets  # noqa: E402
+
+
+def test_buckets_respect_budget_and_cover_all():
+    lengths = [5, 120, 30, 31, 7, 64, 64, 2, 500]
+    buckets = make_buckets(lengths, token_budget=128, max_batch=3)
+    assert sorted(i for b in buckets for i in b) == list(range(len(lengths)))
+    for b in buckets:
+        assert len(b) <= 3
+        # 한 개짜리 버킷은 예산보다 길어도 그대로 (텍스트 하나는 항상 돌려야 함)
+        assert len(b) == 1 or len(b) * max(lengths[i] for i in b) <= 128
+    # 짧은 것부터
+    assert [lengths[b[0]] for b in buckets] == sorted(lengths[b[0]] for b in buckets)
+
+
+def test_empty():
+    assert make_buckets([], token_budget=128, max_batch=4) == []
@@ -0,0 +1,29 @@
+import json
+
+from reddit_fetch_posts import CheckpointWriter, _truncate_partial_line, iter_checkpoint
+
+
+def test_truncate_partial_line(tmp_path):
+    p = tmp_path / "ck.jsonl"
+    p.write_bytes(b'{"a": 1}\n{"b": 2}\n{"c": ')
+    assert _truncate_partial_line(str(p), block=4) == len(b'{"c": ')
+    assert p.read_bytes() == b'{"a": 1}\n{"b": 2}\n'
+    # 이미 개행으로 끝나면 그대로
+    assert _truncate_partial_line(str(p)) == 0
+
+
+def test_truncate_without_any_newline(tmp_path):
+    p = tmp_path / "ck.jsonl"
+    p.write_bytes(b'{"half')
+    assert _truncate_partial_line(str(p), block=2) == 6
+    assert p.read_bytes() == b""
+    assert _truncate_partial_line(str(tmp_path / "missing.jsonl")) == 0
+
+
+def test_resume_appends_after_partial_line(tmp_path):
+    p = tmp_path / "ck.jsonl"
+    p.write_text(json.dumps({"post_id": "a"}) + "\n" + '{"post_id": "b", "tit', encoding="utf-8")
+    w = CheckpointWriter(str(p), fresh=False)
+    w.write({"post_id": "c"})
+    w.close()
+    assert [rec["post_id"] for _, rec in iter_checkpoint(str(p))] == ["a", "c"]
@@ -0,0 +1,218 @@
+# backend/tracing.py
+"""
+에이전트 파이프라인 단계별 시간 측정 / 메트릭
+
+- span("crawl_keyword", keyword="fsd") 로 감싸면 소요 시간 + 속성(rows, bytes 등)을 기록
+- trace_request() 안에서 생긴 span 은 요청 단위 Trace 에 모임 → 응답의 timings 필드
+- 모든 span 은 프로세스 전역 메트릭에도 누적 → /metrics (Prometheus text format)
+- 스레드 풀로 넘기는 함수는 bind(fn) 으로 감싸야 현재 요청의 Trace 가 이어짐
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import threading
+import time
+
+
+# Prometheus histogram 버킷(초)
+DURATION_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+class Span:
+    __slots__ = ("name", "parent", "start", "end", "attrs")
+
+    def __init__(self, name: str, parent: Optional[str], attrs: Dict[str, Any]):
+        self.name = name
+        self.parent = parent
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.attrs = attrs
+
+    @property
+    def duration(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return end - self.start
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+
+class Trace:
+    """요청 하나에서 생긴 span 모음."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._spans: List[Span] = []
+
+    def add(self, sp: Span) -> None:
+        with self._lock:
+            self._spans.append(sp)
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            spans = sorted(self._spans, key=lambda s: s.start)
+        return [
+            {
+                "name": s.name,
+                "parent": s.parent,
+                "start_ms": round((s.start - self.start) * 1000, 3),
+                "duration_ms": round(s.duration * 1000, 3),
+                "attrs": dict(s.attrs),
+            }
+            for s in spans
+        ]
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("fsd_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("fsd_span", default=None)
+
+
+# ----- 전역 메트릭 -----
+
+class _Metrics:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # stage → [bucket counts..., +Inf count], sum
+        self.duration_buckets: Dict[str, List[int]] = {}
+        self.duration_sum: Dict[str, float] = {}
+        self.rows: Dict[str, float] = {}
+        self.bytes: Dict[str, float] = {}
+        # (cache, result) → count
+        self.cache_events: Dict[Tuple[str, str], float] = {}
+
+    def observe(self, sp: Span) -> None:
+        d = sp.duration
+        with self._lock:
+            buckets = self.duration_buckets.setdefault(sp.name, [0] * (len(DURATION_BUCKETS) + 1))
+            for i, le in enumerate(DURATION_BUCKETS):
+                if d <= le:
+                    buckets[i] += 1
+            buckets[-1] += 1
+            self.duration_sum[sp.name] = self.duration_sum.get(sp.name, 0.0) + d
+
+            rows = sp.attrs.get("rows")
+            if isinstance(rows, (int, float)):
+                self.rows[sp.name] = self.rows.get(sp.name, 0) + rows
+            nbytes = sp.attrs.get("bytes")
+            if isinstance(nbytes, (int, float)):
+                self.bytes[sp.name] = self.bytes.get(sp.name, 0) + nbytes
+
+    def count_cache(self, cache: str, result: str, n: float) -> None:
+        with self._lock:
+            key = (cache, result)
+            self.cache_events[key] = self.cache_events.get(key, 0) + n
+
+
+_metrics = _Metrics()
+
+
+# ----- 공개 API -----
+
+@contextmanager
+def trace_request(name: str = "request") -> Iterator[Trace]:
+    """이 블록 안(그리고 bind 된 스레드)에서 생긴 span 을 하나의 Trace 로 모은다."""
+    tr = Trace(name)
+    token = _current_trace.set(tr)
+    try:
+        with span(name):
+            yield tr
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Span]:
+    parent = _current_span.get()
+    sp = Span(name, parent.name if parent is not None else None, attrs)
+    token = _current_span.set(sp)
+    try:
+        yield sp
+    except BaseException as e:
+        sp.attrs["error"] = type(e).__name__
+        raise
+    finally:
+        sp.end = time.perf_counter()
+        _current_span.reset(token)
+        tr = _current_trace.get()
+        if tr is not None:
+            tr.add(sp)
+        _metrics.observe(sp)
+
+
+def annotate(**attrs: Any) -> None:
+    """현재 열려 있는 span 에 속성 추가 (span 밖이면 무시)."""
+    sp = _current_span.get()
+    if sp is not None:
+        sp.attrs.update(attrs)
+
+
+def count_cache(cache: str, result: str, n: float = 1) -> None:
+    """캐시 조회 결과 카운트 (result: hit | stale | miss | shared ...)."""
+    if n:
+        _metrics.count_cache(cache, result, n)
+
+
+def bind(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    현재 context(요청 Trace / 부모 span)를 캡처해서,
+    다른 스레드에서 fn 을 호출해도 같은 Trace 에 span 이 쌓이게 한다.
+    """
+    ctx = copy_context()
+
+    def _bound(*args: Any, **kwargs: Any) -> Any:
+        # Context 는 동시에 여러 스레드에서 run 할 수 없으므로 호출마다 복사
+        return ctx.copy().run(fn, *args, **kwargs)
+
+    return _bound
+
+
+def _escape_label(v: Any) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(**labels: Any) -> str:
+    inner = ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels.items())
+    return "{" + inner + "}" if inner else ""
+
+
+def render_prometheus() -> str:
+    """전역 메트릭을 Prometheus text exposition format 으로 변환."""
+    m = _metrics
+    lines: List[str] = []
+    with m._lock:
+        lines.append("# HELP fsd_stage_duration_seconds Agent pipeline stage latency.")
+        lines.append("# TYPE fsd_stage_duration_seconds histogram")
+        for stage in sorted(m.duration_buckets):
+            buckets = m.duration_buckets[stage]
+            for le, count in zip(DURATION_BUCKETS, buckets):
+                lines.append(f"fsd_stage_duration_seconds_bucket{_fmt_labels(stage=stage, le=repr(le))} {count}")
+            lines.append(f"fsd_stage_duration_seconds_bucket{_fmt_labels(stage=stage, le='+Inf')} {buckets[-1]}")
+            lines.append(f"fsd_stage_duration_seconds_sum{_fmt_labels(stage=stage)} {m.duration_sum[stage]:.6f}")
+            lines.append(f"fsd_stage_duration_seconds_count{_fmt_labels(stage=stage)} {buckets[-1]}")
+
+        lines.append("# HELP fsd_stage_rows_total Rows processed per stage.")
+        lines.append("# TYPE fsd_stage_rows_total counter")
+        for stage in sorted(m.rows):
+            lines.append(f"fsd_stage_rows_total{_fmt_labels(stage=stage)} {m.rows[stage]:g}")
+
+        lines.append("# HELP fsd_stage_bytes_total Bytes fetched per stage.")
+        lines.append("# TYPE fsd_stage_bytes_total counter")
+        for stage in sorted(m.bytes):
+            lines.append(f"fsd_stage_bytes_total{_fmt_labels(stage=stage)} {m.bytes[stage]:g}")
+
+        lines.append("# HELP fsd_cache_events_total Cache lookups by cache and result.")
+        lines.append("# TYPE fsd_cache_events_total counter")
+        for (cache, result) in sorted(m.cache_events):
+            lines.append(
+                f"fsd_cache_events_total{_fmt_labels(cache=cache, result=result)} "
+                f"{m.cache_events[(cache, result)]:g}"
+            )
+
+    return "\n".join(lines) + "\n"